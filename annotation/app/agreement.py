@@ -0,0 +1,192 @@
+import json
+import argparse
+import itertools
+from collections import defaultdict
+
+import numpy as np
+
+# 参与一致性计算的字段及其前缀：同一术语在不同字段中视为不同标签
+FIELDS = {
+    'patient_phenotypes': 'patient',
+    'family_phenotypes': 'family',
+    'patient_phenotypes_neg': 'patient_neg',
+    'family_phenotypes_neg': 'family_neg',
+}
+
+
+def label_set(record: dict, fields: dict = FIELDS) -> frozenset:
+    """一条标注记录的标签集合，如 {'patient:癫痫发作', 'family_neg:耳聋'}。"""
+    labels = set()
+    for field, prefix in fields.items():
+        for term in record.get(field) or []:
+            term = str(term).strip()
+            if term:
+                labels.add(f'{prefix}:{term}')
+    return frozenset(labels)
+
+
+def _pair_scores(n, size_a, size_b, inter, dice_sum, vocab_size) -> dict:
+    """
+    由一对标注员的充分统计量计算一致性。
+
+    Cohen's kappa 把每个 (样本, 标签) 视为一次二分类判断，标签空间为所有已出现的标签；
+    F1 为把一方当作参考时另一方的集合级 F1（micro），mean_dice 为逐样本 F1 的平均（macro）。
+    """
+    cells = n * vocab_size
+    if n == 0 or cells == 0:
+        return {"items": n, "cohen_kappa": None, "f1": None, "mean_dice": None}
+    disagree = size_a + size_b - 2 * inter
+    p_o = 1 - disagree / cells
+    p_a, p_b = size_a / cells, size_b / cells
+    p_e = p_a * p_b + (1 - p_a) * (1 - p_b)
+    kappa = (p_o - p_e) / (1 - p_e) if p_e < 1 else 1.0
+    f1 = 2 * inter / (size_a + size_b) if size_a + size_b else 1.0
+    return {"items": n, "cohen_kappa": round(kappa, 4), "f1": round(f1, 4), "mean_dice": round(dice_sum / n, 4)}
+
+
+def _fleiss(items, item_sum, k_sum, labels_sum, raters_sum, vocab_size) -> dict:
+    """
+    Fleiss' kappa（允许每个样本的标注人数不同）。未出现的标签上所有标注员一致（都未选），
+    每个样本的一致度 = (V - k_i + S_i) / V，其中 S_i 只需在出现过的 k_i 个标签上累加。
+    """
+    if items == 0 or vocab_size == 0:
+        return {"items": items, "fleiss_kappa": None}
+    p_bar = (items * vocab_size - k_sum + item_sum) / (items * vocab_size)
+    p_yes = labels_sum / (raters_sum * vocab_size)
+    p_e = p_yes ** 2 + (1 - p_yes) ** 2
+    kappa = (p_bar - p_e) / (1 - p_e) if p_e < 1 else 1.0
+    return {"items": items, "fleiss_kappa": round(kappa, 4)}
+
+
+def _item_fleiss_terms(ratings) -> tuple:
+    """单个样本对 Fleiss' kappa 的贡献：(S_i, k_i, 标签总数, 标注人数)"""
+    n = len(ratings)
+    counts = defaultdict(int)
+    for labels in ratings:
+        for label in labels:
+            counts[label] += 1
+    s = sum(c * c + (n - c) ** 2 - n for c in counts.values()) / (n * (n - 1))
+    return s, len(counts), sum(counts.values()), n
+
+
+def _dice(a: frozenset, b: frozenset) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 1.0
+
+
+class AgreementTracker:
+    """
+    增量维护标注员一致性：每位标注员对（的每个共同样本）只保存 |A|、|B|、|A∩B| 等累加量，
+    新提交（或修改）只更新该样本涉及的标注员对与 Fleiss 累加量，无需全量重算。
+    """
+
+    def __init__(self, fields: dict = FIELDS):
+        self.fields = fields
+        self.items = defaultdict(dict)      # idx -> {annotator: 标签集合}
+        self.vocab = set()
+        # (annotator_a, annotator_b) -> [n, |A|, |B|, |A∩B|, Σdice]，a < b
+        self.pairs = defaultdict(lambda: [0, 0, 0, 0, 0.0])
+        # Fleiss 累加量：[样本数, ΣS_i, Σk_i, Σ标签数, Σ标注人数]
+        self.fleiss = [0, 0.0, 0, 0, 0]
+
+    def _update(self, idx, sign: int):
+        raters = self.items[idx]
+        for a, b in itertools.combinations(sorted(raters, key=str), 2):
+            la, lb = raters[a], raters[b]
+            stats = self.pairs[(a, b)]
+            for i, value in enumerate((1, len(la), len(lb), len(la & lb), _dice(la, lb))):
+                stats[i] += sign * value
+        if len(raters) >= 2:
+            s, k, labels, n = _item_fleiss_terms(list(raters.values()))
+            for i, value in enumerate((1, s, k, labels, n)):
+                self.fleiss[i] += sign * value
+
+    def add(self, idx, annotator, record: dict):
+        """加入或更新一条标注。"""
+        self._update(idx, -1)
+        labels = label_set(record, self.fields)
+        self.items[idx][annotator] = labels
+        self.vocab.update(labels)
+        self._update(idx, +1)
+
+    def summary(self) -> dict:
+        vocab_size = len(self.vocab)
+        pairs = {
+            f'{a}|{b}': _pair_scores(*stats, vocab_size)
+            for (a, b), stats in sorted(self.pairs.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1])))
+            if stats[0] > 0
+        }
+        total = [sum(s[i] for s in self.pairs.values()) for i in range(5)]
+        return {
+            "labels": vocab_size,
+            "overall": _pair_scores(*total, vocab_size),
+            "fleiss": _fleiss(*self.fleiss, vocab_size),
+            "pairs": pairs,
+        }
+
+    @classmethod
+    def from_records(cls, records, fields: dict = FIELDS) -> 'AgreementTracker':
+        """
+        由 (idx, annotator, record) 批量构建。标签矩阵一次性向量化计算所有标注员对的累加量，
+        结果与逐条 add 相同。
+        """
+        tracker = cls(fields)
+        for idx, annotator, record in records:
+            labels = label_set(record, fields)
+            tracker.items[idx][annotator] = labels
+            tracker.vocab.update(labels)
+
+        vocab = {label: j for j, label in enumerate(sorted(tracker.vocab))}
+        rows, row_of = [], {}
+        for idx, raters in tracker.items.items():
+            for annotator, labels in raters.items():
+                row_of[(idx, annotator)] = len(rows)
+                rows.append(labels)
+        if not rows:
+            return tracker
+        x = np.zeros((len(rows), max(len(vocab), 1)), dtype=bool)
+        for r, labels in enumerate(rows):
+            x[r, [vocab[label] for label in labels]] = True
+        sizes = x.sum(axis=1)
+
+        # 所有共同样本上的标注员对
+        r1, r2, keys = [], [], []
+        for idx, raters in tracker.items.items():
+            for a, b in itertools.combinations(sorted(raters, key=str), 2):
+                r1.append(row_of[(idx, a)])
+                r2.append(row_of[(idx, b)])
+                keys.append((a, b))
+        if r1:
+            r1, r2 = np.array(r1), np.array(r2)
+            inter = (x[r1] & x[r2]).sum(axis=1)
+            denom = sizes[r1] + sizes[r2]
+            dice = np.where(denom > 0, 2 * inter / np.maximum(denom, 1), 1.0)
+            key_list = sorted(set(keys), key=lambda k: (str(k[0]), str(k[1])))
+            key_index = {k: i for i, k in enumerate(key_list)}
+            key_ids = np.array([key_index[k] for k in keys])
+            columns = [np.ones(len(r1)), sizes[r1], sizes[r2], inter, dice]
+            sums = [np.bincount(key_ids, weights=c, minlength=len(key_list)) for c in columns]
+            for i, key in enumerate(key_list):
+                tracker.pairs[key] = [int(sums[0][i]), int(sums[1][i]), int(sums[2][i]), int(sums[3][i]), float(sums[4][i])]
+
+        # Fleiss：样本 x 标签的选择人数矩阵
+        multi = [idx for idx, raters in tracker.items.items() if len(raters) >= 2]
+        if multi:
+            counts = np.stack([x[[row_of[(idx, a)] for a in tracker.items[idx]]].sum(axis=0) for idx in multi])
+            n = np.array([len(tracker.items[idx]) for idx in multi])[:, None]
+            present = counts > 0
+            s = np.where(present, counts ** 2 + (n - counts) ** 2 - n, 0).sum(axis=1) / (n[:, 0] * (n[:, 0] - 1))
+            tracker.fleiss = [len(multi), float(s.sum()), int(present.sum()), int(counts.sum()), int(n.sum())]
+        return tracker
+
+
+if __name__ == '__main__':
+    from store import AnnotationStore
+
+    parser = argparse.ArgumentParser(description='计算标注员之间的一致性（Cohen/Fleiss kappa 与集合 F1）')
+    parser.add_argument('--db', type=str, required=True, help='SQLite 标注数据库路径')
+    args = parser.parse_args()
+
+    store = AnnotationStore(args.db)
+    tracker = AgreementTracker.from_records(store.overlap_annotations())
+    print(json.dumps(tracker.summary(), ensure_ascii=False, indent=2))
+    store.close()
@@ -0,0 +1,128 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+
+class JsonlDataset:
+    """
+    按需读取的 JSONL 数据集。
+
+    启动时只加载（或首次构建）旁路偏移索引 ``<数据文件>.offsets.json``，其中记录每行的
+    数据 index 与字节偏移；读取单条数据时 seek 到对应偏移解析一行，并用 LRU 缓存最近读取的数据。
+    源文件大小或修改时间变化时自动重建索引。
+
+    数据文件也可以是 JSON 数组（旧格式）：首次打开时转换为同名 ``.jsonl`` 文件后再建立索引。
+    """
+
+    def __init__(self, path: str, transform=None, cache_size: int = 1024):
+        self.path = path
+        self.transform = transform          # 读取后对每条数据的处理（如补全字段）
+        self.cache_size = cache_size
+        self.ids = []
+        self.jsonl_path = None
+        self._offsets = {}                  # 数据 index -> 字节偏移
+        self._cache = OrderedDict()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, idx):
+        return idx in self._offsets
+
+    # --- 索引 ---
+
+    @staticmethod
+    def _signature(path: str) -> dict:
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    @staticmethod
+    def _is_json_array(path: str) -> bool:
+        with open(path, 'rb') as f:
+            head = f.read(4096).lstrip(b'\xef\xbb\xbf \t\r\n')
+        return head.startswith(b'[')
+
+    def _convert_to_jsonl(self) -> str:
+        jsonl_path = os.path.splitext(self.path)[0] + '.jsonl'
+        if (os.path.exists(jsonl_path) and
+                os.path.getmtime(jsonl_path) >= os.path.getmtime(self.path)):
+            return jsonl_path
+        with open(self.path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        tmp_path = jsonl_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, jsonl_path)
+        print(f"[System] 已将 {self.path} 转换为 {jsonl_path}（{len(items)} 条）。")
+        return jsonl_path
+
+    def _build_index(self, jsonl_path: str) -> dict:
+        ids, offsets = [], []
+        with open(jsonl_path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    ids.append(json.loads(line)['index'])
+                    offsets.append(offset)
+                offset += len(line)
+        return {**self._signature(jsonl_path), "ids": ids, "offsets": offsets}
+
+    def open(self) -> 'JsonlDataset':
+        """加载或构建偏移索引（阻塞，宜在线程池中调用）。"""
+        jsonl_path = self._convert_to_jsonl() if self._is_json_array(self.path) else self.path
+        index_path = jsonl_path + '.offsets.json'
+
+        index = None
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if {k: index.get(k) for k in ("size", "mtime")} != self._signature(jsonl_path):
+                index = None
+        if index is None:
+            index = self._build_index(jsonl_path)
+            tmp_path = index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+            print(f"[System] 已为 {jsonl_path} 建立偏移索引（{len(index['ids'])} 条）。")
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self.jsonl_path = jsonl_path
+            self.ids = index["ids"]
+            self._offsets = dict(zip(index["ids"], index["offsets"]))
+            self._cache.clear()
+            self._file = open(jsonl_path, 'rb')
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # --- 读取 ---
+
+    def get(self, idx):
+        """读取一条数据，不存在时返回 None。"""
+        with self._lock:
+            item = self._cache.get(idx)
+            if item is not None:
+                self._cache.move_to_end(idx)
+                return item
+            offset = self._offsets.get(idx)
+            if offset is None:
+                return None
+            self._file.seek(offset)
+            item = json.loads(self._file.readline())
+            if self.transform is not None:
+                item = self.transform(item)
+            self._cache[idx] = item
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return item
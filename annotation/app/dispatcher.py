@@ -0,0 +1,157 @@
+import time
+import heapq
+from collections import defaultdict
+
+from app.pending_queue import PendingQueue
+
+
+class LeaseDispatcher:
+    """
+    基于租约的多标注员任务分配。
+
+    每个标注员拿到的样本带有过期时间的租约，租约期内其他标注员不会分到该样本；
+    标注员离开（租约过期或主动释放）后样本自动回到可分配池。过期租约通过最小堆惰性回收。
+    任何租约结束（过期、超出上限被挤出、释放或提交）时调用 on_release(annotator, sample_id)。
+    """
+
+    def __init__(self, queue: PendingQueue, lease_seconds: float = 900, max_leases: int = 1, clock=time.monotonic,
+                 on_release=None):
+        self.queue = queue
+        self.lease_seconds = lease_seconds
+        self.max_leases = max_leases        # 每个标注员同时持有的租约上限
+        self.clock = clock
+        self.on_release = on_release
+        self.leases = {}                    # sample_id -> (annotator, expires_at)
+        self.held = defaultdict(dict)       # annotator -> {sample_id: None}（保持获取顺序）
+        self.submitted = defaultdict(int)   # annotator -> 已提交数
+        self.last_seen = {}                 # annotator -> 最近活动时间（time.time()）
+        self.done = defaultdict(set)        # sample_id -> 已提交但样本仍需其他人标注的标注员
+        self._expiry = []                   # (expires_at, sample_id) 最小堆，含已失效条目
+
+    def _reap(self):
+        now = self.clock()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, sample_id = heapq.heappop(self._expiry)
+            lease = self.leases.get(sample_id)
+            # 续租后堆中旧条目已失效，只回收真正过期的租约
+            if lease is not None and lease[1] == expires_at:
+                self._drop(sample_id)
+
+    def _drop(self, sample_id):
+        annotator, _ = self.leases.pop(sample_id)
+        self.held[annotator].pop(sample_id, None)
+        if self.on_release is not None:
+            self.on_release(annotator, sample_id)
+
+    def _lease(self, annotator, sample_id):
+        expires_at = self.clock() + self.lease_seconds
+        self.leases[sample_id] = (annotator, expires_at)
+        self.held[annotator].pop(sample_id, None)
+        self.held[annotator][sample_id] = None
+        heapq.heappush(self._expiry, (expires_at, sample_id))
+        # 超过上限时释放最早获取的租约
+        while len(self.held[annotator]) > self.max_leases:
+            self._drop(next(iter(self.held[annotator])))
+
+    def holder(self, sample_id):
+        self._reap()
+        lease = self.leases.get(sample_id)
+        return lease[0] if lease else None
+
+    def active(self) -> int:
+        """当前有效的租约数"""
+        self._reap()
+        return len(self.leases)
+
+    def available(self, sample_id, annotator) -> bool:
+        lease = self.leases.get(sample_id)
+        return (sample_id in self.queue and (lease is None or lease[0] == annotator)
+                and annotator not in self.done.get(sample_id, ()))
+
+    def holding(self, annotator) -> list:
+        self._reap()
+        return [sid for sid in self.held.get(annotator, {}) if sid in self.queue]
+
+    def acquire(self, annotator, action='init', current_id=None):
+        """
+        为标注员分配一个样本并加租约。
+
+        init: 优先返回其仍持有的样本，否则返回队首第一个可分配的样本；
+        next/prev: 从 current_id 出发向后/向前找第一个可分配的样本（已在开头时 prev 停留在当前样本）。
+
+        Returns:
+            样本 index；没有可分配样本时返回 None。
+        """
+        self._reap()
+        self.last_seen[annotator] = time.time()
+
+        if action == 'init' or current_id is None:
+            held = self.holding(annotator)
+            sample_id = held[0] if held else self._scan(self.queue.first(), self.queue.next, annotator)
+        elif action == 'prev':
+            sample_id = self._scan(self.queue.prev(current_id), self.queue.prev, annotator)
+            if sample_id is None:
+                sample_id = current_id if self.available(current_id, annotator) else \
+                    self._scan(self.queue.first(), self.queue.next, annotator)
+        else:
+            sample_id = self._scan(self.queue.next(current_id), self.queue.next, annotator)
+
+        if sample_id is not None:
+            self._lease(annotator, sample_id)
+        return sample_id
+
+    def acquire_many(self, annotator, count: int, current_id=None) -> list:
+        """
+        从 current_id 之后（为空时从队首）为标注员连续分配最多 count 个样本，用于前端预取。
+        受 max_leases 限制，超出时最早获取的租约被释放。
+        """
+        self._reap()
+        self.last_seen[annotator] = time.time()
+        start = self.queue.first() if current_id is None else self.queue.next(current_id)
+        sample_ids = []
+        sample_id = self._scan(start, self.queue.next, annotator)
+        while sample_id is not None and len(sample_ids) < count:
+            sample_ids.append(sample_id)
+            sample_id = self._scan(self.queue.next(sample_id), self.queue.next, annotator)
+        for sample_id in sample_ids:
+            self._lease(annotator, sample_id)
+        return sample_ids
+
+    def _scan(self, sample_id, step, annotator):
+        # 跳过其他标注员持有的样本，跳过的数量不超过当前租约总数
+        while sample_id is not None and not self.available(sample_id, annotator):
+            sample_id = step(sample_id)
+        return sample_id
+
+    def release(self, annotator, sample_id=None):
+        """释放标注员的某个（或全部）租约，样本立即回到可分配池。"""
+        for sid in ([sample_id] if sample_id is not None else list(self.held.get(annotator, {}))):
+            lease = self.leases.get(sid)
+            if lease is not None and lease[0] == annotator:
+                self._drop(sid)
+
+    def complete(self, annotator, sample_id, finished: bool = True):
+        """
+        样本提交后调用：释放该样本的租约（无论由谁持有）并计入标注员进度。
+        finished=False 表示样本还需要其他标注员标注，之后不再分配给该标注员。
+        """
+        if sample_id in self.leases:
+            self._drop(sample_id)
+        if finished:
+            self.done.pop(sample_id, None)
+        else:
+            self.done[sample_id].add(annotator)
+        self.submitted[annotator] += 1
+        self.last_seen[annotator] = time.time()
+
+    def annotator_stats(self) -> dict:
+        self._reap()
+        names = set(self.submitted) | set(self.last_seen) | {a for a, h in self.held.items() if h}
+        return {
+            name: {
+                "submitted": self.submitted.get(name, 0),
+                "holding": self.holding(name),
+                "last_seen": self.last_seen.get(name),
+            }
+            for name in sorted(names, key=str)
+        }
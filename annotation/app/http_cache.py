@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from quart import Response, request
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只使用 gzip
+    brotli = None
+
+COMPRESS_MIN_SIZE = 1024    # 小于该字节数的响应不压缩
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def file_digest(path: str) -> str:
+    """文件内容的 SHA-256，作为 ETag 使用。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _accepted_encodings() -> list:
+    """按服务端优先级返回客户端接受的压缩方式（br > gzip）。"""
+    header = request.headers.get('Accept-Encoding', '')
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                pass
+        accepted[name.strip().lower()] = q
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return [e for e in supported if accepted.get(e, accepted.get('*', 0)) > 0]
+
+
+class CachedPayload:
+    """
+    预先序列化、预先压缩的响应体。
+
+    ETag 由调用方给出（如 HPO 词表文件的哈希），内容不变时浏览器用 If-None-Match /
+    If-Modified-Since 重新验证即可得到 304，不再重复下载；需要下载时直接返回已压缩的字节。
+    """
+
+    def __init__(self, body: bytes, mimetype: str, etag: str = None, last_modified: float = None):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag or hashlib.sha256(body).hexdigest()
+        self.last_modified = last_modified
+        self.variants = {None: body}
+        if len(body) >= COMPRESS_MIN_SIZE:
+            self.variants['gzip'] = _compress(body, 'gzip')
+            if brotli is not None:
+                self.variants['br'] = _compress(body, 'br')
+
+    def _not_modified(self) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix('W/').strip('"') for t in if_none_match.split(',')}
+            return '*' in tags or self.etag in tags
+        if_modified_since = request.headers.get('If-Modified-Since')
+        if if_modified_since and self.last_modified is not None:
+            try:
+                return int(self.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response(self) -> Response:
+        headers = {
+            'ETag': f'"{self.etag}"',
+            'Cache-Control': 'no-cache',        # 每次使用前重新验证，内容不变时只有 304
+            'Vary': 'Accept-Encoding',
+        }
+        if self.last_modified is not None:
+            headers['Last-Modified'] = formatdate(self.last_modified, usegmt=True)
+        if self._not_modified():
+            return Response(b'', status=304, headers=headers)
+
+        encoding = next((e for e in _accepted_encodings() if e in self.variants), None)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return Response(self.variants[encoding], mimetype=self.mimetype, headers=headers)
+
+
+class PayloadCache:
+    """
+    按请求参数缓存 CachedPayload（LRU），用于结果只取决于参数且启动后不变的接口（如术语检索）。
+    重复的请求直接返回已序列化、已压缩的响应体，浏览器带 ETag 重新验证时得到 304。
+    """
+
+    def __init__(self, maxsize: int = 1024, mimetype: str = 'application/json'):
+        self.maxsize = maxsize
+        self.mimetype = mimetype
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+    def get(self, key, build) -> CachedPayload:
+        """key 对应的响应体；未缓存时调用 build() 生成（返回 bytes）。"""
+        payload = self._items.get(key)
+        if payload is not None:
+            self._items.move_to_end(key)
+            return payload
+        payload = CachedPayload(build(), self.mimetype)
+        self._items[key] = payload
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return payload
+
+
+async def compress_response(response: Response) -> Response:
+    """after_request 钩子：对较大的文本/JSON 响应按 Accept-Encoding 进行压缩。"""
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    encodings = _accepted_encodings()
+    if not encodings:
+        return response
+    body = await response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(_compress(body, encodings[0]))
+    response.headers['Content-Encoding'] = encodings[0]
+    response.vary.add('Accept-Encoding')
+    return response
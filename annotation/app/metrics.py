@@ -0,0 +1,173 @@
+import time
+import bisect
+from collections import defaultdict, deque
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SAMPLE_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+class Histogram:
+    """Prometheus 风格的累计直方图，另保留最近的观测值用于计算分位数。"""
+
+    def __init__(self, buckets, recent: int = 1000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q: float):
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+    def exposition(self, name: str, labels: str) -> list:
+        lines, cumulative = [], 0
+        sep = ',' if labels else ''
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum:.6f}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """
+    标注服务的运行指标：各路由请求延迟、每位标注员在单个样本上的用时、
+    近一小时提交速率与待标注队列长度。全部在内存中累计，服务重启后清零。
+    """
+
+    def __init__(self, window_seconds: float = 3600, clock=time.time):
+        self.clock = clock
+        self.started_at = clock()
+        self.window_seconds = window_seconds
+        self.requests = defaultdict(int)                                # (route, method, status) -> 次数
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (route, method) -> 直方图
+        self.time_on_sample = defaultdict(lambda: Histogram(SAMPLE_BUCKETS))  # annotator -> 直方图
+        self.submissions = defaultdict(int)                             # annotator -> 提交数
+        self.recent_submissions = deque()                               # 窗口内的提交时间
+        self.served = {}                                                # (annotator, sample_id) -> 首次下发时间
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        self.requests[(route, method, status)] += 1
+        self.latency[(route, method)].observe(seconds)
+
+    def sample_served(self, annotator, sample_id):
+        self.served.setdefault((annotator, sample_id), self.clock())
+
+    def sample_submitted(self, annotator, sample_id, seconds: float = None):
+        """记录一次提交；seconds 为前端测得的样本用时，缺省时用服务端下发到提交的间隔。"""
+        now = self.clock()
+        served_at = self.served.pop((annotator, sample_id), None)
+        if seconds is None and served_at is not None:
+            seconds = now - served_at
+        if seconds is not None and seconds >= 0:
+            self.time_on_sample[annotator].observe(seconds)
+        self.submissions[annotator] += 1
+        self.recent_submissions.append(now)
+        self._trim(now)
+
+    def forget(self, annotator, sample_ids):
+        """租约释放后丢弃未提交样本的下发时间，避免无限增长。"""
+        for sample_id in sample_ids:
+            self.served.pop((annotator, sample_id), None)
+
+    def _trim(self, now):
+        while self.recent_submissions and self.recent_submissions[0] < now - self.window_seconds:
+            self.recent_submissions.popleft()
+
+    def submissions_per_hour(self) -> float:
+        now = self.clock()
+        self._trim(now)
+        # 服务刚启动不足一个窗口时按已运行时间折算（至少 5 分钟，避免刚启动时速率虚高）
+        window = min(self.window_seconds, max(now - self.started_at, 300.0))
+        return len(self.recent_submissions) * 3600 / window
+
+    def summary(self, queue_depth: int, active_leases: int) -> dict:
+        rate = self.submissions_per_hour()
+        return {
+            "uptime_seconds": round(self.clock() - self.started_at, 1),
+            "queue_depth": queue_depth,
+            "active_leases": active_leases,
+            "submissions_per_hour": round(rate, 2),
+            "eta_hours": round(queue_depth / rate, 2) if rate > 0 else None,
+            "routes": {
+                f"{method} {route}": hist.summary() for (route, method), hist in sorted(self.latency.items())
+            },
+            "annotators": {
+                annotator: {"submitted": self.submissions.get(annotator, 0), "time_on_sample": hist.summary()}
+                for annotator, hist in sorted(self.time_on_sample.items())
+            },
+        }
+
+    def exposition(self, queue_depth: int, active_leases: int) -> str:
+        """Prometheus 文本格式（text/plain; version=0.0.4）。"""
+        lines = [
+            '# HELP annotation_http_requests_total HTTP requests by route, method and status.',
+            '# TYPE annotation_http_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(self.requests.items()):
+            lines.append(f'annotation_http_requests_total{{route="{_label(route)}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP annotation_http_request_duration_seconds Request latency by route.',
+            '# TYPE annotation_http_request_duration_seconds histogram',
+        ]
+        for (route, method), hist in sorted(self.latency.items()):
+            lines += hist.exposition('annotation_http_request_duration_seconds', f'route="{_label(route)}",method="{method}"')
+
+        lines += [
+            '# HELP annotation_time_on_sample_seconds Time an annotator spent on a sample before submitting.',
+            '# TYPE annotation_time_on_sample_seconds histogram',
+        ]
+        for annotator, hist in sorted(self.time_on_sample.items()):
+            lines += hist.exposition('annotation_time_on_sample_seconds', f'annotator="{_label(annotator)}"')
+
+        lines += [
+            '# HELP annotation_submissions_total Submissions since server start by annotator.',
+            '# TYPE annotation_submissions_total counter',
+        ]
+        for annotator, count in sorted(self.submissions.items()):
+            lines.append(f'annotation_submissions_total{{annotator="{_label(annotator)}"}} {count}')
+
+        rate = self.submissions_per_hour()
+        lines += [
+            '# HELP annotation_submissions_per_hour Submission rate over the last hour.',
+            '# TYPE annotation_submissions_per_hour gauge',
+            f'annotation_submissions_per_hour {rate:.4f}',
+            '# HELP annotation_pending_samples Samples still waiting for annotation.',
+            '# TYPE annotation_pending_samples gauge',
+            f'annotation_pending_samples {queue_depth}',
+            '# HELP annotation_active_leases Samples currently leased to an annotator.',
+            '# TYPE annotation_active_leases gauge',
+            f'annotation_active_leases {active_leases}',
+        ]
+        if rate > 0:
+            lines += [
+                '# HELP annotation_eta_seconds Estimated time to finish the queue at the current rate.',
+                '# TYPE annotation_eta_seconds gauge',
+                f'annotation_eta_seconds {queue_depth / rate * 3600:.0f}',
+            ]
+        return '\n'.join(lines) + '\n'
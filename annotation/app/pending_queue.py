@@ -0,0 +1,125 @@
+class PendingQueue:
+    """
+    待标注队列：保持原始顺序，支持 O(1) 的查找、前后导航与删除。
+
+    样本 index 按插入顺序存放在数组中，``_pos`` 记录 index → 数组位置；
+    ``_prev`` / ``_next`` 为数组位置上的双向链表。删除时只从链表中摘除并留下墓碑
+    （保留被删节点自身的前后指针），因此从已提交的样本出发仍能导航到相邻的待标注样本。
+    墓碑过多时整体压缩一次，均摊 O(1)；压缩时本轮被删的样本记下前后最近的待标注样本（``_moved``），
+    压缩后从它出发仍能导航到相邻样本。``_moved`` 每次压缩时重建，大小不超过队列长度；
+    更早一轮压缩掉的样本视为未知（导航到队首）。
+    """
+
+    _NONE = -1
+
+    def __init__(self, ids=()):
+        self._ids = []          # 位置 -> 样本 index
+        self._alive = []        # 位置 -> 是否仍待标注
+        self._prev = []
+        self._next = []
+        self._pos = {}          # 样本 index -> 位置（含墓碑，直到压缩）
+        self._head = self._NONE
+        self._tail = self._NONE
+        self._size = 0
+        self._moved = {}        # 压缩掉的样本 index -> (前一个, 后一个) 压缩时仍待标注的样本 index
+        for sample_id in ids:
+            self.append(sample_id)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, sample_id):
+        pos = self._pos.get(sample_id)
+        return pos is not None and self._alive[pos]
+
+    def __iter__(self):
+        pos = self._head
+        while pos != self._NONE:
+            yield self._ids[pos]
+            pos = self._next[pos]
+
+    def append(self, sample_id):
+        if sample_id in self:
+            return
+        self._moved.pop(sample_id, None)
+        pos = len(self._ids)
+        self._ids.append(sample_id)
+        self._alive.append(True)
+        self._prev.append(self._tail)
+        self._next.append(self._NONE)
+        if self._tail != self._NONE:
+            self._next[self._tail] = pos
+        else:
+            self._head = pos
+        self._tail = pos
+        self._pos[sample_id] = pos
+        self._size += 1
+
+    def remove(self, sample_id) -> bool:
+        """从队列中移除（标注完成），返回是否确实移除。"""
+        pos = self._pos.get(sample_id)
+        if pos is None or not self._alive[pos]:
+            return False
+        prev_pos, next_pos = self._prev[pos], self._next[pos]
+        if prev_pos != self._NONE:
+            self._next[prev_pos] = next_pos
+        else:
+            self._head = next_pos
+        if next_pos != self._NONE:
+            self._prev[next_pos] = prev_pos
+        else:
+            self._tail = prev_pos
+        self._alive[pos] = False
+        self._size -= 1
+        if len(self._ids) > 64 and self._size < len(self._ids) // 2:
+            self._compact()
+        return True
+
+    def _compact(self):
+        # 数组顺序即队列顺序：墓碑的前后邻居就是数组中前后最近的存活位置
+        moved = {}
+        ids, removed, last = [], [], None
+        for pos, sample_id in enumerate(self._ids):
+            if self._alive[pos]:
+                for r in removed:
+                    moved[r] = (last, sample_id)
+                removed = []
+                last = sample_id
+                ids.append(sample_id)
+            else:
+                removed.append(sample_id)
+        for r in removed:
+            moved[r] = (last, None)
+        self.__init__(ids)
+        self._moved = moved
+
+    def first(self):
+        return self._ids[self._head] if self._head != self._NONE else None
+
+    def _alive_from(self, pos, step):
+        # 墓碑保留了删除时的指针，沿指针前进直到遇到仍在队列中的位置
+        while pos != self._NONE and not self._alive[pos]:
+            pos = step[pos]
+        return pos
+
+    def _neighbour(self, sample_id, forward):
+        if sample_id in self._moved:
+            # 压缩掉的样本：跳到压缩时的邻居（压缩后的队列中一定有它），再按墓碑指针继续
+            target = self._moved[sample_id][1 if forward else 0]
+            if target is None or target in self:
+                return target
+            sample_id = target
+        pos = self._pos.get(sample_id)
+        if pos is None:
+            return self.first()
+        step = self._next if forward else self._prev
+        pos = self._alive_from(step[pos], step)
+        return self._ids[pos] if pos != self._NONE else None
+
+    def next(self, sample_id):
+        """sample_id 之后的第一个待标注样本；sample_id 未知时返回队首。"""
+        return self._neighbour(sample_id, True)
+
+    def prev(self, sample_id):
+        """sample_id 之前的第一个待标注样本；sample_id 未知时返回队首。"""
+        return self._neighbour(sample_id, False)
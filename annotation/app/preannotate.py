@@ -0,0 +1,180 @@
+import asyncio
+from collections import deque
+
+NEGATION_CUES = ('无', '未见', '未', '否认', '不伴', '排除')
+
+
+class DictionaryMatcher:
+    """
+    本地词典匹配：在描述中按最长匹配查找 CHPO 中文术语名，跳过紧跟否定词（无、未见、否认……）的匹配。
+    每个位置只尝试词表中出现过的名称长度，单条描述耗时在毫秒级，可以在请求中直接调用。
+    输出与离线 LLM 标注相同的 [HPO_ID, 英文, 中文, 原文] 行。
+    """
+
+    name = 'dictionary'
+
+    def __init__(self, terms, min_length: int = 2):
+        # terms: [(hpo_id, 英文, 中文)]
+        self.terms = {}
+        for hpo_id, en, zh in terms:
+            zh = str(zh).strip()
+            if len(zh) >= min_length:
+                self.terms.setdefault(zh, (hpo_id, en))
+        self.lengths = sorted({len(n) for n in self.terms}, reverse=True)
+
+    @classmethod
+    def from_term_index(cls, term_index, min_length: int = 2):
+        return cls(term_index.terms, min_length)
+
+    def _negated(self, text: str, start: int) -> bool:
+        window = text[max(0, start - 3):start]
+        return any(window.endswith(cue) for cue in NEGATION_CUES)
+
+    def match(self, text: str) -> list:
+        found, seen = [], set()
+        i = 0
+        while i < len(text):
+            for length in self.lengths:
+                candidate = text[i:i + length]
+                if len(candidate) == length and candidate in self.terms:
+                    if candidate not in seen and not self._negated(text, i):
+                        seen.add(candidate)
+                        hpo_id, en = self.terms[candidate]
+                        found.append([hpo_id, en, candidate, candidate])
+                    i += length
+                    break
+            else:
+                i += 1
+        return found
+
+    def __call__(self, texts):
+        return [self.match(text or '') for text in texts]
+
+
+class LLMAnnotator:
+    """通过 LLM_Call 调用大模型标注，返回解析后的 [HPO_ID, 英文, 中文, 原文] 行；调用或解析失败的样本返回 None。"""
+
+    name = 'llm'
+
+    def __init__(self, llm, prompt: str, parse, max_workers: int = 4):
+        self.llm = llm              # LLM_Call（use_async_api=False）
+        self.prompt = prompt        # 含 {description} 的提示词
+        self.parse = parse          # response_parser.parse_response
+        self.max_workers = max_workers
+
+    def __call__(self, texts):
+        prompts = [self.prompt.format(description=text or '') for text in texts]
+        responses = self.llm.batch_chat(prompts, max_workers=self.max_workers)
+        results = []
+        for response in responses:
+            parsed, _ = self.parse(response) if response is not None else (None, [])
+            results.append(parsed)
+        return results
+
+
+class PreAnnotator:
+    """
+    后台预标注：始终保证待标注队列前 window 条数据已有预测结果。
+
+    预测在线程池中计算，结果写入数据库并缓存在内存中，请求处理只读内存缓存，不会等待计算；
+    被下发但尚未预标注的数据会插队优先处理。数据文件中已带 llm_predict 的数据不重复计算。
+    """
+
+    def __init__(self, method, store, dataset, queue, window: int = 50, batch_size: int = 8,
+                 interval: float = 2.0, max_attempts: int = 3, fallback=None):
+        self.method = method            # texts -> [rows 或 None]
+        self.store = store              # AsyncAnnotationStore
+        self.dataset = dataset
+        self.queue = queue              # PendingQueue
+        self.window = window
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.fallback = fallback        # 可在请求中直接调用的快速方法（如词典匹配）
+        self.cache = {}                 # idx -> (method, rows)
+        self.attempts = {}              # idx -> 失败次数
+        self._priority = deque()
+        self._wake = asyncio.Event()
+
+    def lookup(self, idx, text: str = None):
+        """
+        请求处理中调用：返回 (method, rows)，数据文件中已有预测时 rows 为 None。
+        尚未预标注时让该数据插队，并在有快速方法时直接返回其结果（不写入数据库）。
+        """
+        cached = self.cache.get(idx)
+        if cached is not None:
+            return cached
+        self._priority.append(idx)
+        self._wake.set()
+        if self.fallback is not None and text is not None:
+            return self.fallback.name, self.fallback([text])[0]
+        return None
+
+    def discard(self, idx):
+        """数据完成标注后释放缓存。"""
+        self.cache.pop(idx, None)
+        self.attempts.pop(idx, None)
+
+    def _next_batch(self) -> list:
+        batch = []
+
+        def want(idx):
+            return (idx not in self.cache and idx in self.queue and idx not in batch
+                    and self.attempts.get(idx, 0) < self.max_attempts)
+
+        while self._priority and len(batch) < self.batch_size:
+            idx = self._priority.popleft()
+            if want(idx):
+                batch.append(idx)
+        for i, idx in enumerate(self.queue):
+            if i >= self.window or len(batch) >= self.batch_size:
+                break
+            if want(idx):
+                batch.append(idx)
+        return batch
+
+    async def _annotate(self, ids):
+        method_name = getattr(self.method, 'name', 'custom')
+        self.cache.update(await self.store.get_predictions(ids))
+
+        todo = []
+        for idx in ids:
+            if idx in self.cache:
+                continue
+            item = self.dataset.get(idx) or {}
+            if item.get('llm_predict'):
+                # 数据文件中已有离线预测结果，直接使用，不再记录
+                self.cache[idx] = ('data', None)
+            else:
+                todo.append((idx, item.get('description', '')))
+        if not todo:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(None, self.method, [text for _, text in todo])
+        except Exception as e:
+            print(f"[Warning] 预标注失败: {e}")
+            results = [None] * len(todo)
+
+        rows = []
+        for (idx, _), terms in zip(todo, results):
+            if terms is None:
+                self.attempts[idx] = self.attempts.get(idx, 0) + 1
+                continue
+            self.cache[idx] = (method_name, terms)
+            rows.append((idx, method_name, terms))
+        if rows:
+            await self.store.save_predictions(rows)
+
+    async def run(self):
+        while True:
+            ids = self._next_batch()
+            if not ids:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._annotate(ids)
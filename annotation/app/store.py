@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import argparse
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    idx         PRIMARY KEY,            -- 数据 index（不声明类型，保留 int/str 原样）
+    position    INTEGER NOT NULL,       -- 在数据文件中的顺序
+    state       TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS samples_state ON samples(state, position);
+
+CREATE TABLE IF NOT EXISTS annotations (
+    idx         NOT NULL,
+    annotator   TEXT NOT NULL,
+    data        TEXT NOT NULL,          -- 与原 JSONL 行相同的 JSON
+    is_sure     INTEGER NOT NULL,
+    revision    INTEGER NOT NULL DEFAULT 1,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (idx, annotator)
+);
+CREATE INDEX IF NOT EXISTS annotations_annotator ON annotations(annotator);
+
+CREATE TABLE IF NOT EXISTS revisions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    idx         NOT NULL,
+    annotator   TEXT NOT NULL,
+    revision    INTEGER NOT NULL,
+    data        TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS revisions_idx ON revisions(idx, annotator);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    idx         PRIMARY KEY,
+    method      TEXT NOT NULL,          -- 预标注方法：llm / dictionary
+    terms       TEXT NOT NULL,          -- 预测结果 [[HPO_ID, 英文, 中文, 原文]]（JSON）
+    created_at  REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT
+);
+"""
+
+
+class AnnotationStore:
+    """
+    标注结果的 SQLite 存储（WAL 模式）。
+
+    samples 记录每条数据的标注状态，annotations 以 (idx, annotator) 为主键保存每位标注员的最新结果，
+    revisions 保存每次提交的历史版本。写操作使用 BEGIN IMMEDIATE，多进程并发写入由 SQLite 串行化。
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    # --- 数据 ---
+
+    def add_samples(self, ids) -> int:
+        """登记数据 index（已存在的跳过），返回新增条数。"""
+        with self._transaction() as conn:
+            start = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM samples').fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO samples (idx, position) VALUES (?, ?)',
+                ((idx, start + i) for i, idx in enumerate(ids)),
+            )
+            return conn.total_changes - before
+
+    def pending_page(self, after: int = -1, limit: int = 10000) -> list:
+        """按数据顺序分页读取未标注数据：position 大于 after 的至多 limit 条 [(position, idx)]。"""
+        rows = self.conn.execute(
+            "SELECT position, idx FROM samples WHERE state = 'pending' AND position > ? ORDER BY position LIMIT ?",
+            (after, limit),
+        )
+        return [(row[0], row[1]) for row in rows]
+
+    def counts(self) -> dict:
+        row = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(state = 'annotated'), 0) FROM samples"
+        ).fetchone()
+        return {"total": row[0], "annotated": row[1]}
+
+    def state(self, idx):
+        row = self.conn.execute('SELECT state FROM samples WHERE idx = ?', (idx,)).fetchone()
+        return row[0] if row else None
+
+    # --- 标注 ---
+
+    def save_annotation(self, record: dict, annotator: str = '', required: int = 1,
+                        skip_finished: bool = False) -> dict:
+        """
+        保存（或修改）标注员对某条数据的标注，并记录一个历史版本。
+        该数据的不同标注员数达到 required 后才标记为已标注（用于多人重复标注）。
+        是否修改、是否跳过与是否由本次提交完成都在同一个事务中判断，并发提交时结果一致。
+
+        Args:
+            skip_finished: 数据已标注完成且该标注员没有标注过时跳过，不保存。
+
+        Returns:
+            {"skipped", "editing", "revision"（首次提交为 1）, "finished"（本次提交使数据标注完成）,
+             "count"（该数据现有的标注员数）}
+        """
+        idx = record['index']
+        now = time.time()
+        data = json.dumps(record, ensure_ascii=False)
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT revision FROM annotations WHERE idx = ? AND annotator = ?', (idx, annotator)
+            ).fetchone()
+            editing = row is not None
+            if skip_finished and not editing and self.state(idx) == 'annotated':
+                return {"skipped": True, "editing": False, "revision": 0, "finished": False,
+                        "count": self._annotation_count(conn, idx)}
+            revision = row[0] + 1 if row else 1
+            conn.execute(
+                'INSERT INTO annotations (idx, annotator, data, is_sure, revision, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (idx, annotator) DO UPDATE SET '
+                'data = excluded.data, is_sure = excluded.is_sure, revision = excluded.revision, updated_at = excluded.updated_at',
+                (idx, annotator, data, int(bool(record.get('is_sure', True))), revision, now, now),
+            )
+            conn.execute(
+                'INSERT INTO revisions (idx, annotator, revision, data, created_at) VALUES (?, ?, ?, ?, ?)',
+                (idx, annotator, revision, data, now),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO samples (idx, position) "
+                "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM samples))",
+                (idx,),
+            )
+            count = self._annotation_count(conn, idx)
+            finished = count >= required and conn.execute(
+                "UPDATE samples SET state = 'annotated' WHERE idx = ? AND state != 'annotated'", (idx,)
+            ).rowcount > 0
+        return {"skipped": False, "editing": editing, "revision": revision, "finished": finished, "count": count}
+
+    @staticmethod
+    def _annotation_count(conn, idx) -> int:
+        return conn.execute('SELECT COUNT(*) FROM annotations WHERE idx = ?', (idx,)).fetchone()[0]
+
+    def get_annotations(self, idx) -> dict:
+        """某条数据各标注员的最新标注：annotator -> record"""
+        rows = self.conn.execute('SELECT annotator, data FROM annotations WHERE idx = ?', (idx,))
+        return {row['annotator']: json.loads(row['data']) for row in rows}
+
+    def get_revisions(self, idx, annotator: str = None) -> list:
+        sql, args = 'SELECT * FROM revisions WHERE idx = ?', [idx]
+        if annotator is not None:
+            sql, args = sql + ' AND annotator = ?', args + [annotator]
+        rows = self.conn.execute(sql + ' ORDER BY id', args)
+        return [{**dict(row), 'data': json.loads(row['data'])} for row in rows]
+
+    def overlap_annotations(self) -> list:
+        """
+        可能参与一致性计算的标注：(idx, annotator, record)。
+        包括已有多位标注员的数据，以及尚未完成（等待第二位标注员）的数据。
+        """
+        rows = self.conn.execute(
+            "SELECT idx, annotator, data FROM annotations WHERE idx IN ("
+            "  SELECT idx FROM annotations GROUP BY idx HAVING COUNT(*) >= 2"
+            "  UNION SELECT a.idx FROM annotations a JOIN samples s ON s.idx = a.idx WHERE s.state = 'pending'"
+            ")"
+        )
+        return [(row['idx'], row['annotator'], json.loads(row['data'])) for row in rows]
+
+    def submitted_by(self) -> dict:
+        rows = self.conn.execute('SELECT annotator, COUNT(*) FROM annotations GROUP BY annotator')
+        return {row[0]: row[1] for row in rows if row[0]}
+
+    # --- 预标注 ---
+
+    def save_predictions(self, rows):
+        """rows: [(idx, method, terms)]，已存在的覆盖。"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO predictions (idx, method, terms, created_at) VALUES (?, ?, ?, ?)',
+                [(idx, method, json.dumps(terms, ensure_ascii=False), now) for idx, method, terms in rows],
+            )
+
+    def get_predictions(self, ids) -> dict:
+        """idx -> (method, terms)，没有预标注的不返回。"""
+        ids = list(ids)
+        result = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.conn.execute(
+                f'SELECT idx, method, terms FROM predictions WHERE idx IN ({",".join("?" * len(chunk))})', chunk
+            )
+            result.update({row['idx']: (row['method'], json.loads(row['terms'])) for row in rows})
+        return result
+
+    # --- JSONL 导入导出 ---
+
+    def import_jsonl(self, path: str) -> int:
+        """
+        导入旧版 JSONL 标注文件（每个文件只导入一次），返回导入条数。
+        没有 annotator 字段的记录以空字符串作为标注员；annotator 字段（export_annotations 的输出）不保存在记录中。
+        """
+        key = f'imported:{os.path.abspath(path)}'
+        if not os.path.exists(path) or self.get_meta(key) is not None:
+            return 0
+        count = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'index' in record:
+                    annotator = record.pop('annotator', None) or ''
+                    self.save_annotation(record, annotator)
+                    count += 1
+        self.set_meta(key, str(count))
+        return count
+
+    def export_jsonl(self, path: str) -> int:
+        """
+        按数据顺序导出已标注完成的数据为 JSONL（与原输出文件格式相同，每条数据一行），返回导出条数。
+        多人重复标注的数据取最先提交的标注员的最新结果；各标注员的结果见 export_annotations。
+        """
+        rows = self.conn.execute(
+            "SELECT a.idx, a.data FROM annotations a JOIN samples s ON s.idx = a.idx "
+            "WHERE s.state = 'annotated' ORDER BY s.position, a.created_at"
+        )
+        count, last = 0, None
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                if count and row['idx'] == last:
+                    continue
+                last = row['idx']
+                record = json.loads(row['data'])
+                record.pop('annotator', None)
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+    def export_annotations(self, path: str, annotator: str = None) -> int:
+        """按数据顺序导出每位标注员的最新标注（每人每条数据一行，附 annotator 字段），返回导出行数。"""
+        sql = ('SELECT a.annotator, a.data FROM annotations a LEFT JOIN samples s ON s.idx = a.idx '
+               '{} ORDER BY s.position, a.created_at')
+        args = ()
+        if annotator is not None:
+            sql, args = sql.format('WHERE a.annotator = ?'), (annotator,)
+        else:
+            sql = sql.format('')
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in self.conn.execute(sql, args):
+                record = {**json.loads(row['data']), 'annotator': row['annotator']}
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+
+class AsyncAnnotationStore:
+    """在单独线程中执行 AnnotationStore 的方法，避免阻塞事件循环：``await store.save_annotation(...)``"""
+
+    def __init__(self, store: AnnotationStore):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='annotation-store')
+
+    def __getattr__(self, name):
+        attr = getattr(self.store, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(attr, *args, **kwargs))
+        return call
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.store.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='标注数据库导入/导出')
+    parser.add_argument('command', choices=['export', 'export-annotators', 'import'],
+                        help='export: 每条数据一行（原输出格式）；export-annotators: 每位标注员的结果各一行')
+    parser.add_argument('--db', type=str, required=True, help='SQLite 数据库路径')
+    parser.add_argument('--jsonl', type=str, required=True, help='导出目标 / 导入来源的 JSONL 文件')
+    parser.add_argument('--annotator', type=str, default=None, help='export-annotators 只导出该标注员的结果')
+    args = parser.parse_args()
+
+    store = AnnotationStore(args.db)
+    if args.command == 'export':
+        print(f"已导出 {store.export_jsonl(args.jsonl)} 条标注到 {args.jsonl}")
+    elif args.command == 'export-annotators':
+        print(f"已导出 {store.export_annotations(args.jsonl, args.annotator)} 条标注到 {args.jsonl}")
+    else:
+        print(f"已导入 {store.import_jsonl(args.jsonl)} 条标注")
+    store.close()
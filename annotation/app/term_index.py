@@ -0,0 +1,142 @@
+import bisect
+from collections import Counter, defaultdict
+
+# 词表读取与名称归一化与离线脚本共用仓库根目录的 hpo_index（需要仓库根目录在 sys.path 中，见 main.py）
+from hpo_index import normalize_text as normalize, chpo_terms_from_dataframe
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 可选依赖：未安装时不支持拼音检索
+    lazy_pinyin = None
+
+
+def ngrams(text: str, n: int = 2) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TermIndex:
+    """
+    HPO 术语检索索引，启动时构建一次。
+
+    - 前缀索引：中文名、英文名（以及安装 pypinyin 时的全拼/首字母）归一化后排序，
+      前缀查询用二分定位区间，效果等同于前缀树但内存只有一份排序数组。
+    - 字符 n-gram 倒排索引：支持名称中间的子串匹配和拼写不完全一致时的模糊匹配。
+
+    结果排序：完全匹配 > 前缀匹配 > 子串匹配 > n-gram 相似度，同一档内名称越短越靠前。
+    """
+
+    def __init__(self, terms):
+        # terms: [(hpo_id, name_en, name_zh)]
+        self.terms = list(terms)
+        self._exact = {}                    # 归一化名称 / HPO 编号 -> 术语下标
+        keys = []                           # (归一化 key, 术语下标)
+        self._postings = defaultdict(list)  # 二元 gram -> 术语下标列表
+        self._chars = defaultdict(list)     # 单字 -> 术语下标列表（仅用于单字查询）
+        self._gram_count = []               # 术语下标 -> 名称二元 gram 数
+        self._names = []                    # 术语下标 -> 归一化后的 (中文名, 英文名)
+        for i, (hpo_id, en, zh) in enumerate(self.terms):
+            self._exact.setdefault(normalize(hpo_id), i)
+            self._names.append((normalize(zh), normalize(en)))
+            names = set(self._names[-1]) - {''}
+            for name in names:
+                self._exact.setdefault(name, i)
+            keys.extend((name, i) for name in names)
+            keys.extend((key, i) for key in self._pinyin_keys(zh))
+            grams = set().union(*(ngrams(name) for name in names)) if names else set()
+            for gram in grams:
+                self._postings[gram].append(i)
+            for char in set(''.join(names)):
+                self._chars[char].append(i)
+            self._gram_count.append(len(grams))
+        keys.sort()
+        self._keys = [k for k, _ in keys]
+        self._key_terms = [i for _, i in keys]
+
+    def __len__(self):
+        return len(self.terms)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """从 CHPO 词表（列：HPO编号 / 英 文 / 中文翻译）构建。"""
+        return cls(chpo_terms_from_dataframe(df))
+
+    @staticmethod
+    def _pinyin_keys(zh: str):
+        if lazy_pinyin is None or not zh:
+            return []
+        syllables = [normalize(s) for s in lazy_pinyin(zh)]
+        syllables = [s for s in syllables if s]
+        if not syllables:
+            return []
+        return [''.join(syllables), ''.join(s[0] for s in syllables)]
+
+    def _term(self, i, score, match):
+        hpo_id, en, zh = self.terms[i]
+        return {"hpo_id": hpo_id, "name_zh": zh, "name_en": en, "score": round(score, 4), "match": match}
+
+    def lookup(self, term):
+        """按中文名、英文名或 HPO 编号精确查找，返回术语下标或 None。"""
+        return self._exact.get(normalize(term))
+
+    def search(self, query: str, limit: int = 10, offset: int = 0):
+        """
+        Returns:
+            (results, total)：按得分排序的第 offset ~ offset+limit 条结果，以及匹配总数。
+        """
+        q = normalize(query)
+        if not q:
+            return [], 0
+
+        scores = {}
+
+        def offer(i, score, match):
+            if i not in scores or scores[i][0] < score:
+                scores[i] = (score, match)
+
+        exact = self._exact.get(q)
+        if exact is not None:
+            offer(exact, 4.0, 'exact')
+
+        # 前缀匹配：排序数组上二分得到 [lo, hi)
+        lo = bisect.bisect_left(self._keys, q)
+        hi = bisect.bisect_left(self._keys, q + '\U0010ffff')
+        for key, i in zip(self._keys[lo:hi], self._key_terms[lo:hi]):
+            offer(i, 3.0 + len(q) / len(key), 'prefix')
+
+        # 子串与模糊匹配：统计每个术语与查询共有的 gram 数
+        if len(q) == 1:
+            q_grams = {q}
+            shared = Counter(self._chars.get(q, ()))
+        else:
+            q_grams = ngrams(q)
+            shared = Counter()
+            for gram in q_grams:
+                shared.update(self._postings.get(gram, ()))
+        # 子串匹配要求查询的 gram 全部出现；dice >= 0.5 要求共有 gram 数不少于查询的 1/4
+        min_shared = len(q_grams) / 4
+        for i, count in shared.items():
+            if i in scores or count < min_shared:
+                continue
+            containing = [n for n in self._names[i] if n and q in n] if count == len(q_grams) else []
+            if containing:
+                offer(i, 2.0 + len(q) / min(len(n) for n in containing), 'substring')
+            elif len(q) > 1:
+                dice = 2 * count / (len(q_grams) + self._gram_count[i])
+                if dice >= 0.5:
+                    offer(i, dice, 'fuzzy')
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1][0], len(self.terms[kv[0]][2]), kv[0]))
+        page = ranked[offset:offset + limit]
+        return [self._term(i, score, match) for i, (score, match) in page], len(ranked)
+
+    def validate(self, terms):
+        """批量校验术语是否为标准术语，返回与输入顺序一致的结果列表。"""
+        results = []
+        for term in terms:
+            i = self.lookup(term)
+            if i is None:
+                results.append({"term": term, "valid": False})
+            else:
+                hpo_id, en, zh = self.terms[i]
+                results.append({"term": term, "valid": True, "hpo_id": hpo_id, "name_zh": zh, "name_en": en})
+        return results
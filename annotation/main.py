@@ -1,10 +1,26 @@
-from quart import Quart, render_template, request, jsonify
+from quart import Quart, render_template, request, jsonify, g
 import json
 import os
-import aiofiles
-import pandas as pd
+import time
+import uuid
+import hashlib
+import asyncio
+import sys
+import config
 from config import TEMPLATE_FOLDER, DATA_ROOT, PORT, DATA_FILE, OUTPUT_FILE, HPO_FILE
 
+# 与离线脚本共用仓库根目录下的模块（hpo_index、llm_call 等）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.pending_queue import PendingQueue
+from app.dispatcher import LeaseDispatcher
+from app.store import AnnotationStore, AsyncAnnotationStore
+from app.term_index import TermIndex
+from app.http_cache import CachedPayload, PayloadCache, file_digest, compress_response
+from app.dataset import JsonlDataset
+from app.metrics import Metrics
+from app.agreement import AgreementTracker
+from app.preannotate import PreAnnotator, DictionaryMatcher, LLMAnnotator
+
 
 # 配置
 app = Quart(__name__, template_folder=TEMPLATE_FOLDER) 
@@ -12,204 +28,480 @@ APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 
 # 数据文件路径
 DATA_FILE = os.path.join(DATA_ROOT, DATA_FILE)
-OUTPUT_FILE = os.path.join(DATA_ROOT, OUTPUT_FILE)
+OUTPUT_FILE = os.path.join(DATA_ROOT, OUTPUT_FILE)   # 旧版 JSONL 输出，启动时一次性导入数据库
+DB_FILE = os.path.join(DATA_ROOT, getattr(config, 'DB_FILE', 'annotation.db'))
 HPO_FILE = HPO_FILE
+LEASE_SECONDS = getattr(config, 'LEASE_SECONDS', 15 * 60)   # 标注员租约时长（秒）
+PREFETCH_SIZE = getattr(config, 'PREFETCH_SIZE', 5)          # /batch 单次最多返回的样本数
+OVERLAP_RATE = getattr(config, 'OVERLAP_RATE', 0.0)          # 需要两位标注员重复标注的数据比例
+RECORD_CACHE_SIZE = getattr(config, 'RECORD_CACHE_SIZE', 1024)  # 内存中缓存的数据条数
+PENDING_PAGE_SIZE = getattr(config, 'PENDING_PAGE_SIZE', 10000)  # 启动时每次从数据库读取的未标注数据条数
+TERMS_CACHE_SIZE = getattr(config, 'TERMS_CACHE_SIZE', 4096)    # 缓存的术语检索/校验响应数
+PREANNOTATE_METHOD = getattr(config, 'PREANNOTATE_METHOD', 'dictionary')  # 预标注方法：'llm' / 'dictionary' / None（关闭）
+PREANNOTATE_WINDOW = getattr(config, 'PREANNOTATE_WINDOW', 50)            # 保持预标注的队首数据条数
+PREANNOTATE_LLM = getattr(config, 'PREANNOTATE_LLM', {})                  # 传给 LLM_Call 的参数（api_key、api_model 等）
+PREANNOTATE_WORKERS = getattr(config, 'PREANNOTATE_WORKERS', 4)           # LLM 预标注的并发请求数
 
 
-RAW_DATA = []           # 未标注的数据
-ANNOTATED_IDS = set()   # 已标注的数据ID集合
+DATASET = None          # 按需读取的数据集（JsonlDataset）
+PENDING = PendingQueue()  # 未标注数据的顺序队列
+STORE = None            # 标注数据库（AsyncAnnotationStore）
+ANNOTATED_COUNT = 0     # 已标注条数
+DISPATCHER = LeaseDispatcher(PENDING, LEASE_SECONDS, max_leases=PREFETCH_SIZE + 1)  # 多标注员租约分配（启动时重建）
 TOTAL_COUNT = 0         # 原始数据总数
 STANDARD_TERMS = set()  # HPO标准术语集合（中文）
+TERM_INDEX = TermIndex([])  # HPO术语检索索引
+STANDARD_TERMS_PAYLOAD = None  # /standard_terms 预序列化、预压缩的响应体
+TERMS_RESPONSES = PayloadCache(TERMS_CACHE_SIZE)  # /terms/search、/terms/validate 按参数缓存的响应体
+INDEX_PAGE = (None, None)      # (模板修改时间, 首页预渲染的响应体)
+HPO_LOADING = None             # 后台加载HPO术语表的任务
+METRICS = Metrics()            # 请求延迟、标注用时与提交速率
+AGREEMENT = AgreementTracker() # 重复标注数据上的标注员一致性
+PREANNOTATOR = None            # 后台预标注（PreAnnotator）
+PREANNOTATE_TASK = None
+PREANNOTATOR_LOADING = None    # 等待术语表后构建预标注器的任务
 
 
 def load_hpo_terms():
     """加载HPO标准术语表"""
-    global STANDARD_TERMS
+    global STANDARD_TERMS, TERM_INDEX, STANDARD_TERMS_PAYLOAD
     STANDARD_TERMS = set()
+    etag, last_modified = None, None
     
     if os.path.exists(HPO_FILE):
         try:
+            import pandas as pd  # 在线程池中导入，避免拖慢启动
             df = pd.read_excel(HPO_FILE)
             # 假设中文翻译在"中文翻译"列
             if '中文翻译' in df.columns:
                 STANDARD_TERMS = set(df['中文翻译'].dropna().astype(str).str.strip())
                 print(f"[System] 已加载 {len(STANDARD_TERMS)} 条HPO标准术语。")
+                if 'HPO编号' in df.columns and '英 文' in df.columns:
+                    TERM_INDEX = TermIndex.from_dataframe(df)
+                    print(f"[System] 已构建 {len(TERM_INDEX)} 条HPO术语的检索索引。")
             else:
                 print(f"[Warning] HPO文件中未找到'中文翻译'列，可用列: {list(df.columns)}")
         except Exception as e:
             print(f"[Warning] 加载HPO术语表失败: {e}")
+        etag, last_modified = file_digest(HPO_FILE), os.path.getmtime(HPO_FILE)
     else:
         print(f"[Warning] HPO术语文件 {HPO_FILE} 不存在！")
 
+    # 术语表只在启动时变化：序列化并压缩一次，ETag 为词表文件的哈希
+    body = json.dumps({"terms": sorted(STANDARD_TERMS), "count": len(STANDARD_TERMS)}, ensure_ascii=False)
+    STANDARD_TERMS_PAYLOAD = CachedPayload(body.encode('utf-8'), 'application/json', etag, last_modified)
+
+
+async def open_store():
+    """打开标注数据库，首次启动时导入旧版 JSONL 输出文件"""
+    global STORE
+    STORE = AsyncAnnotationStore(AnnotationStore(DB_FILE))
+    imported = await STORE.import_jsonl(OUTPUT_FILE)
+    if imported:
+        print(f"[System] 已从 {OUTPUT_FILE} 导入 {imported} 条标注到 {DB_FILE}。")
+
 
-async def load_annotated_ids():
-    """加载已标注的数据ID"""
-    global ANNOTATED_IDS
-    ANNOTATED_IDS = set()
+def prepare_item(item):
+    """读取数据时补全字段（按需对单条数据执行）"""
+    item['llm_predict'] = list(map(lambda x: x[2], item.get('llm_predict', [])))  # [HPO_ID, 英文, 中文, 原文] 行只保留中文术语名
     
-    if os.path.exists(OUTPUT_FILE):
-        async with aiofiles.open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-            async for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        item = json.loads(line)
-                        if 'index' in item:
-                            ANNOTATED_IDS.add(item['index'])
-                    except json.JSONDecodeError:
-                        continue
-        print(f"[System] 已加载 {len(ANNOTATED_IDS)} 条已标注数据ID。")
-    else:
-        print(f"[Info] 标注输出文件 {OUTPUT_FILE} 不存在，将创建新文件。")
+    # 确保 human_annotated 中包含阴性表型字段
+    if 'human_annotated' not in item:
+        item['human_annotated'] = {}
+    if 'patient_phenotypes_neg' not in item['human_annotated']:
+        item['human_annotated']['patient_phenotypes_neg'] = []
+    if 'family_phenotypes_neg' not in item['human_annotated']:
+        item['human_annotated']['family_phenotypes_neg'] = []
+    # 同时确保阳性表型字段存在
+    if 'patient_phenotypes' not in item['human_annotated']:
+        item['human_annotated']['patient_phenotypes'] = []
+    if 'family_phenotypes' not in item['human_annotated']:
+        item['human_annotated']['family_phenotypes'] = []
+    return item
 
 
 async def load_data_from_file():
-    """启动时加载数据，并过滤已标注的数据"""
-    global RAW_DATA, TOTAL_COUNT
-    
-    # 先加载已标注的ID
-    await load_annotated_ids()
+    """启动时只加载数据文件的偏移索引，并按数据库状态过滤已标注的数据"""
+    global DATASET, PENDING, DISPATCHER, TOTAL_COUNT, ANNOTATED_COUNT
     
     if os.path.exists(DATA_FILE):
-        async with aiofiles.open(DATA_FILE, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            all_data = json.loads(content)
+        loop = asyncio.get_running_loop()
+        DATASET = JsonlDataset(DATA_FILE, transform=prepare_item, cache_size=RECORD_CACHE_SIZE)
+        await loop.run_in_executor(None, DATASET.open)
         
         # 记录原始总数
-        TOTAL_COUNT = len(all_data)
-        
-        # 处理数据并过滤已标注的
-        RAW_DATA = []
-        for item in all_data:
-            item['llm_predict'] = list(map(lambda x: x[0], item['llm_predict']))
-            
-            # 确保 human_annotated 中包含阴性表型字段
-            if 'human_annotated' not in item:
-                item['human_annotated'] = {}
-            if 'patient_phenotypes_neg' not in item['human_annotated']:
-                item['human_annotated']['patient_phenotypes_neg'] = []
-            if 'family_phenotypes_neg' not in item['human_annotated']:
-                item['human_annotated']['family_phenotypes_neg'] = []
-            # 同时确保阳性表型字段存在
-            if 'patient_phenotypes' not in item['human_annotated']:
-                item['human_annotated']['patient_phenotypes'] = []
-            if 'family_phenotypes' not in item['human_annotated']:
-                item['human_annotated']['family_phenotypes'] = []
-            
-            # 只保留未标注的数据
-            if item['index'] not in ANNOTATED_IDS:
-                RAW_DATA.append(item)
+        TOTAL_COUNT = len(DATASET)
+
+        # 数据文件变化时才重新登记到数据库
+        stat = os.stat(DATASET.jsonl_path)
+        signature = f"{stat.st_size}:{stat.st_mtime}"
+        key = f"samples:{os.path.abspath(DATASET.jsonl_path)}"
+        if await STORE.get_meta(key) != signature:
+            await STORE.add_samples(DATASET.ids)
+            await STORE.set_meta(key, signature)
+
+        # 数据库中按数据顺序排列的未标注数据，分页读取
+        PENDING = PendingQueue()
+        after = -1
+        while True:
+            page = await STORE.pending_page(after, PENDING_PAGE_SIZE)
+            for _, idx in page:
+                if idx in DATASET:
+                    PENDING.append(idx)
+            if len(page) < PENDING_PAGE_SIZE:
+                break
+            after = page[-1][0]
+        ANNOTATED_COUNT = TOTAL_COUNT - len(PENDING)
         
-        print(f"[System] 原始数据共 {TOTAL_COUNT} 条，已标注 {len(ANNOTATED_IDS)} 条，剩余 {len(RAW_DATA)} 条待标注。")
+        print(f"[System] 原始数据共 {TOTAL_COUNT} 条，已标注 {ANNOTATED_COUNT} 条，剩余 {len(PENDING)} 条待标注。")
     else:
         print(f"[Warning] 数据文件 {DATA_FILE} 不存在！")
-        RAW_DATA = []
+        DATASET = None
+        PENDING = PendingQueue()
         TOTAL_COUNT = 0
+        ANNOTATED_COUNT = 0
+
+    DISPATCHER = LeaseDispatcher(PENDING, LEASE_SECONDS, max_leases=PREFETCH_SIZE + 1, on_release=_lease_released)
+    DISPATCHER.submitted.update(await STORE.submitted_by())
+    await load_agreement()
+
+
+async def load_agreement():
+    """从数据库恢复重复标注的一致性统计，以及尚在等待第二位标注员的数据"""
+    global AGREEMENT
+    records = await STORE.overlap_annotations()
+    AGREEMENT = await asyncio.get_running_loop().run_in_executor(None, AgreementTracker.from_records, records)
+    for idx, annotator, _ in records:
+        if idx in PENDING:
+            DISPATCHER.done[idx].add(annotator)
+
+
+def build_preannotator():
+    """按 PREANNOTATE_METHOD 构建预标注后台任务；词典匹配同时作为尚未预标注数据的即时结果"""
+    if not PREANNOTATE_METHOD or DATASET is None:
+        return None
+    fallback = DictionaryMatcher.from_term_index(TERM_INDEX) if len(TERM_INDEX) else None
+    if PREANNOTATE_METHOD == 'dictionary':
+        method = fallback
+    elif PREANNOTATE_METHOD == 'llm':
+        try:
+            from llm_call import LLM_Call
+            from prompts import PROMPT_ANNOTATION
+            from response_parser import parse_response
+        except ImportError as e:
+            print(f"[Warning] LLM 预标注不可用: {e}")
+            return None
+        llm = LLM_Call(**{**PREANNOTATE_LLM, 'use_async_api': False})
+        method = LLMAnnotator(llm, PROMPT_ANNOTATION, parse_response, PREANNOTATE_WORKERS)
+    else:
+        print(f"[Warning] 未知的预标注方法: {PREANNOTATE_METHOD}")
+        return None
+    if method is None:
+        print("[Warning] HPO术语表为空，词典预标注不可用。")
+        return None
+    print(f"[System] 预标注已启用（{method.name}），保持队首 {PREANNOTATE_WINDOW} 条数据已预标注。")
+    return PreAnnotator(method, STORE, DATASET, PENDING, window=PREANNOTATE_WINDOW, fallback=fallback)
+
+
+async def load_preannotator():
+    """等待术语表加载完成后构建预标注器"""
+    global PREANNOTATOR
+    await hpo_ready()
+    PREANNOTATOR = build_preannotator()
+    return PREANNOTATOR
+
+
+async def run_preannotator():
+    """预标注器构建完成后启动预标注循环"""
+    preannotator = await PREANNOTATOR_LOADING
+    if preannotator is not None:
+        await preannotator.run()
+
+
+def attach_prediction(item):
+    """数据文件中没有 llm_predict 时附上预标注结果（与页面展示的 llm_predict 一致，只保留中文术语名）"""
+    if item.get('llm_predict') or PREANNOTATOR is None:
+        return item
+    found = PREANNOTATOR.lookup(item['index'], item.get('description') or '')
+    if found is not None and found[1] is not None:
+        item['llm_predict'] = [row[2] for row in found[1]]
+        item['llm_predict_source'] = found[0]
+    return item
+
+
+def required_annotators(idx) -> int:
+    """按 index 的哈希稳定地选出 OVERLAP_RATE 比例的数据，需要两位标注员"""
+    if OVERLAP_RATE <= 0:
+        return 1
+    bucket = int(hashlib.md5(str(idx).encode('utf-8')).hexdigest()[:8], 16) / 0xffffffff
+    return 2 if bucket < OVERLAP_RATE else 1
+
+
+def _annotator(data=None):
+    """当前请求的标注员：优先使用前端传入的名字，其次使用 cookie，均没有时分配一个匿名 ID。"""
+    name = (data or {}).get('annotator') or request.cookies.get('annotator')
+    if not name:
+        name = g.new_annotator = f"anon-{uuid.uuid4().hex[:8]}"
+    return str(name)
+
+
+def _progress(annotator=None):
+    annotated_count = ANNOTATED_COUNT
+    progress = {
+        "total": TOTAL_COUNT,
+        "annotated": annotated_count,
+        "remaining": len(PENDING),
+        "percentage": round(annotated_count / TOTAL_COUNT * 100, 1) if TOTAL_COUNT > 0 else 0
+    }
+    if annotator is not None:
+        progress["mine"] = DISPATCHER.submitted.get(annotator, 0)
+    return progress
+
+
+async def hpo_ready():
+    """等待后台的HPO术语表加载完成"""
+    if HPO_LOADING is not None:
+        await HPO_LOADING
+
+
+async def preannotator_ready():
+    """等待预标注器构建完成，避免术语表加载期间下发没有预标注结果的数据"""
+    if PREANNOTATOR_LOADING is not None:
+        await PREANNOTATOR_LOADING
 
 
 @app.before_serving
 async def startup():
-    load_hpo_terms()  # 加载HPO标准术语表
+    global HPO_LOADING, PREANNOTATOR_LOADING, PREANNOTATE_TASK
+    # HPO术语表在线程池中加载，不阻塞启动；依赖术语表的接口先等待加载完成
+    HPO_LOADING = asyncio.get_running_loop().run_in_executor(None, load_hpo_terms)
+    await open_store()
     await load_data_from_file()
+    # 预标注在后台持续运行，请求处理只读取其结果
+    PREANNOTATOR_LOADING = asyncio.create_task(load_preannotator())
+    PREANNOTATE_TASK = asyncio.create_task(run_preannotator())
+
+
+@app.after_serving
+async def shutdown():
+    if PREANNOTATE_TASK is not None:
+        PREANNOTATE_TASK.cancel()
+    if STORE is not None:
+        STORE.close()
+    if DATASET is not None:
+        DATASET.close()
+
+
+app.after_request(compress_response)
+
+
+@app.before_request
+async def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_latency(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        METRICS.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+
+@app.after_request
+async def remember_annotator(response):
+    name = g.get('new_annotator')
+    if name:
+        response.set_cookie('annotator', name, max_age=30 * 24 * 3600, samesite='Lax')
+    return response
 
 
 # --- 路由定义 ---
 
 @app.route('/')
 async def index():
-    return await render_template("index_backup.html")
+    global INDEX_PAGE
+    # 模板没有动态内容：按模板修改时间缓存渲染结果
+    mtime = os.path.getmtime(os.path.join(app.template_folder, "index_backup.html"))
+    if INDEX_PAGE[0] != mtime:
+        html = await render_template("index_backup.html")
+        INDEX_PAGE = (mtime, CachedPayload(html.encode('utf-8'), 'text/html', last_modified=mtime))
+    return INDEX_PAGE[1].response()
 
 
 @app.route('/standard_terms', methods=['GET'])
 async def get_standard_terms():
-    """获取HPO标准术语集合"""
-    return jsonify({
-        "terms": list(STANDARD_TERMS),
-        "count": len(STANDARD_TERMS)
-    })
+    """获取HPO标准术语集合（支持 ETag/Last-Modified 条件请求与压缩）"""
+    await hpo_ready()
+    return STANDARD_TERMS_PAYLOAD.response()
+
+
+@app.route('/terms/search', methods=['GET'])
+async def search_terms():
+    """
+    HPO术语检索（中文/英文/HPO编号，安装 pypinyin 时支持拼音），用于输入框自动补全
+    参数: q 查询词, limit 每页条数（默认10，最多100）, offset 偏移
+    """
+    await hpo_ready()
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    def build():
+        results, total = TERM_INDEX.search(query, limit, offset)
+        return json.dumps({
+            "query": query,
+            "results": results,
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        }, ensure_ascii=False).encode('utf-8')
+
+    # 术语表启动后不变：同样的查询直接返回缓存的响应体（支持 ETag 条件请求）
+    return TERMS_RESPONSES.get(('search', query, limit, offset), build).response()
+
+
+@app.route('/terms/validate', methods=['GET', 'POST'])
+async def validate_terms():
+    """
+    批量校验术语是否为HPO标准术语
+    GET: /terms/validate?terms=癫痫发作&terms=...（前端使用，可被浏览器缓存）
+    POST Payload: { "terms": ["癫痫发作", ...] }
+    """
+    await hpo_ready()
+    if request.method == 'GET':
+        terms = request.args.getlist('terms')
+    else:
+        data = await request.get_json(force=True, silent=True) or {}
+        terms = [str(t) for t in data.get('terms', [])]
+
+    def build():
+        return json.dumps({"results": TERM_INDEX.validate(terms)}, ensure_ascii=False).encode('utf-8')
+
+    return TERMS_RESPONSES.get(('validate', tuple(terms)), build).response()
 
 
 @app.route('/progress', methods=['GET'])
 async def get_progress():
     """获取标注进度"""
-    annotated_count = len(ANNOTATED_IDS)
-    remaining_count = len(RAW_DATA)
-    
-    return jsonify({
-        "total": TOTAL_COUNT,
-        "annotated": annotated_count,
-        "remaining": remaining_count,
-        "percentage": round(annotated_count / TOTAL_COUNT * 100, 1) if TOTAL_COUNT > 0 else 0
-    })
+    return jsonify(_progress(_annotator(request.args)))
+
+
+@app.route('/annotators', methods=['GET'])
+async def get_annotators():
+    """各标注员的提交数、当前持有的租约与最近活动时间"""
+    return jsonify(DISPATCHER.annotator_stats())
+
+
+def _lease_released(annotator, sample_id):
+    # 租约过期、被挤出或释放后丢弃未提交样本的下发时间，避免 METRICS.served 无限增长
+    METRICS.forget(annotator, [sample_id])
+
+
+@app.route('/release', methods=['POST'])
+async def release_lease():
+    """
+    释放当前标注员的租约（页面关闭、向前翻页丢弃预取样本时由前端调用）
+    前端 Payload: { "ids": [...], "annotator": "..." }；只给 current_id 时释放该样本，都没有时释放全部租约
+    """
+    data = await request.get_json(force=True, silent=True) or {}
+    annotator, ids = _annotator(data), data.get('ids')
+    if ids is None:
+        DISPATCHER.release(annotator, data.get('current_id'))
+    else:
+        for sample_id in ids:
+            DISPATCHER.release(annotator, sample_id)
+    return jsonify({"status": "success"})
+
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    """Prometheus 格式的运行指标"""
+    body = METRICS.exposition(len(PENDING), DISPATCHER.active())
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@app.route('/metrics/summary', methods=['GET'])
+async def get_metrics_summary():
+    """运行指标的 JSON 汇总：各路由延迟分位数、标注员用时、提交速率与预计完成时间"""
+    return jsonify(METRICS.summary(len(PENDING), DISPATCHER.active()))
+
+
+@app.route('/agreement', methods=['GET'])
+async def get_agreement():
+    """重复标注数据上的标注员一致性：各标注员对的 Cohen's kappa / 集合 F1 与总体 Fleiss' kappa"""
+    return jsonify(AGREEMENT.summary())
 
 
 @app.route('/change', methods=['POST'])
 async def change_data():
     """
     处理数据切换请求 (初始化/上一条/下一条)
-    前端 Payload: { "action": "init"|"next"|"prev", "current_id": "DATA_001" }
+    前端 Payload: { "action": "init"|"next"|"prev", "current_id": "DATA_001", "annotator": "..." }
+    每个标注员分到的样本带租约，不会与其他标注员重复。
     """
     data = await request.get_json()
     action = data.get('action')
     current_id = data.get('current_id')
+    annotator = _annotator(data)
     
-    if not RAW_DATA:
+    if not PENDING:
         return jsonify({
             "message": "No more data",
             "progress": {
                 "total": TOTAL_COUNT,
-                "annotated": len(ANNOTATED_IDS),
+                "annotated": ANNOTATED_COUNT,
                 "remaining": 0,
                 "percentage": 100.0 if TOTAL_COUNT > 0 else 0
             }
         }), 200
 
-    current_index = 0
-    
-    # 找到当前 ID 的索引
-    if current_id:
-        for i, item in enumerate(RAW_DATA):
-            if item['index'] == current_id:
-                current_index = i
-                break
-    
-    # 根据动作计算新的索引
-    new_index = current_index
-    
-    if action == 'init':
-        new_index = 0
-    elif action == 'next':
-        new_index = current_index + 1
-    elif action == 'prev':
-        new_index = current_index - 1
-        
-    # 边界检查
-    if new_index < 0:
-        new_index = 0
-    if new_index >= len(RAW_DATA):
+    # 术语表加载期间先等待预标注器就绪，再分配数据
+    await preannotator_ready()
+    # 根据动作分配新的数据 ID（跳过其他标注员持有租约的数据）
+    new_id = DISPATCHER.acquire(annotator, action, current_id)
+
+    if new_id is None:
         # 如果超出范围，返回空或特定的结束标记
         return jsonify({
             "message": "No more data",
-            "progress": {
-                "total": TOTAL_COUNT,
-                "annotated": len(ANNOTATED_IDS),
-                "remaining": len(RAW_DATA),
-                "percentage": round(len(ANNOTATED_IDS) / TOTAL_COUNT * 100, 1) if TOTAL_COUNT > 0 else 0
-            }
+            "progress": _progress(annotator)
         }), 200
 
     # 返回新的数据对象，附带进度信息
-    response_data = RAW_DATA[new_index].copy()
-    response_data['progress'] = {
-        "total": TOTAL_COUNT,
-        "annotated": len(ANNOTATED_IDS),
-        "remaining": len(RAW_DATA),
-        "percentage": round(len(ANNOTATED_IDS) / TOTAL_COUNT * 100, 1) if TOTAL_COUNT > 0 else 0
-    }
+    METRICS.sample_served(annotator, new_id)
+    response_data = attach_prediction(DATASET.get(new_id).copy())
+    response_data['annotator'] = annotator
+    response_data['progress'] = _progress(annotator)
     
     return jsonify(response_data)
 
 
+@app.route('/batch', methods=['POST'])
+async def batch_data():
+    """
+    预取接口：返回 current_id 之后（为空时从队首）的至多 count 条待标注数据，均为该标注员加租约
+    前端 Payload: { "current_id": "DATA_001", "count": 5, "annotator": "..." }
+    """
+    data = await request.get_json(force=True, silent=True) or {}
+    annotator = _annotator(data)
+    count = min(max(int(data.get('count') or PREFETCH_SIZE), 1), PREFETCH_SIZE)
+
+    await preannotator_ready()
+    samples = []
+    for sample_id in DISPATCHER.acquire_many(annotator, count, data.get('current_id')):
+        METRICS.sample_served(annotator, sample_id)
+        item = attach_prediction(DATASET.get(sample_id).copy())
+        item['annotator'] = annotator
+        samples.append(item)
+
+    return jsonify({
+        "samples": samples,
+        "progress": _progress(annotator)
+    })
+
+
 @app.route('/submit', methods=['POST'])
 async def submit_annotation():
     """
@@ -221,16 +513,18 @@ async def submit_annotation():
         "family_phenotypes": [],
         "patient_phenotypes_neg": [],
         "family_phenotypes_neg": [],
-        "is_sure": true/false
+        "is_sure": true/false,
+        "annotator": "...",
+        "elapsed_ms": 12345        // 可选，前端测得的样本用时，只用于统计
     }
     """
+    global ANNOTATED_COUNT
     result = await request.get_json()
+    annotator = _annotator(result)
     
-    # 检查是否重复提交
     submitted_id = result.get('index')
-    if submitted_id in ANNOTATED_IDS:
-        print(f"[Warning] 数据 {submitted_id} 已存在，跳过重复保存。")
-        return jsonify({"status": "warning", "message": "Data already annotated, skipped."})
+    if submitted_id is None:
+        return jsonify({"status": "error", "message": "Missing index"}), 400
     
     # 确保所有必要字段都存在
     save_result = {
@@ -243,28 +537,42 @@ async def submit_annotation():
         "is_sure": result.get('is_sure', True)
     }
     
-    # 将结果追加写入到 jsonl 文件中 (每一行是一个 json)
-    async with aiofiles.open(OUTPUT_FILE, 'a', encoding='utf-8') as f:
-        await f.write(json.dumps(save_result, ensure_ascii=False) + "\n")
-    
-    # 更新已标注集合
-    ANNOTATED_IDS.add(submitted_id)
+    # 写入数据库（修改时保留历史版本）。是否重复提交（同一标注员再次提交视为修改，已完成标注的数据跳过）
+    # 与是否由本次提交完成都在同一个事务中判断，并发提交时不会重复计数或漏掉完成
+    required = required_annotators(submitted_id)
+    saved = await STORE.save_annotation(save_result, annotator, required, skip_finished=True)
+    if saved['skipped']:
+        print(f"[Warning] 数据 {submitted_id} 已存在，跳过重复保存。")
+        return jsonify({"status": "warning", "message": "Data already annotated, skipped."})
+    if required > 1:
+        AGREEMENT.add(submitted_id, annotator, save_result)
+    if saved['editing']:
+        print(f"[Submit] 数据 {submitted_id} 已由 {annotator} 修改（版本 {saved['revision']}）。")
+        return jsonify({
+            "status": "success",
+            "message": "Updated successfully",
+            "progress": _progress(annotator)
+        })
     
-    # 从待标注列表中移除
-    global RAW_DATA
-    RAW_DATA = [item for item in RAW_DATA if item['index'] != submitted_id]
-        
-    print(f"[Submit] 数据 {submitted_id} 已保存。剩余 {len(RAW_DATA)} 条待标注。")
+    elapsed_ms = result.get('elapsed_ms')
+    METRICS.sample_submitted(annotator, submitted_id, elapsed_ms / 1000 if isinstance(elapsed_ms, (int, float)) else None)
+
+    # 标注人数已够时更新已标注计数并从待标注队列中移除，否则留在队列中等待其他标注员
+    finished = saved['finished']
+    DISPATCHER.complete(annotator, submitted_id, finished)
+    if finished:
+        ANNOTATED_COUNT += 1
+        if PREANNOTATOR is not None:
+            PREANNOTATOR.discard(submitted_id)
+        PENDING.remove(submitted_id)
+        print(f"[Submit] 数据 {submitted_id} 已由 {annotator} 保存。剩余 {len(PENDING)} 条待标注。")
+    else:
+        print(f"[Submit] 数据 {submitted_id} 已由 {annotator} 保存，等待第 {saved['count'] + 1} 位标注员。")
     
     return jsonify({
         "status": "success", 
         "message": "Saved successfully",
-        "progress": {
-            "total": TOTAL_COUNT,
-            "annotated": len(ANNOTATED_IDS),
-            "remaining": len(RAW_DATA),
-            "percentage": round(len(ANNOTATED_IDS) / TOTAL_COUNT * 100, 1) if TOTAL_COUNT > 0 else 0
-        }
+        "progress": _progress(annotator)
     })
 
 
@@ -273,7 +581,7 @@ if __name__ == '__main__':
     print("标注系统后端启动")
     print(f"Template Folder: {app.template_folder}")
     print(f"Data File: {DATA_FILE}")
-    print(f"Output File: {OUTPUT_FILE}")
+    print(f"Database: {DB_FILE}")
     print("=" * 60)
     # 调试模式运行
     app.run(port=PORT, debug=True)
\ No newline at end of file
@@ -0,0 +1,57 @@
+import sys
+import random
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.agreement import AgreementTracker, label_set
+
+
+def record(patient=(), family_neg=()):
+    return {'patient_phenotypes': list(patient), 'family_phenotypes_neg': list(family_neg)}
+
+
+def test_label_set_prefixes_fields():
+    assert label_set(record(['发热', ' ', '头痛 '], ['耳聋'])) == {'patient:发热', 'patient:头痛', 'family_neg:耳聋'}
+
+
+def test_perfect_and_partial_agreement():
+    tracker = AgreementTracker()
+    tracker.add(1, 'a', record(['发热', '头痛']))
+    tracker.add(1, 'b', record(['发热', '头痛']))
+    summary = tracker.summary()
+    assert summary['pairs']['a|b']['f1'] == 1.0
+    assert summary['pairs']['a|b']['cohen_kappa'] == 1.0
+    assert summary['fleiss']['fleiss_kappa'] == 1.0
+
+    # 修改标注只更新该样本的累加量
+    tracker.add(1, 'b', record(['发热']))
+    pair = tracker.summary()['pairs']['a|b']
+    assert pair['items'] == 1
+    assert pair['f1'] == pytest.approx(2 / 3, abs=1e-4)
+    assert pair['mean_dice'] == pytest.approx(2 / 3, abs=1e-4)
+
+
+def test_single_annotator_items_are_ignored():
+    tracker = AgreementTracker()
+    tracker.add(1, 'a', record(['发热']))
+    summary = tracker.summary()
+    assert summary['pairs'] == {}
+    assert summary['overall']['cohen_kappa'] is None
+    assert summary['fleiss']['fleiss_kappa'] is None
+
+
+def test_from_records_matches_incremental():
+    rng = random.Random(0)
+    terms = ['发热', '头痛', '癫痫', '乏力', '耳聋']
+    records = []
+    for idx in range(40):
+        for annotator in rng.sample(['a', 'b', 'c'], rng.choice([1, 2, 3])):
+            records.append((idx, annotator, record(rng.sample(terms, rng.randint(0, 3)),
+                                                   rng.sample(terms, rng.randint(0, 1)))))
+    incremental = AgreementTracker()
+    for idx, annotator, rec in records:
+        incremental.add(idx, annotator, rec)
+    assert AgreementTracker.from_records(records).summary() == incremental.summary()
@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.pending_queue import PendingQueue
+from app.dispatcher import LeaseDispatcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(n=10, **kwargs):
+    clock = Clock()
+    released = []
+    dispatcher = LeaseDispatcher(PendingQueue(range(n)), lease_seconds=60, clock=clock,
+                                 on_release=lambda a, s: released.append((a, s)), **kwargs)
+    return dispatcher, clock, released
+
+
+def test_annotators_get_different_samples():
+    dispatcher, _, _ = make()
+    assert dispatcher.acquire('a') == 0
+    assert dispatcher.acquire('b') == 1
+    # init 时优先返回自己仍持有的样本
+    assert dispatcher.acquire('a') == 0
+    assert dispatcher.acquire('a', 'next', 0) == 2
+    assert dispatcher.holder(1) == 'b'
+
+
+def test_prev_skips_leased_and_stays_at_head():
+    dispatcher, _, _ = make(max_leases=3)
+    dispatcher.acquire_many('a', 3)
+    assert dispatcher.acquire('b', 'next', 2) == 3
+    assert dispatcher.acquire('b', 'prev', 3) == 3     # 前面的样本都被 a 持有
+    assert dispatcher.acquire('a', 'prev', 1) == 0
+    assert dispatcher.acquire('a', 'prev', 0) == 0
+
+
+def test_leases_expire():
+    dispatcher, clock, released = make()
+    assert dispatcher.acquire('a') == 0
+    clock.now = 61
+    assert dispatcher.acquire('b') == 0
+    assert released == [('a', 0)]
+    assert dispatcher.holding('a') == []
+
+
+def test_max_leases_evicts_oldest():
+    dispatcher, _, released = make(max_leases=2)
+    assert dispatcher.acquire_many('a', 3) == [0, 1, 2]
+    assert dispatcher.holding('a') == [1, 2]
+    assert released == [('a', 0)]
+    assert dispatcher.active() == 2
+
+
+def test_release_and_complete():
+    dispatcher, _, released = make(max_leases=5)
+    dispatcher.acquire_many('a', 3)
+    dispatcher.release('b', 0)                 # 不是自己的租约，不释放
+    assert dispatcher.holder(0) == 'a'
+    dispatcher.release('a', 1)
+    assert dispatcher.holding('a') == [0, 2]
+    dispatcher.release('a')
+    assert dispatcher.holding('a') == []
+    assert sorted(s for _, s in released) == [0, 1, 2]
+
+    # 需要两人标注：第一位提交后该样本不再分给他，但仍可分给其他人
+    assert dispatcher.acquire('a') == 0
+    dispatcher.complete('a', 0, finished=False)
+    assert dispatcher.acquire('a', 'next', 0) == 1
+    assert dispatcher.acquire('b') == 0
+    dispatcher.complete('b', 0)
+    dispatcher.queue.remove(0)
+    assert dispatcher.submitted == {'a': 1, 'b': 1}
+    assert 0 not in dispatcher.done
+    assert set(dispatcher.annotator_stats()) == {'a', 'b'}
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.http_cache import PayloadCache, CachedPayload, COMPRESS_MIN_SIZE
+
+
+def test_small_payload_is_not_compressed():
+    assert set(CachedPayload(b'{}', 'application/json').variants) == {None}
+    assert 'gzip' in CachedPayload(b' ' * COMPRESS_MIN_SIZE, 'application/json').variants
+
+
+def test_payload_cache_lru():
+    cache = PayloadCache(maxsize=2)
+    calls = []
+
+    def build(body):
+        def inner():
+            calls.append(body)
+            return body
+        return inner
+
+    first = cache.get('a', build(b'1'))
+    assert cache.get('a', build(b'x')) is first
+    cache.get('b', build(b'2'))
+    cache.get('a', build(b'x'))          # a 最近使用过，淘汰 b
+    cache.get('c', build(b'3'))
+    assert len(cache) == 2
+    cache.get('b', build(b'4'))
+    assert calls == [b'1', b'2', b'3', b'4']
+    assert first.etag == CachedPayload(b'1', 'application/json').etag
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.pending_queue import PendingQueue
+
+
+def test_navigation_across_compaction():
+    queue = PendingQueue(range(200))
+    for sample_id in range(50, 151):
+        queue.remove(sample_id)
+    # 删除过半后已压缩，墓碑不再在数组中
+    assert len(queue._ids) < 200
+    assert queue.next(150) == 151
+    assert queue.prev(150) == 49
+    assert queue.next(50) == 151
+    assert queue.prev(100) == 49
+
+
+def test_navigation_after_neighbour_removed_later():
+    queue = PendingQueue(range(200))
+    for sample_id in range(50, 151):
+        queue.remove(sample_id)
+    queue.remove(151)
+    queue.remove(49)
+    assert queue.next(150) == 152
+    assert queue.prev(150) == 48
+    # 再次压缩后，本轮压缩掉的样本（含压缩前就成为墓碑的 49、151）仍能导航
+    for sample_id in list(range(152, 190)) + list(range(0, 40)):
+        queue.remove(sample_id)
+    assert len(queue._ids) == 48
+    assert queue.next(189) == 190
+    assert queue.next(151) == 190
+    assert queue.prev(151) == 48
+    assert queue.next(20) == 40
+    assert queue.prev(20) is None
+    assert queue.next(199) is None
+    assert list(queue) == list(range(40, 49)) + list(range(190, 200))
+    # 更早一轮压缩掉的样本不再保留，_moved 不会无限增长
+    assert 150 not in queue._moved
+    assert len(queue._moved) <= 200 - len(queue)
+    assert queue.next(150) == queue.first()
+
+
+def test_long_tombstone_run_is_iterative():
+    queue = PendingQueue(range(100000))
+    for sample_id in range(1, 99999):
+        queue.remove(sample_id)
+    assert queue.next(99998) == 99999
+    assert queue.prev(99998) == 0
+    assert queue.next(0) == 99999
+    assert len(queue._moved) <= 2 * len(queue._ids)
+
+
+def test_reappended_sample_is_navigable():
+    queue = PendingQueue(range(100))
+    for sample_id in range(10, 80):
+        queue.remove(sample_id)
+    queue.append(40)
+    assert queue.next(40) is None
+    assert queue.prev(40) == 99
+    assert queue.next(39) == 80
@@ -0,0 +1,71 @@
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.store import AnnotationStore
+
+
+def record(idx, terms, **extra):
+    return {"index": idx, "description": f"病例{idx}", "patient_phenotypes": terms, "family_phenotypes": [],
+            "patient_phenotypes_neg": [], "family_phenotypes_neg": [], "is_sure": True, **extra}
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_export_one_line_per_sample(tmp_path):
+    store = AnnotationStore(str(tmp_path / 'a.db'))
+    store.add_samples([3, 1, 2])
+    store.save_annotation(record(1, ['癫痫']), 'alice', required=2)
+    store.save_annotation(record(1, ['抽搐']), 'bob', required=2)
+    store.save_annotation(record(3, ['发热']), 'alice')
+    store.save_annotation(record(3, ['高热']), 'alice')      # 修改：只导出最新版本
+    store.save_annotation(record(2, ['头痛']), 'bob', required=2)  # 只有一人标注，尚未完成
+
+    count = store.export_jsonl(str(tmp_path / 'out.jsonl'))
+    rows = read_jsonl(tmp_path / 'out.jsonl')
+    assert count == 2
+    assert [r['index'] for r in rows] == [3, 1]
+    assert rows[0] == record(3, ['高热'])
+    assert rows[1] == record(1, ['癫痫'])
+    store.close()
+
+
+def test_export_annotations_round_trip(tmp_path):
+    store = AnnotationStore(str(tmp_path / 'a.db'))
+    store.add_samples([1, 2])
+    store.save_annotation(record(1, ['癫痫']), 'alice', required=2)
+    store.save_annotation(record(1, ['抽搐']), 'bob', required=2)
+    store.save_annotation(record(2, ['头痛']), 'bob')
+
+    assert store.export_annotations(str(tmp_path / 'all.jsonl')) == 3
+    rows = read_jsonl(tmp_path / 'all.jsonl')
+    assert [(r['index'], r['annotator']) for r in rows] == [(1, 'alice'), (1, 'bob'), (2, 'bob')]
+    assert store.export_annotations(str(tmp_path / 'bob.jsonl'), 'bob') == 2
+
+    copy = AnnotationStore(str(tmp_path / 'b.db'))
+    assert copy.import_jsonl(str(tmp_path / 'all.jsonl')) == 3
+    assert copy.import_jsonl(str(tmp_path / 'all.jsonl')) == 0    # 同一文件只导入一次
+    assert copy.get_annotations(1) == {'alice': record(1, ['癫痫']), 'bob': record(1, ['抽搐'])}
+    store.close()
+    copy.close()
+
+
+def test_pending_page(tmp_path):
+    store = AnnotationStore(str(tmp_path / 'a.db'))
+    store.add_samples(range(10))
+    for idx in (0, 4, 5):
+        store.save_annotation(record(idx, []), 'alice')
+    pages, after = [], -1
+    while True:
+        page = store.pending_page(after, 3)
+        pages.append([idx for _, idx in page])
+        if len(page) < 3:
+            break
+        after = page[-1][0]
+    assert pages == [[1, 2, 3], [6, 7, 8], [9]]
+    store.close()
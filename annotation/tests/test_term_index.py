@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2]))    # 仓库根目录（hpo_index）
+
+from app.term_index import TermIndex
+
+TERMS = [('HP:0001250', 'Seizure', '癫痫发作'), ('HP:0002373', 'Febrile seizure', '热性惊厥'),
+         ('HP:0001945', 'Fever', '发热'), ('HP:0002315', 'Headache', '头痛'), ('HP:0012378', 'Fatigue', '乏力')]
+
+
+def test_from_dataframe():
+    df = pd.DataFrame({'HPO编号': ['0001250', None], '英 文': ['Seizure', 'x'], '中文翻译': ['癫痫发作', '无编号']})
+    assert TermIndex.from_dataframe(df).terms == [('HP:0001250', 'Seizure', '癫痫发作')]
+
+
+def test_search_ranking():
+    index = TermIndex(TERMS)
+    results, total = index.search('发热')
+    assert results[0]['hpo_id'] == 'HP:0001945' and results[0]['match'] == 'exact'
+    results, _ = index.search('fe')
+    assert [r['name_en'] for r in results[:2]] == ['Fever', 'Febrile seizure']
+    assert all(r['match'] == 'prefix' for r in results[:2])
+    results, _ = index.search('发作')
+    assert results[0]['hpo_id'] == 'HP:0001250' and results[0]['match'] == 'substring'
+    assert index.search('') == ([], 0)
+
+
+def test_search_pagination():
+    index = TermIndex(TERMS)
+    everything, total = index.search('e', limit=100)
+    page, page_total = index.search('e', limit=2, offset=1)
+    assert page_total == total == len(everything)
+    assert page == everything[1:3]
+
+
+def test_validate():
+    index = TermIndex(TERMS)
+    results = index.validate(['发热', 'headache', 'HP:0012378', '咳嗽'])
+    assert [r['valid'] for r in results] == [True, True, True, False]
+    assert results[1]['name_zh'] == '头痛'
+    assert results[3] == {'term': '咳嗽', 'valid': False}
@@ -0,0 +1,93 @@
+import re
+from typing import List
+
+_SENTENCE_RE = re.compile(r'[^\n。！？；!?;]*(?:[。！？；!?;]+|\n+|$)')
+_CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Description:
+        Cheap token estimate without a tokenizer: one token per CJK character and about
+        four characters per token for everything else (latin, digits, LaTeX markup).
+    """
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split on line breaks and chinese/english sentence terminators, keeping the delimiters."""
+    return [s for s in _SENTENCE_RE.findall(text) if s.strip()]
+
+
+def _hard_split(sentence: str, max_tokens: int) -> List[str]:
+    pieces, current = [], ''
+    for char in sentence:
+        if current and estimate_tokens(current + char) > max_tokens:
+            pieces.append(current)
+            current = ''
+        current += char
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int = 512, overlap_sentences: int = 0) -> List[str]:
+    """
+    Description:
+        Pack consecutive sentences into windows of at most ``max_tokens`` estimated tokens.
+        Sentences longer than the window are split on character boundaries.
+
+    Args:
+        overlap_sentences (int): Number of trailing sentences repeated at the start of the
+            next window, so phenotypes spanning a boundary keep their context.
+
+    Returns:
+        list: Chunks in document order. Short texts are returned as a single chunk.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    sentences = []
+    for sentence in split_sentences(text):
+        if estimate_tokens(sentence) > max_tokens:
+            sentences.extend(_hard_split(sentence, max_tokens))
+        else:
+            sentences.append(sentence)
+
+    chunks, window, window_tokens = [], [], 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+        if window and window_tokens + tokens > max_tokens:
+            chunks.append(''.join(window).strip())
+            window = window[-overlap_sentences:] if overlap_sentences else []
+            window_tokens = sum(estimate_tokens(s) for s in window)
+            # 重叠部分过长时放弃重叠，保证窗口不超限
+            if window_tokens + tokens > max_tokens:
+                window, window_tokens = [], 0
+        window.append(sentence)
+        window_tokens += tokens
+    if window:
+        chunks.append(''.join(window).strip())
+    return chunks
+
+
+def merge_predictions(predictions: List[List[list]]) -> List[list]:
+    """
+    Description:
+        Merge per-chunk [HPO_ID, 英文, 中文, 原文] lists in chunk order, deduplicating by
+        HPO_ID. Distinct original-text spans of the same term are joined with '；'.
+    """
+    merged, by_id = [], {}
+    for rows in predictions:
+        for row in rows or []:
+            hpo_id = row[0]
+            if hpo_id not in by_id:
+                by_id[hpo_id] = list(row)
+                merged.append(by_id[hpo_id])
+                continue
+            existing = by_id[hpo_id]
+            spans = existing[3].split('；') if existing[3] else []
+            if len(row) > 3 and row[3] and row[3] not in spans:
+                existing[3] = '；'.join(spans + [row[3]])
+    return merged
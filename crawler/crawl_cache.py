@@ -0,0 +1,121 @@
+import re
+import time
+import sqlite3
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    key         TEXT PRIMARY KEY,                  -- article_key(url)，没有 URL 时为 title:<归一化题目>
+    url         TEXT,
+    site        TEXT,
+    title       TEXT,
+    title_key   TEXT,
+    abstract    TEXT,
+    pdf_file    TEXT,
+    created_at  REAL,
+    updated_at  REAL
+);
+CREATE INDEX IF NOT EXISTS articles_title_key ON articles (title_key);
+"""
+
+# 文章 id 的提取规则（按顺序尝试）：cmaid、DOI、yiigle 的文章 id
+_KEY_PATTERNS = (
+    ('cmaid', re.compile(r'cmaid[=/](\d+)', re.I)),
+    ('doi', re.compile(r'\b(10\.\d{4,9}/[^\s?&#]+)', re.I)),
+    ('yiigle', re.compile(r'yiigle\.com/.*?[?&](?:article_?id|aid|id)=(\d+)', re.I)),
+    ('yiigle', re.compile(r'yiigle\.com/.*?/(\d{5,})(?:\.s?html?)?/?(?:[?#]|$)', re.I)),
+)
+
+# 标题太短时不用于匹配（如“病例报告”），避免把不同文章当成同一篇
+MIN_TITLE_KEY_LENGTH = 10
+
+
+def normalize_url(url: str) -> str:
+    """统一协议与 host（去掉 www.）、去掉片段、末尾斜杠与 utm_* 参数，查询参数排序"""
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.lower().startswith('utm_'))
+    return urlunsplit(('https', host, parts.path.rstrip('/'), urlencode(query), ''))
+
+
+def article_key(url: str):
+    """详情页 URL 的归一化键：能识别出文章 id 时为 cmaid:/doi:/yiigle:<id>，否则为 url:<归一化 URL>；url 为空时返回 None"""
+    if not url:
+        return None
+    url = unquote(url.strip())
+    for name, pattern in _KEY_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return f"{name}:{match.group(1).lower()}"
+    return f"url:{normalize_url(url)}"
+
+
+def title_key(title: str):
+    """题目的归一化形式（只保留字母、数字与汉字，小写）；太短时返回 None"""
+    key = ''.join(ch for ch in (title or '').lower() if ch.isalnum())
+    return key if len(key) >= MIN_TITLE_KEY_LENGTH else None
+
+
+class CrawlCache:
+    """跨 part、跨网站共享的文章缓存（SQLite）。
+
+    按归一化的详情页 URL（cmaid、DOI、yiigle 文章 id）记录题目、摘要与 PDF 路径。
+    同一文章在相关疾病或不同 part 的搜索结果中再次出现时，直接复用缓存内容，不再打开详情页。
+    搜索结果没有可用链接时（crawlerWWW.py 需要点击进入详情页），按归一化的题目查找。
+    crawler.py 与 crawlerWWW.py 可以同时使用同一个缓存文件。
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, url: str = None, title: str = None):
+        """查找文章：按 URL 的键；URL 得不到键（没有可用链接）时才按题目。找不到时返回 None"""
+        row = None
+        key = article_key(url)
+        tkey = title_key(title) if key is None else None
+        if key:
+            row = self.conn.execute('SELECT * FROM articles WHERE key = ?', (key,)).fetchone()
+        elif tkey:
+            row = self.conn.execute(
+                'SELECT * FROM articles WHERE title_key = ? ORDER BY updated_at DESC LIMIT 1', (tkey,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(row)
+
+    def put(self, url: str, title: str, abstract: str, pdf_file: str = None, site: str = None):
+        """记录已处理的文章；已存在时更新摘要，PDF 路径只在新值非空时覆盖"""
+        tkey = title_key(title)
+        key = article_key(url) or (f"title:{tkey}" if tkey else None)
+        if key is None:
+            return
+        now = time.time()
+        self.conn.execute(
+            'INSERT INTO articles (key, url, site, title, title_key, abstract, pdf_file, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET abstract = COALESCE(excluded.abstract, abstract), '
+            'pdf_file = COALESCE(excluded.pdf_file, pdf_file), updated_at = excluded.updated_at',
+            (key, url, site, title, tkey, abstract, str(pdf_file) if pdf_file else None, now, now),
+        )
+
+    def stats(self) -> dict:
+        total = self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+        return {'articles': total, 'hits': self.hits, 'misses': self.misses}
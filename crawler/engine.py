@@ -0,0 +1,551 @@
+import csv
+import asyncio
+import urllib.error
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+from politeness import HostLimiter, AdaptiveHostLimiter, looks_blocked
+from frontier import CrawlFrontier
+from resources import ResourcePolicy, install_resource_blocking
+from http_fetch import HttpFetcher
+from pdf_store import PdfStore, InvalidPdf, cookie_header
+from crawl_cache import CrawlCache
+from records import RecordStore, now_iso
+from replay import SnapshotRecorder
+from sites import SITES
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+BROWSER_ARGS = [
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--disable-setuid-sandbox',
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-infobars',
+    '--window-position=0,0',
+    '--ignore-certificate-errors',
+    '--ignore-certificate-errors-spki-list',
+]
+
+
+def ExtractDisease(csv_path: str | Path = "diseases.csv"):
+    """读取疾病列表。
+
+    兼容：
+    - 每行一个疾病（可包含 OMIM，如 'xxx (OMIM:123)')
+    - 或标准 CSV 单列
+    """
+    csv_path = Path(csv_path)
+    diseases = []
+
+    with open(csv_path, mode='r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file)
+        for i, row in enumerate(reader):
+            if not row:
+                continue
+            line = (row[0] or "").strip()
+            if not line:
+                continue
+            # 去除括号中的 OMIM 等信息（兼容中英文括号）
+            if "(" in line:
+                disease_name = line.split("(")[0]
+            elif "（" in line:
+                disease_name = line.split("（")[0]
+            else:
+                disease_name = line
+            diseases.append({'id': i + 1, 'name': disease_name.strip()})
+
+    return diseases
+
+
+class CrawlEngine:
+    """爬虫引擎：一个浏览器、一个上下文（共享 cookie），concurrency 个 worker 从共享队列中领取 (网站, 疾病)。
+
+    每个网站由一个 SiteAdapter（sites.py）描述；并发、按 host 自适应限速（AdaptiveHostLimiter）、断点续爬
+    （每个网站 save_dir/frontier.db）、文章缓存（CrawlCache）、资源拦截、直接请求详情页、PDF 存储
+    （PdfStore）与结果记录（RecordStore）都只在这里实现一次，多个网站可以在同一次运行中一起爬取。
+
+    每条结果写入 save_dir/records/ 下的 JSONL 分片；write_txt=True 时同时按网站原来的格式写 TXT 文件。
+
+    snapshot_dir 不为空时保存搜索页与详情页的快照及 HAR（crawl-<时间>.har.zip），供 replay.py 离线回放与基准测试；
+    replay_har 指向之前录制的 HAR 时，浏览器的请求都由它应答（不在 HAR 中的请求被拦截），
+    此时不直接请求详情页，也不下载 PDF，整个过程不访问外网。
+
+    每个 worker 为每个网站保留一个搜索页，跨疾病复用；可直接访问的详情页并发打开，
+    只能点击进入的详情页（OPENS_DETAIL_BY_CLICK）依次处理。
+    """
+
+    def __init__(self, sites, browser_path=None, headless: bool = True, concurrency: int = 4,
+                 min_interval: float = 1.0, per_host_concurrency: int = None, max_results_per_disease: int = 2,
+                 max_attempts: int = 3, pdf_store_dir: str | Path = None, cache_path: str | Path = None,
+                 resource_policy: ResourcePolicy = None, block_resources: bool = True, direct_fetch: bool = True,
+                 adaptive_rate: bool = True, rate_log_path: str | Path = None, write_txt: bool = False,
+                 snapshot_dir: str | Path = None, replay_har: str | Path = None):
+        self.sites = list(sites)
+        self.browser_path = browser_path
+        self.headless = headless
+        self.default_navigation_timeout = 40000
+        self.default_action_timeout = 25000
+        self.concurrency = concurrency
+        self.max_results_per_disease = max_results_per_disease
+        root = self.sites[0].save_dir if self.sites else Path('.')
+        # 按 host 限速：默认按响应情况自适应调整（AIMD），调整记录写入 rate_decisions.jsonl
+        if adaptive_rate:
+            self.limiter = AdaptiveHostLimiter(min_interval, per_host_concurrency or concurrency,
+                                               max_limit=max(concurrency * 2, 2),
+                                               log_path=rate_log_path or root / 'rate_decisions.jsonl')
+        else:
+            self.limiter = HostLimiter(min_interval, per_host_concurrency or concurrency)
+        # 每个网站的进度记录在各自的 save_dir/frontier.db 中，重新运行时从中断处继续
+        self.frontiers = {site.SITE: CrawlFrontier(site.save_dir / 'frontier.db', max_attempts=max_attempts)
+                          for site in self.sites}
+        # PDF 校验并按 SHA-256 去重；已处理过的文章不再打开详情页。二者都可跨 part、跨网站共用
+        self.pdf_store = PdfStore(pdf_store_dir or root / 'pdf_store')
+        self.cache = CrawlCache(cache_path or root / 'crawl_cache.db')
+        # 拦截图片/字体/媒体与统计广告脚本；block_resources=False 时加载全部资源
+        self.resource_policy = (resource_policy or ResourcePolicy()) if block_resources else None
+        # 详情页与 PDF 优先直接请求（共享浏览器 cookie），静态 HTML 中没有摘要时才用浏览器渲染
+        self.direct_fetch = direct_fetch
+        self.fetcher = None
+        self.context = None
+        self.errors = {site.SITE: [] for site in self.sites}
+        self.records = {site.SITE: RecordStore(site.save_dir / 'records', prefix=site.SITE) for site in self.sites}
+        self.write_txt = write_txt
+        self.snapshots = SnapshotRecorder(snapshot_dir) if snapshot_dir else None
+        self.replay_har = replay_har
+
+    # --- 页面辅助方法（供 SiteAdapter 使用） ---
+
+    async def safe_wait_for_load_state(self, page, state="networkidle", timeout=None):
+        """安全等待页面加载：优先等待指定 state，超时后回退到 domcontentloaded，再降级为短暂等待"""
+        try:
+            use_timeout = timeout if timeout is not None else self.default_navigation_timeout
+            await page.wait_for_load_state(state, timeout=use_timeout)
+            return True
+        except Exception:
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=15000)
+                return True
+            except Exception:
+                try:
+                    await page.wait_for_timeout(2000)
+                except Exception:
+                    pass
+                return False
+
+    async def wait_for_selector(self, page, selector, timeout=None, fallback=True):
+        """等待 selector 出现；超时时（fallback 为真）退回 safe_wait_for_load_state，返回是否找到"""
+        try:
+            await page.wait_for_selector(selector, state='attached', timeout=timeout or self.default_action_timeout)
+            return True
+        except Exception:
+            if fallback:
+                await self.safe_wait_for_load_state(page, "networkidle")
+            return False
+
+    async def goto(self, page, url, wait_until='load'):
+        async with self.limiter.slot(url) as slot:
+            resp = await page.goto(url, wait_until=wait_until, timeout=self.default_navigation_timeout)
+            if resp is not None:
+                slot.report(resp.status, retry_after=resp.headers.get('retry-after'))
+            if looks_blocked(await page.title()):
+                slot.report(blocked=True)
+                logger.warning(f"疑似反爬验证页面: {url}")
+        return resp
+
+    # --- PDF ---
+
+    async def download_url(self, url, pdf_path, referer=None):
+        """流式下载 PDF（共享浏览器 cookie），内容不是完整 PDF 时返回 None"""
+        headers = {'User-Agent': USER_AGENT, 'Cookie': cookie_header(await self.context.cookies(url))}
+        if referer:
+            headers['Referer'] = referer
+        if self.replay_har:
+            return None
+        async with self.limiter.slot(url) as slot:
+            try:
+                return await self.pdf_store.download(url, pdf_path, headers)
+            except InvalidPdf as e:
+                logger.info(f"跳过非 PDF 内容 {url}: {e}")
+                return None
+            except urllib.error.HTTPError as e:
+                slot.report(e.code, retry_after=e.headers.get('Retry-After'))
+                raise
+
+    async def download_pdf(self, site, page, pdf_path):
+        """依次尝试页面中的 PDF 链接与网站的下载按钮，返回保存的路径或 None"""
+        try:
+            # 摘要已经等到；这里只需页面 load 完成（链接与 iframe 已就绪）
+            await self.safe_wait_for_load_state(page, "load")
+            for url in await site.pdf_urls(page):
+                try:
+                    saved = await self.download_url(url, pdf_path, page.url)
+                except Exception:
+                    continue
+                if saved:
+                    return saved
+
+            download = await site.click_download(self, page)
+            if download is not None:
+                # 先保存到临时文件，校验并去重后再放到目标位置
+                tmp = self.pdf_store.temp_path()
+                await download.save_as(tmp)
+                return self.pdf_store.add_file(tmp, pdf_path, download.url)
+
+            logger.info(f"未能找到可下载的 PDF（页面: {page.url}）")
+            return None
+        except Exception as e:
+            logger.error(f"PDF下载过程出错: {e}")
+            return None
+
+    # --- 详情页 ---
+
+    def _save_detail(self, site, disease, link, title, abstract, url):
+        """记录 detail_fetched（write_txt 时同时保存 TXT），返回 (txt_path 或 None, pdf_path)"""
+        save_dir = site.disease_dir(disease)
+        stem = site.file_stem(disease, title)
+        txt_path = None
+        if self.write_txt:
+            txt_path = save_dir / f"{stem}.txt"
+            with open(txt_path, 'w', encoding='utf-8') as f:
+                f.write(site.format_txt(disease, title, abstract, url))
+            logger.info(f"保存TXT: {txt_path}")
+        self.frontiers[site.SITE].result_done(site.SITE, disease['id'], link['rank'], 'detail_fetched',
+                                              txt_file=str(txt_path) if txt_path else None,
+                                              title=title, abstract=abstract or '', url=url)
+        return txt_path, save_dir / f"{stem}.pdf"
+
+    def _stored_detail(self, site, disease, link):
+        """上次已保存详情（abstract 不为 NULL）的结果：直接使用 frontier 中的题目/摘要，返回 detail 或 None"""
+        if link.get('abstract') is None:
+            return None
+        title = link.get('detail_title') or link['title']
+        return {'title': title, 'abstract': link['abstract'], 'url': link.get('detail_url') or link['url'],
+                'txt_path': Path(link['txt_file']) if link.get('txt_file') else None,
+                'pdf_path': site.disease_dir(disease) / f"{site.file_stem(disease, title)}.pdf"}
+
+    def _finish_result(self, site, disease, link, title, abstract, url, txt_path, pdf_file, cached=False,
+                       fetched_at=None):
+        self.frontiers[site.SITE].result_done(site.SITE, disease['id'], link['rank'],
+                                              'pdf_downloaded' if pdf_file else 'done', pdf_file=pdf_file)
+        if pdf_file:
+            logger.info(f"下载PDF: {pdf_file}")
+        if not cached:
+            # 按搜索结果中的链接记录（没有链接时按详情页地址），之后在任何疾病/part/网站中遇到同一文章都能命中
+            self.cache.put(link['url'] or url, title, abstract, pdf_file, site.SITE)
+        record = {
+            'site': site.SITE,
+            'disease_id': disease['id'],
+            'disease': disease['name'],
+            'rank': link['rank'],
+            'title': title,
+            'abstract': abstract,
+            'url': url,
+            'source_url': link['url'],
+            'pdf_file': pdf_file,
+            'txt_file': str(txt_path) if txt_path else None,
+            'cached': cached,
+            'fetched_at': fetched_at or now_iso(),
+        }
+        self.records[site.SITE].append(record)
+        return record
+
+    def _from_cache(self, site, disease, link):
+        """文章已在缓存中时直接记录结果、链接已下载的 PDF；不在缓存中（或缓存的 PDF 已删除）时返回 None"""
+        cached = self.cache.get(link['url'], link['title'])
+        if cached is None:
+            return None
+        title = cached['title'] if site.OPENS_DETAIL_BY_CLICK and cached['title'] else link['title']
+        txt_path, pdf_path = self._save_detail(site, disease, link, title, cached['abstract'], cached['url'])
+        pdf_file = None
+        if cached['pdf_file']:
+            pdf_file = self.pdf_store.link(cached['pdf_file'], pdf_path, cached['url'])
+            if pdf_file is None:
+                return None
+        logger.info(f"命中缓存，跳过详情页: {title}")
+        fetched_at = datetime.fromtimestamp(cached['created_at']).isoformat(timespec='seconds')
+        return self._finish_result(site, disease, link, title, cached['abstract'], cached['url'],
+                                   txt_path, pdf_file, cached=True, fetched_at=fetched_at)
+
+    async def _fetch_detail_http(self, site, disease, link):
+        """不经浏览器处理详情页。返回 (结果, 是否需要浏览器点击下载 PDF)；静态 HTML 不够时返回 (None, True)"""
+        doc = await self.fetcher.get_document(link['url'])
+        extracted = site.extract_detail_html(doc, link) if doc is not None else None
+        if extracted is None:
+            return None, True
+        title, abstract = extracted
+        if self.snapshots is not None:
+            self.snapshots.save(site.SITE, 'detail_html', doc.url, doc.html, {'title': title, 'abstract': abstract})
+        title = title or link['title']
+        txt_path, pdf_path = self._save_detail(site, disease, link, title, abstract, doc.url)
+        saved = None
+        for url in doc.pdf_links():
+            try:
+                saved = await self.download_url(url, pdf_path, doc.url)
+            except Exception:
+                continue
+            if saved:
+                break
+        detail = {'title': title, 'abstract': abstract, 'url': doc.url, 'txt_path': txt_path,
+                  'pdf_path': pdf_path, 'pdf_file': saved}
+        body = doc.text('body')
+        return detail, not saved and any(t in body for t in site.DOWNLOAD_BUTTON_TEXTS)
+
+    async def visit_result(self, site, context, search_page, disease, link):
+        """处理 frontier 中的一条结果并记录其状态：先查缓存，再优先直接请求，必要时才用浏览器打开"""
+        frontier = self.frontiers[site.SITE]
+        cached = self._from_cache(site, disease, link)
+        if cached is not None:
+            return cached
+
+        # 上次已保存详情（只差 PDF）时不再重新抓取详情，只重试下载 PDF
+        detail = self._stored_detail(site, disease, link)
+        if detail is not None:
+            logger.info(f"详情已保存，只重试下载PDF: {detail['title']}")
+        elif self.fetcher is not None and link['url'] and not site.OPENS_DETAIL_BY_CLICK:
+            try:
+                detail, need_browser = await self._fetch_detail_http(site, disease, link)
+            except Exception as e:
+                logger.info(f"直接请求详情页失败，改用浏览器: {e}")
+                detail, need_browser = None, True
+            if detail is not None and not need_browser:
+                return self._finish_result(site, disease, link, detail['title'], detail['abstract'], detail['url'],
+                                           detail['txt_path'], detail['pdf_file'])
+
+        detail_page = None
+        try:
+            detail_page = await site.open_detail(self, context, search_page, link)
+            if detail is None:
+                title, abstract = await site.extract_detail(self, detail_page, link)
+                if self.snapshots is not None:
+                    await self.snapshots.save_page(site.SITE, 'detail', detail_page,
+                                                   {'title': title, 'abstract': abstract})
+                title = title or link['title']
+                txt_path, pdf_path = self._save_detail(site, disease, link, title, abstract, detail_page.url)
+                detail = {'title': title, 'abstract': abstract, 'url': detail_page.url,
+                          'txt_path': txt_path, 'pdf_path': pdf_path}
+            # 摘要已保存（直接请求时需要在浏览器中点击下载按钮获取 PDF）
+            pdf_file = await self.download_pdf(site, detail_page, detail['pdf_path'])
+            return self._finish_result(site, disease, link, detail['title'], detail['abstract'], detail['url'],
+                                       detail['txt_path'], pdf_file)
+        except Exception as e:
+            logger.error(f"处理详情页失败: {e}")
+            frontier.result_failed(site.SITE, disease['id'], link['rank'], str(e))
+            site.on_detail_failed(disease, link, e)
+            return None
+        finally:
+            if detail_page is not None:
+                try:
+                    await detail_page.close()
+                except Exception:
+                    pass
+
+    # --- 疾病 ---
+
+    async def process_disease(self, site, page, context, disease):
+        """单个疾病在一个网站上的完整流程：搜索（已搜索过且可直接访问详情页时跳过）后处理未完成的结果"""
+        frontier = self.frontiers[site.SITE]
+        disease_id = disease['id']
+        site.disease_dir(disease).mkdir(parents=True, exist_ok=True)
+
+        results = []
+        if site.OPENS_DETAIL_BY_CLICK or not frontier.searched(site.SITE, disease_id):
+            if not await site.search(self, page, disease['name']):
+                frontier.disease_failed(site.SITE, disease_id, '搜索失败')
+                return []
+            results = await site.list_results(self, page, self.max_results_per_disease)
+            if self.snapshots is not None:
+                await self.snapshots.save_page(site.SITE, 'search', page, {'results': [r['title'] for r in results]})
+            logger.info(f"[{site.SITE}] {disease['name']}: 找到 {len(results)} 个结果")
+            if not frontier.searched(site.SITE, disease_id):
+                frontier.record_search(site.SITE, disease_id, results[:self.max_results_per_disease])
+
+        todo = frontier.results_todo(site.SITE, disease_id)
+        for link in todo:
+            link['disease_id'] = disease_id
+        if site.OPENS_DETAIL_BY_CLICK:
+            # 详情页只能从当前搜索页点击进入：依次处理，文字取自本次搜索结果
+            details = []
+            for link in todo:
+                if link['rank'] >= len(results):
+                    frontier.result_failed(site.SITE, disease_id, link['rank'], '本次搜索中没有该结果')
+                    continue
+                link['text'] = results[link['rank']]['text']
+                details.append(await self.visit_result(site, context, page, disease, link))
+        else:
+            details = await asyncio.gather(*(
+                self.visit_result(site, context, page, disease, link) for link in todo
+            ))
+        frontier.finish_disease(site.SITE, disease_id)
+        return [d for d in details if d]
+
+    async def _worker(self, context, queue, total):
+        pages = {}  # 每个网站一个搜索页，跨疾病复用
+        try:
+            while True:
+                try:
+                    site, disease = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                print(f"[{site.SITE}] 正在处理疾病 {disease['id']}/{total}: {disease['name']}")
+                try:
+                    page = pages.get(site.SITE)
+                    if page is None:
+                        page = pages[site.SITE] = await context.new_page()
+                    await self.process_disease(site, page, context, disease)
+                except Exception as e:
+                    logger.error(f"处理疾病 {disease['name']} 时出错: {e}")
+                    self.frontiers[site.SITE].disease_failed(site.SITE, disease['id'], str(e))
+                    self.errors[site.SITE].append({
+                        'disease': disease['name'],
+                        'error': str(e),
+                        'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    })
+        finally:
+            for page in pages.values():
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+    def close(self):
+        """关闭 frontier、文章缓存与结果记录（run 之后调用）"""
+        for store in self.records.values():
+            store.close()
+        for frontier in self.frontiers.values():
+            frontier.close()
+        self.cache.close()
+
+    def save_errors(self):
+        for site in self.sites:
+            errors = self.errors[site.SITE]
+            if not errors:
+                continue
+            path = site.save_dir / site.ERRORS_FILE
+            with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.DictWriter(f, fieldnames=['disease', 'error', 'time'])
+                writer.writeheader()
+                writer.writerows(errors)
+            logger.info(f"已保存错误信息到: {path}")
+
+    async def setup_browser(self, playwright):
+        launch_kwargs = {'headless': self.headless, 'args': BROWSER_ARGS}
+        if self.browser_path:
+            launch_kwargs['executable_path'] = self.browser_path
+        return await playwright.chromium.launch(**launch_kwargs)
+
+    async def run(self, diseases):
+        """爬取 diseases 在所有网站上的结果；已完成（或失败次数用尽）的疾病直接跳过"""
+        queue = asyncio.Queue()
+        pending = {}
+        for site in self.sites:
+            frontier = self.frontiers[site.SITE]
+            frontier.add_diseases(site.SITE, diseases)
+            pending[site.SITE] = {d['id'] for d in frontier.pending_diseases(site.SITE, diseases)}
+            logger.info(f"[{site.SITE}] 共 {len(diseases)} 个疾病，本次处理 {len(pending[site.SITE])} 个")
+        # 按疾病交错排列各网站的任务，分散对同一 host 的请求
+        for disease in diseases:
+            for site in self.sites:
+                if disease['id'] in pending[site.SITE]:
+                    queue.put_nowait((site, disease))
+
+        async with async_playwright() as p:
+            browser = await self.setup_browser(p)
+            context_kwargs = {}
+            if self.snapshots is not None:
+                har_name = f"crawl-{datetime.now().strftime('%Y%m%d-%H%M%S')}.har.zip"
+                context_kwargs = {'record_har_path': str(self.snapshots.root / har_name),
+                                  'record_har_content': 'attach'}
+            context = self.context = await browser.new_context(
+                viewport={'width': 1280, 'height': 800},
+                user_agent=USER_AGENT,
+                accept_downloads=True,
+                **context_kwargs
+            )
+            context.set_default_navigation_timeout(self.default_navigation_timeout)
+            context.set_default_timeout(self.default_action_timeout)
+            if self.resource_policy is not None:
+                await install_resource_blocking(context, self.resource_policy)
+            if self.replay_har:
+                await context.route_from_har(self.replay_har, not_found='abort')
+            elif self.direct_fetch:
+                self.fetcher = HttpFetcher(context.request, self.limiter)
+
+            try:
+                workers = min(self.concurrency, queue.qsize()) or 1
+                await asyncio.gather(*(self._worker(context, queue, len(diseases)) for _ in range(workers)))
+            finally:
+                self.save_errors()
+                for store in self.records.values():
+                    store.close()
+                for site in self.sites:
+                    logger.info(f"[{site.SITE}] 爬取进度: {self.frontiers[site.SITE].stats(site.SITE)}")
+                logger.info(f"文章缓存: {self.cache.stats()}")
+                if isinstance(self.limiter, AdaptiveHostLimiter):
+                    logger.info(f"限速状态: {self.limiter.stats()}")
+                if self.resource_policy is not None:
+                    logger.info(f"已拦截 {self.resource_policy.blocked} 个请求，放行 {self.resource_policy.allowed} 个")
+                # 关闭上下文时才写出 HAR
+                await context.close()
+                await browser.close()
+
+
+# 每个网站在 part 目录下的输出子目录
+SITE_DIRS = {'cmcr': 'website1', 'www': 'website2'}
+
+
+def run_parts(parts_to_crawl: dict, site_names=('cmcr',), browser_path=None, root: str | Path = 'paper', **kwargs):
+    """逐个 part 爬取；各网站的结果落到 {root}/part{n}/{website1|website2}，
+    所有 part 与网站共用 {root}/pdf_store 与 {root}/crawl_cache.db"""
+    root = Path(root)
+    for part, csv_path in parts_to_crawl.items():
+        diseases = ExtractDisease(csv_path)
+        sites = [SITES[name](root / f"part{part}" / SITE_DIRS[name]) for name in site_names]
+        engine = CrawlEngine(sites, browser_path=browser_path, pdf_store_dir=root / 'pdf_store',
+                             cache_path=root / 'crawl_cache.db', rate_log_path=root / 'rate_decisions.jsonl', **kwargs)
+        try:
+            asyncio.run(engine.run(diseases))
+        finally:
+            engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按疾病列表爬取文献题目、摘要与 PDF（可同时爬取多个网站）')
+    parser.add_argument('--sites', nargs='+', choices=sorted(SITES), default=['cmcr', 'www'], help='要爬取的网站')
+    parser.add_argument('--parts', nargs='+', type=int, default=[1, 2, 4], help='要爬取的 part（读取 csv/diseases_part{n}.csv）')
+    parser.add_argument('--csv-dir', default='csv', help='疾病列表 CSV 所在目录')
+    parser.add_argument('--root', default='paper', help='输出根目录')
+    parser.add_argument('--browser-path', default=None, help='Chromium 可执行文件路径（默认使用 Playwright 自带浏览器）')
+    parser.add_argument('--concurrency', type=int, default=4, help='同时处理的任务数（每个 worker 每个网站一个搜索页）')
+    parser.add_argument('--min-interval', type=float, default=1.0, help='同一 host 相邻请求的初始间隔（秒）')
+    parser.add_argument('--fixed-rate', action='store_true', help='不自适应调整，始终按 --min-interval 与 --concurrency 限速')
+    parser.add_argument('--max-results', type=int, default=2, help='每个疾病在每个网站上处理的结果数')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口（调试用）')
+    parser.add_argument('--write-txt', action='store_true', help='除 records/ 下的 JSONL 外，同时按原来的格式写 TXT 文件')
+    parser.add_argument('--snapshot-dir', default=None, help='保存页面快照与 HAR 的目录（供 replay.py 回放与基准测试）')
+    parser.add_argument('--replay-har', default=None, help='用之前录制的 HAR（snapshots/crawl-*.har.zip）应答所有请求，离线运行')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('engine_log.log', encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    parts = {part: Path(args.csv_dir) / f"diseases_part{part}.csv" for part in args.parts}
+    run_parts(parts, site_names=args.sites, browser_path=args.browser_path, root=args.root,
+              headless=not args.headed, concurrency=args.concurrency, min_interval=args.min_interval,
+              max_results_per_disease=args.max_results, adaptive_rate=not args.fixed_rate, write_txt=args.write_txt,
+              snapshot_dir=args.snapshot_dir, replay_har=args.replay_har)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import time
+import sqlite3
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS diseases (
+    site        TEXT NOT NULL,
+    disease_id  INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',   -- pending / searched / done / failed
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    updated_at  REAL,
+    PRIMARY KEY (site, disease_id)
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    site        TEXT NOT NULL,
+    disease_id  INTEGER NOT NULL,
+    rank        INTEGER NOT NULL,                  -- 在搜索结果中的序号（从 0 开始）
+    url         TEXT,
+    title       TEXT,
+    state       TEXT NOT NULL DEFAULT 'pending',   -- pending / detail_fetched / pdf_downloaded / done / failed
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    txt_file    TEXT,
+    pdf_file    TEXT,
+    detail_title TEXT,                             -- 详情页的题目/摘要/地址（detail_fetched 后保存，重试时只需补下载 PDF）
+    abstract    TEXT,
+    detail_url  TEXT,
+    error       TEXT,
+    updated_at  REAL,
+    PRIMARY KEY (site, disease_id, rank)
+);
+"""
+
+# 旧版数据库中没有的列，打开时补上
+RESULT_DETAIL_COLUMNS = ('detail_title', 'abstract', 'detail_url')
+
+# 结果的终态：pdf_downloaded 已下载 PDF；done 已保存题目/摘要但没有可下载的 PDF
+RESULT_FINISHED = ('pdf_downloaded', 'done')
+
+
+class CrawlFrontier:
+    """持久化的爬取进度（SQLite）。
+
+    记录每个疾病与每条搜索结果的状态和失败次数，每完成一步立即提交。
+    爬虫中断或重启后，已完成的疾病与结果直接跳过，只重试失败（且失败次数未超过 max_attempts）的步骤；
+    已保存详情（abstract 不为 NULL）的结果失败后仍保留详情，重试时只需下载 PDF。
+    """
+
+    def __init__(self, path: str | Path, max_attempts: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(results)')}
+        for column in RESULT_DETAIL_COLUMNS:
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE results ADD COLUMN {column} TEXT')
+
+    def close(self):
+        self.conn.close()
+
+    # --- 疾病 ---
+
+    def add_diseases(self, site: str, diseases):
+        """登记疾病列表（已存在的保留原状态）"""
+        now = time.time()
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO diseases (site, disease_id, name, updated_at) VALUES (?, ?, ?, ?)',
+            [(site, d['id'], d['name'], now) for d in diseases],
+        )
+
+    def pending_diseases(self, site: str, diseases) -> list:
+        """diseases 中尚未完成、且失败次数未超过上限的疾病（保持原顺序）"""
+        rows = self.conn.execute(
+            "SELECT disease_id FROM diseases WHERE site = ? AND (state = 'done' OR "
+            "(state = 'failed' AND attempts >= ?))", (site, self.max_attempts)
+        )
+        finished = {row[0] for row in rows}
+        return [d for d in diseases if d['id'] not in finished]
+
+    def disease_state(self, site: str, disease_id) -> str:
+        row = self.conn.execute(
+            'SELECT state FROM diseases WHERE site = ? AND disease_id = ?', (site, disease_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def searched(self, site: str, disease_id) -> bool:
+        """搜索是否已完成（之后只需处理未完成的结果，无需重新搜索）"""
+        if self.disease_state(site, disease_id) in ('searched', 'done'):
+            return True
+        row = self.conn.execute(
+            'SELECT 1 FROM results WHERE site = ? AND disease_id = ? LIMIT 1', (site, disease_id)
+        ).fetchone()
+        return row is not None
+
+    def record_search(self, site: str, disease_id, links):
+        """保存搜索得到的结果列表（links 中每项含 url/title），疾病状态置为 searched"""
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO results (site, disease_id, rank, url, title, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [(site, disease_id, rank, link.get('url') or link.get('href'), link.get('title'), now)
+                 for rank, link in enumerate(links)],
+            )
+            self.conn.execute(
+                "UPDATE diseases SET state = 'searched', error = NULL, updated_at = ? WHERE site = ? AND disease_id = ?",
+                (now, site, disease_id),
+            )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def disease_failed(self, site: str, disease_id, error: str):
+        self.conn.execute(
+            "UPDATE diseases SET state = 'failed', attempts = attempts + 1, error = ?, updated_at = ? "
+            "WHERE site = ? AND disease_id = ?",
+            (str(error)[:500], time.time(), site, disease_id),
+        )
+
+    def finish_disease(self, site: str, disease_id) -> str:
+        """所有结果都已完成（或失败次数用尽）时疾病置为 done，否则置为 failed 以便下次重试；返回新状态"""
+        remaining = self.conn.execute(
+            f"SELECT COUNT(*) FROM results WHERE site = ? AND disease_id = ? "
+            f"AND state NOT IN ({','.join('?' * len(RESULT_FINISHED))}) AND attempts < ?",
+            (site, disease_id, *RESULT_FINISHED, self.max_attempts),
+        ).fetchone()[0]
+        state = 'failed' if remaining else 'done'
+        self.conn.execute(
+            f"UPDATE diseases SET state = ?, attempts = attempts + {1 if remaining else 0}, updated_at = ? "
+            f"WHERE site = ? AND disease_id = ?",
+            (state, time.time(), site, disease_id),
+        )
+        return state
+
+    # --- 搜索结果 ---
+
+    def results_todo(self, site: str, disease_id) -> list:
+        """
+        该疾病尚未完成、且失败次数未超过上限的结果：[{'rank', 'url', 'title', 'state', ...}]；
+        已保存详情的结果带有 detail_title / abstract / detail_url / txt_file。
+        """
+        rows = self.conn.execute(
+            f"SELECT * FROM results WHERE site = ? AND disease_id = ? "
+            f"AND state NOT IN ({','.join('?' * len(RESULT_FINISHED))}) AND attempts < ? ORDER BY rank",
+            (site, disease_id, *RESULT_FINISHED, self.max_attempts),
+        )
+        return [dict(row) for row in rows]
+
+    def result_done(self, site: str, disease_id, rank: int, state: str, txt_file=None, pdf_file=None,
+                    title=None, abstract=None, url=None):
+        """记录结果完成的步骤：detail_fetched（已保存题目/摘要）、pdf_downloaded 或 done（无 PDF）"""
+        self.conn.execute(
+            'UPDATE results SET state = ?, txt_file = COALESCE(?, txt_file), pdf_file = COALESCE(?, pdf_file), '
+            'detail_title = COALESCE(?, detail_title), abstract = COALESCE(?, abstract), '
+            'detail_url = COALESCE(?, detail_url), error = NULL, updated_at = ? '
+            'WHERE site = ? AND disease_id = ? AND rank = ?',
+            (state, txt_file, pdf_file, title, abstract, url, time.time(), site, disease_id, rank),
+        )
+
+    def result_failed(self, site: str, disease_id, rank: int, error: str):
+        self.conn.execute(
+            "UPDATE results SET state = 'failed', attempts = attempts + 1, error = ?, updated_at = ? "
+            "WHERE site = ? AND disease_id = ? AND rank = ?",
+            (str(error)[:500], time.time(), site, disease_id, rank),
+        )
+
+    def stats(self, site: str = None) -> dict:
+        """各状态的疾病数与结果数"""
+        where, args = ('WHERE site = ?', (site,)) if site else ('', ())
+        diseases = dict(self.conn.execute(f'SELECT state, COUNT(*) FROM diseases {where} GROUP BY state', args).fetchall())
+        results = dict(self.conn.execute(f'SELECT state, COUNT(*) FROM results {where} GROUP BY state', args).fetchall())
+        return {'diseases': diseases, 'results': results}
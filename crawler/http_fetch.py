@@ -0,0 +1,185 @@
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from politeness import looks_blocked_html
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer',
+    'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'tr', 'ul',
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+
+class _Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or ())
+        self.children = []
+        self.parent = parent
+
+    @property
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    def descendants(self):
+        stack = list(reversed([c for c in self.children if isinstance(c, _Node)]))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed([c for c in node.children if isinstance(c, _Node)]))
+
+    def text(self) -> str:
+        """近似 inner_text：块级元素换行，行内空白合并为一个空格"""
+        parts = []
+
+        def walk(node):
+            for child in node.children:
+                if isinstance(child, str):
+                    parts.append(child)
+                elif child.tag == 'br':
+                    parts.append('\n')
+                elif child.tag not in SKIP_TAGS:
+                    block = child.tag in BLOCK_TAGS
+                    if block:
+                        parts.append('\n')
+                    walk(child)
+                    if block:
+                        parts.append('\n')
+        walk(self)
+        lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node('#document')
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, attrs, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(_Node(tag, attrs, self.current))
+
+    def handle_endtag(self, tag):
+        # 容错：关闭到最近的同名元素，找不到时忽略
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def _compound(step: str):
+    tag, _, classes = step.partition('.')
+    return (tag or None), [c for c in classes.split('.') if c]
+
+
+class HtmlDocument:
+    """静态 HTML 的轻量解析（标准库 html.parser）：支持 `tag`、`.class`、`tag.class` 及后代组合的选择器。"""
+
+    def __init__(self, html: str, url: str = ''):
+        builder = _TreeBuilder()
+        builder.feed(html or '')
+        builder.close()
+        self.root = builder.root
+        self.url = url
+        self.html = html
+
+    def select(self, selector: str) -> list:
+        matches = [self.root]
+        for step in selector.split():
+            tag, classes = _compound(step)
+            found, seen = [], set()
+            for base in matches:
+                for node in base.descendants():
+                    if id(node) in seen:
+                        continue
+                    if (tag is None or node.tag == tag) and all(c in node.classes for c in classes):
+                        seen.add(id(node))
+                        found.append(node)
+            matches = found
+        return matches
+
+    def text(self, selector: str = 'body') -> str:
+        nodes = self.select(selector)
+        return nodes[0].text() if nodes else self.root.text()
+
+    def meta(self, *names) -> list:
+        """name/property 属于 names 的 meta 标签的 content"""
+        return [node.attrs.get('content') or '' for node in self.select('meta')
+                if node.attrs.get('name') in names or node.attrs.get('property') in names]
+
+    def pdf_links(self) -> list:
+        """页面中指向 .pdf 的链接与 iframe（已转为绝对地址，去重并保持顺序）"""
+        links = []
+        for node in self.root.descendants():
+            src = node.attrs.get('href') if node.tag == 'a' else node.attrs.get('src') if node.tag == 'iframe' else None
+            if src and '.pdf' in src.lower():
+                url = urljoin(self.url, src.strip())
+                if url not in links:
+                    links.append(url)
+        return links
+
+
+ABSTRACT_SELECTORS = ['.abstract', '.summary', '.zhaiyao', '.content p', '.detail p', '.article-content p']
+
+
+def extract_abstract_from_html(doc: HtmlDocument):
+    """与 CmcrSite.extract_abstract 相同的规则；找不到时返回 None（交给浏览器渲染后再提取）"""
+    for selector in ABSTRACT_SELECTORS:
+        for node in doc.select(selector):
+            text = node.text().strip()
+            if len(text) > 50:
+                return text
+    for line in doc.text('body').split('\n'):
+        if '摘要' in line and len(line) > 10:
+            return line.strip()
+    return None
+
+
+class HttpFetcher:
+    """不经过浏览器渲染、直接请求详情页与 PDF。
+
+    使用浏览器上下文的 APIRequestContext（context.request）：与页面共享 cookie，并复用连接，
+    浏览器会话通过首页/搜索页拿到 cookie 后即可直接请求。所有请求都经过 HostLimiter，
+    并把响应状态与反爬页面反馈给它（AdaptiveHostLimiter 据此调整速率）。
+    """
+
+    def __init__(self, request, limiter, timeout: float = 30000):
+        self.request = request      # playwright.async_api.APIRequestContext
+        self.limiter = limiter
+        self.timeout = timeout
+
+    async def get(self, url: str):
+        async with self.limiter.slot(url) as slot:
+            resp = await self.request.get(url, timeout=self.timeout)
+            slot.report(resp.status, retry_after=resp.headers.get('retry-after'))
+            return resp
+
+    async def get_document(self, url: str):
+        """请求 HTML 页面，失败、不是 HTML 或是反爬验证页面时返回 None"""
+        try:
+            async with self.limiter.slot(url) as slot:
+                resp = await self.request.get(url, timeout=self.timeout)
+                slot.report(resp.status, retry_after=resp.headers.get('retry-after'))
+                if not resp.ok or 'html' not in resp.headers.get('content-type', 'text/html').lower():
+                    return None
+                html = await resp.text()
+                if looks_blocked_html(html):
+                    slot.report(blocked=True)
+                    return None
+            return HtmlDocument(html, resp.url)
+        except Exception:
+            return None
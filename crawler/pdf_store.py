@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import asyncio
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import urllib.request
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InvalidPdf(Exception):
+    """下载内容不是完整的 PDF（非 PDF、被截断或长度不符）"""
+
+
+def check_pdf(path: str | Path, expected_size: int = None):
+    """校验 PDF：开头 1024 字节内有 %PDF- 头，末尾 2048 字节内有 %%EOF，大小与 Content-Length 一致"""
+    size = os.path.getsize(path)
+    if expected_size is not None and size != expected_size:
+        raise InvalidPdf(f"长度不符: 收到 {size} 字节，Content-Length 为 {expected_size}")
+    with open(path, 'rb') as f:
+        head = f.read(1024)
+        f.seek(max(0, size - 2048))
+        tail = f.read()
+    if b'%PDF-' not in head:
+        raise InvalidPdf(f"不是 PDF（开头为 {head[:16]!r}）")
+    if b'%%EOF' not in tail:
+        raise InvalidPdf("PDF 不完整（缺少 %%EOF 结尾）")
+
+
+class PdfStore:
+    """PDF 存储：流式下载、完整性校验与按内容去重。
+
+    下载内容按块写入临时文件并同时计算 SHA-256，校验通过后原子地重命名为
+    ``objects/<sha256 前两位>/<sha256>.pdf``；同一文章在不同疾病下找到时只存一份，
+    各疾病目录中的目标文件是指向它的硬链接。文件系统不支持硬链接时返回（并在 manifest 中记录）
+    对象文件路径。每次落盘都在 ``manifest.jsonl`` 中追加一条 {path, object, sha256, size, url, time}。
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = 200 * 1024 * 1024, timeout: float = 60):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / 'manifest.jsonl'
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects / sha256[:2] / f"{sha256}.pdf"
+
+    def _temp(self) -> str:
+        fd, tmp = tempfile.mkstemp(suffix='.part', dir=self.objects)
+        os.close(fd)
+        return tmp
+
+    def _place(self, tmp: str, sha256: str, dest: str | Path, url: str = None) -> str:
+        """把校验过的临时文件放入对象库（tmp 为 None 表示对象已在库中），并在 dest 建立硬链接；返回最终可用的路径"""
+        obj = self.object_path(sha256)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if tmp is None:
+                pass
+            elif obj.exists():
+                os.remove(tmp)
+                logger.info(f"PDF 已存在（sha256={sha256[:12]}），不重复保存")
+            else:
+                os.replace(tmp, obj)
+
+            dest = Path(dest)
+            path = str(dest)
+            try:
+                if not (dest.exists() and os.path.samefile(dest, obj)):
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    link_tmp = f"{dest}.link"
+                    if os.path.exists(link_tmp):
+                        os.remove(link_tmp)
+                    os.link(obj, link_tmp)
+                    os.replace(link_tmp, dest)
+            except OSError as e:
+                logger.info(f"无法创建硬链接 {dest}（{e}），使用对象库中的文件 {obj}")
+                path = str(obj)
+
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'path': path, 'object': str(obj), 'sha256': sha256, 'size': obj.stat().st_size,
+                    'url': url, 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                }, ensure_ascii=False) + '\n')
+        return path
+
+    def fetch(self, url: str, dest: str | Path, headers: dict = None) -> str:
+        """流式下载 url 到 dest（阻塞）。校验失败抛出 InvalidPdf，网络错误照常抛出。"""
+        tmp = self._temp()
+        try:
+            digest = hashlib.sha256()
+            request = urllib.request.Request(url, headers=headers or {})
+            with urllib.request.urlopen(request, timeout=self.timeout) as resp, open(tmp, 'wb') as f:
+                length = resp.headers.get('Content-Length')
+                # 压缩传输时 Content-Length 是压缩后的长度，不用于校验
+                expected = int(length) if length and not resp.headers.get('Content-Encoding') else None
+                size = 0
+                while True:
+                    chunk = resp.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise InvalidPdf(f"超过大小上限 {self.max_bytes} 字节")
+                    digest.update(chunk)
+                    f.write(chunk)
+            check_pdf(tmp, expected)
+            return self._place(tmp, digest.hexdigest(), dest, url)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    async def download(self, url: str, dest: str | Path, headers: dict = None) -> str:
+        """fetch 的异步版本（在线程中执行）"""
+        return await asyncio.to_thread(self.fetch, url, dest, headers)
+
+    def temp_path(self) -> str:
+        """浏览器下载（download.save_as）使用的临时文件路径，与对象库在同一文件系统"""
+        return self._temp()
+
+    def add_file(self, tmp: str, dest: str | Path, url: str = None) -> str:
+        """把已下载到 temp_path() 的文件校验并放入对象库，校验失败抛出 InvalidPdf（临时文件会被删除）"""
+        try:
+            check_pdf(tmp)
+            return self._place(tmp, _sha256_file(tmp), dest, url)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def link(self, src: str | Path, dest: str | Path, url: str = None):
+        """把已保存过的 PDF（对象文件或指向它的硬链接，如 CrawlCache 中记录的路径）链接到 dest；
+        src 不存在时返回 None"""
+        if not os.path.exists(src):
+            return None
+        sha256 = _sha256_file(src)
+        if self.object_path(sha256).exists():
+            return self._place(None, sha256, dest, url)
+        # 不在本对象库中（如其他目录的 PdfStore）：复制一份入库
+        tmp = self._temp()
+        shutil.copyfile(src, tmp)
+        return self._place(tmp, sha256, dest, url)
+
+
+def cookie_header(cookies) -> str:
+    """Playwright context.cookies() 的结果转为 Cookie 请求头"""
+    return '; '.join(f"{c['name']}={c['value']}" for c in cookies)
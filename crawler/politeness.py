@@ -0,0 +1,249 @@
+import re
+import json
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 反爬/验证页面的特征文字（出现在页面标题中，或出现在很短的页面正文中）
+ANTI_BOT_MARKERS = ('验证码', '人机验证', '安全验证', '滑动验证', '访问过于频繁', '请求过于频繁', '访问受限', 'captcha')
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.I | re.S)
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower() if url else ''
+
+
+def looks_blocked(title: str = '', text: str = '') -> bool:
+    """是否为反爬/验证页面：标题含特征文字，或正文很短（< 3000 字符）且含特征文字。
+    正常文章页的登录框里也可能有“验证码”，因此不检查长页面的正文。"""
+    title = (title or '').lower()
+    if any(m in title for m in ANTI_BOT_MARKERS):
+        return True
+    return bool(text) and len(text) < 3000 and any(m in text.lower() for m in ANTI_BOT_MARKERS)
+
+
+def looks_blocked_html(html: str) -> bool:
+    match = _TITLE_RE.search(html or '')
+    return looks_blocked(match.group(1) if match else '', html)
+
+
+class Slot:
+    """一次请求的反馈：在 ``async with limiter.slot(url) as slot`` 中调用 report() 说明响应情况。
+    不调用时按耗时判断；块内抛出超时异常视为超时。"""
+
+    __slots__ = ('url', 'started', 'status', 'blocked', 'retry_after')
+
+    def __init__(self, url: str):
+        self.url = url
+        self.started = time.monotonic()
+        self.status = None
+        self.blocked = False
+        self.retry_after = None
+
+    def report(self, status: int = None, blocked: bool = False, retry_after=None):
+        if status is not None:
+            self.status = status
+        self.blocked = self.blocked or blocked
+        if retry_after is not None:
+            try:
+                self.retry_after = float(retry_after)
+            except (TypeError, ValueError):
+                pass
+
+
+class _HostState:
+    def __init__(self, limit: int, interval: float):
+        self.limit = limit
+        self.interval = interval
+        self.active = 0
+        self.waiters = []
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+        # AdaptiveHostLimiter 使用
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.counts = {}
+
+
+class HostLimiter:
+    """按 host 的礼貌限速（所有 worker 共享一个实例）。
+
+    同一 host 同时进行的请求不超过 max_concurrency 个，且相邻两次请求的开始时间至少相隔
+    min_interval 秒；不同 host 之间互不影响。用法::
+
+        async with limiter.slot(url) as slot:
+            resp = await page.goto(url)
+            slot.report(resp.status)
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_concurrency: int = 2):
+        self.min_interval = min_interval
+        self.max_concurrency = max_concurrency
+        self._hosts = {}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.max_concurrency, self.min_interval)
+        return state
+
+    async def _acquire(self, state: _HostState):
+        while state.active >= state.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 已被唤醒却被取消：把名额让给下一个等待者
+                if waiter.done() and not waiter.cancelled():
+                    self._wake(state)
+                raise
+            finally:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+        state.active += 1
+
+    def _wake(self, state: _HostState):
+        free = state.limit - state.active
+        for waiter in list(state.waiters):
+            if free <= 0:
+                break
+            state.waiters.remove(waiter)
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _release(self, state: _HostState):
+        state.active -= 1
+        self._wake(state)
+
+    def _observe(self, host: str, state: _HostState, slot: Slot, error: BaseException = None):
+        """请求结束后的反馈（固定限速时不做处理）"""
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = host_of(url)
+        state = self._state(host)
+        await self._acquire(state)
+        try:
+            async with state.lock:
+                wait = state.next_start - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                state.next_start = time.monotonic() + state.interval
+            slot = Slot(url)
+            try:
+                yield slot
+            except BaseException as e:
+                self._observe(host, state, slot, e)
+                raise
+            self._observe(host, state, slot)
+        finally:
+            self._release(state)
+
+
+def _is_timeout(error: BaseException) -> bool:
+    # playwright 的 TimeoutError 不是内置 TimeoutError 的子类；urllib 的超时包在 URLError.reason 中
+    return (isinstance(error, TimeoutError) or type(error).__name__ == 'TimeoutError'
+            or isinstance(getattr(error, 'reason', None), TimeoutError))
+
+
+class AdaptiveHostLimiter(HostLimiter):
+    """按 host 的 AIMD 自适应限速。
+
+    每个 host 从 (min_interval, max_concurrency) 开始：
+    - 连续 increase_after 个请求都在 slow_after 秒内正常返回时，加性增加：请求速率（1/间隔）增加 rate_step 次/秒，
+      并发上限加 1（分别不超过 1/floor_interval 与 max_limit）；
+    - 超时、HTTP 403/429/5xx 或反爬页面时，乘性减少：间隔除以 backoff（不超过 max_interval）、并发上限乘以 backoff（不低于 1）；
+      同一次拥塞中已在进行的请求不再重复减少。带 Retry-After 时按其暂停，反爬页面额外暂停 blocked_cooldown 秒；
+    - 响应慢但正常，或其他 4xx（如 404）时保持不变，也不计入连续正常的请求数。
+
+    每次调整都以 JSON 行追加到 log_path（如有），便于之后调参。
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_concurrency: int = 2, floor_interval: float = 0.2,
+                 max_interval: float = 60.0, max_limit: int = 8, slow_after: float = 8.0, increase_after: int = 5,
+                 rate_step: float = 0.2, backoff: float = 0.5, blocked_cooldown: float = 60.0, log_path=None):
+        super().__init__(min_interval, max_concurrency)
+        self.floor_interval = floor_interval
+        self.max_interval = max_interval
+        self.max_limit = max(max_limit, max_concurrency)
+        self.slow_after = slow_after
+        self.increase_after = increase_after
+        self.rate_step = rate_step
+        self.backoff = backoff
+        self.blocked_cooldown = blocked_cooldown
+        self.log_path = log_path
+
+    def _classify(self, slot: Slot, error: BaseException, latency: float):
+        """返回 (信号, 原因)：信号为 increase / decrease / hold / ignore"""
+        if slot.blocked:
+            return 'decrease', 'blocked'
+        if slot.status is not None and (slot.status in (403, 429) or slot.status >= 500):
+            # 403 通常是反爬拦截，429/5xx（含 503）表示服务端过载
+            return 'decrease', f'http_{slot.status}'
+        if slot.status is not None and slot.status >= 400:
+            return 'hold', f'http_{slot.status}'
+        if error is not None:
+            return ('decrease', 'timeout') if _is_timeout(error) else ('ignore', type(error).__name__)
+        if latency > self.slow_after:
+            return 'hold', 'slow'
+        return 'increase', 'ok'
+
+    def _observe(self, host: str, state: _HostState, slot: Slot, error: BaseException = None):
+        now = time.monotonic()
+        latency = now - slot.started
+        signal, reason = self._classify(slot, error, latency)
+        state.counts[reason] = state.counts.get(reason, 0) + 1
+
+        if signal == 'increase':
+            state.successes += 1
+            if state.successes < self.increase_after:
+                return
+            state.successes = 0
+            interval = max(self.floor_interval, 1.0 / (1.0 / state.interval + self.rate_step))
+            limit = min(self.max_limit, state.limit + 1)
+            if (interval, limit) == (state.interval, state.limit):
+                return
+            state.interval, state.limit = interval, limit
+            self._wake(state)
+            self._record(host, state, 'increase', reason, latency, slot.status)
+        elif signal == 'decrease':
+            state.successes = 0
+            pause = slot.retry_after or (self.blocked_cooldown if reason == 'blocked' else 0)
+            if pause:
+                state.next_start = max(state.next_start, now + pause)
+            # 本次拥塞前就已发出的请求不再重复减少
+            if slot.started < state.last_decrease:
+                return
+            state.last_decrease = now
+            state.interval = min(self.max_interval, state.interval / self.backoff)
+            state.limit = max(1, int(state.limit * self.backoff))
+            self._record(host, state, 'decrease', reason, latency, slot.status, pause)
+        elif signal == 'hold':
+            state.successes = 0
+
+    def _record(self, host, state, action, reason, latency, status, pause=0):
+        decision = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'host': host,
+            'action': action,
+            'reason': reason,
+            'latency': round(latency, 3),
+            'status': status,
+            'interval': round(state.interval, 3),
+            'limit': state.limit,
+            'pause': pause,
+        }
+        logger.info(f"限速调整 {host}: {action}（{reason}）→ 间隔 {decision['interval']}s，并发 {state.limit}")
+        if self.log_path:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(decision, ensure_ascii=False) + '\n')
+
+    def stats(self) -> dict:
+        """各 host 当前的间隔、并发上限与各类响应的计数"""
+        return {host: {'interval': round(s.interval, 3), 'limit': s.limit, **s.counts} for host, s in self._hosts.items()}
@@ -0,0 +1,138 @@
+import json
+import argparse
+import datetime
+from pathlib import Path
+
+# 每条记录的字段
+FIELDS = (
+    'site', 'disease_id', 'disease', 'rank', 'title', 'abstract', 'url', 'source_url',
+    'pdf_file', 'txt_file', 'cached', 'fetched_at', 'crawled_at',
+)
+
+
+def now_iso() -> str:
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class RecordStore:
+    """结构化的爬取结果（JSONL 分片）。
+
+    每条搜索结果处理完成后追加一行 JSON（字段见 FIELDS），写入 ``{root}/{prefix}-00000.jsonl``，
+    每个分片满 shard_size 行后换下一个分片。每行写完立即 flush，进程中断时最多丢失正在写的一行。
+    同一结果重新处理时会再追加一条，读取时用 iter_records(latest=True) 只保留最新的一条。
+    """
+
+    def __init__(self, root: str | Path, prefix: str = 'records', shard_size: int = 5000):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self._file = None
+        shards = sorted(self.root.glob(f"{prefix}-*.jsonl"))
+        self._index = int(shards[-1].stem.rsplit('-', 1)[1]) if shards else 0
+        self._lines = self._count(shards[-1]) if shards else 0
+
+    @staticmethod
+    def _count(path: Path) -> int:
+        with open(path, 'rb') as f:
+            return sum(1 for _ in f)
+
+    def shard_path(self, index: int) -> Path:
+        return self.root / f"{self.prefix}-{index:05d}.jsonl"
+
+    def append(self, record: dict):
+        if self._lines >= self.shard_size:
+            self.close()
+            self._index += 1
+            self._lines = 0
+        if self._file is None:
+            self._file = open(self.shard_path(self._index), 'a', encoding='utf-8')
+        record = {field: record.get(field) for field in FIELDS}
+        record['crawled_at'] = record['crawled_at'] or now_iso()
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._lines += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _shards(paths):
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            yield from sorted(path.rglob('*.jsonl'))
+        else:
+            yield path
+
+
+def iter_records(*paths, latest: bool = True):
+    """依次读取 paths（分片文件或目录，目录下递归查找 *.jsonl）中的记录。
+
+    latest=True 时同一结果（site, disease_id, rank, 所在目录）只保留最后写入的一条（需要先读完全部记录）；
+    latest=False 时流式读取全部记录。
+    """
+    if not latest:
+        for shard in _shards(paths):
+            with open(shard, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        return
+
+    records = {}
+    for shard in _shards(paths):
+        with open(shard, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (str(shard.parent), record.get('site'), record.get('disease_id'), record.get('rank'))
+                records.pop(key, None)
+                records[key] = record
+    yield from records.values()
+
+
+def export_txt(records, site, overwrite: bool = False) -> int:
+    """按网站原来的目录结构、文件名与格式（site.disease_dir / file_stem / format_txt）导出 TXT，返回写入的文件数"""
+    written = 0
+    for record in records:
+        disease = {'id': record['disease_id'], 'name': record['disease']}
+        save_dir = site.disease_dir(disease)
+        txt_path = save_dir / f"{site.file_stem(disease, record['title'])}.txt"
+        if txt_path.exists() and not overwrite:
+            continue
+        save_dir.mkdir(parents=True, exist_ok=True)
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            f.write(site.format_txt(disease, record['title'], record['abstract'], record['url']))
+        written += 1
+    return written
+
+
+def main():
+    from sites import SITES
+
+    parser = argparse.ArgumentParser(description='爬取结果（JSONL 分片）的统计与 TXT 导出')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_export = sub.add_parser('export', help='导出为原来的 TXT 文件（兼容旧的下游流程）')
+    p_export.add_argument('save_dir', help='网站的输出目录，如 paper/part1/website1（读取其中的 records/）')
+    p_export.add_argument('--site', choices=sorted(SITES), required=True, help='按哪个网站的文件名与格式导出')
+    p_export.add_argument('--overwrite', action='store_true', help='覆盖已存在的 TXT 文件')
+    p_stats = sub.add_parser('stats', help='统计记录数')
+    p_stats.add_argument('paths', nargs='+', help='分片文件或目录（递归查找 *.jsonl）')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        site = SITES[args.site](args.save_dir)
+        records = [r for r in iter_records(Path(args.save_dir) / 'records') if r.get('site') == site.SITE]
+        print(f"导出 {export_txt(records, site, overwrite=args.overwrite)} 个 TXT 文件（共 {len(records)} 条记录）")
+    else:
+        records = list(iter_records(*args.paths))
+        with_pdf = sum(1 for r in records if r.get('pdf_file'))
+        print(f"{len(records)} 条记录，其中 {with_pdf} 条有 PDF")
+
+
+if __name__ == '__main__':
+    main()
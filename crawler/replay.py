@@ -0,0 +1,324 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from http_fetch import HtmlDocument
+from records import now_iso
+from sites import SITES, SiteAdapter
+
+logger = logging.getLogger(__name__)
+
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.I | re.S)
+
+
+class SnapshotRecorder:
+    """爬取时保存页面快照，供离线回放（ReplayServer）与基准测试（bench）使用。
+
+    每个页面的 HTML 保存为 ``{root}/pages/{sha1(url)}.html``，并在 ``{root}/index.jsonl`` 追加一行：
+    site、kind（search / detail / detail_html）、url、file，以及当时提取到的结果 expected，
+    回放时据此发现选择器的回归。保存失败只记录日志，不影响爬取。
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        (self.root / 'pages').mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / 'index.jsonl'
+
+    def save(self, site: str, kind: str, url: str, html: str, expected: dict = None):
+        try:
+            name = hashlib.sha1(f"{kind} {url}".encode('utf-8')).hexdigest()
+            path = self.root / 'pages' / f"{name}.html"
+            path.write_text(html, encoding='utf-8')
+            entry = {'site': site, 'kind': kind, 'url': url, 'file': f"pages/{name}.html",
+                     'expected': expected or {}, 'saved_at': now_iso()}
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.warning(f"保存页面快照失败 {url}: {e}")
+
+    async def save_page(self, site: str, kind: str, page, expected: dict = None):
+        """保存渲染后的页面（page.content()）"""
+        try:
+            html = await page.content()
+        except Exception as e:
+            logger.warning(f"读取页面内容失败 {page.url}: {e}")
+            return
+        self.save(site, kind, page.url, html, expected)
+
+
+def load_snapshots(root: str | Path) -> list:
+    """读取 index.jsonl；同一 (site, kind, url) 只保留最后保存的一条"""
+    root = Path(root)
+    entries = {}
+    with open(root / 'index.jsonl', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry['path'] = root / entry['file']
+            entries[(entry['site'], entry['kind'], entry['url'])] = entry
+    return [e for e in entries.values() if e['path'].exists()]
+
+
+def _request_path(entry: dict) -> str:
+    """快照在回放服务器上的路径：/{kind}/{原 host}{原路径}?{原查询参数}，不同网站、不同种类的快照互不覆盖"""
+    parts = urlsplit(entry['url'])
+    query = f"?{parts.query}" if parts.query else ''
+    return f"/{entry['kind']}/{parts.netloc.lower()}{parts.path or '/'}{query}"
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.server.pages.get(self.path)
+        if path is None:
+            self.send_error(404)
+            return
+        body = path.read_bytes()
+        if self.server.strip_scripts:
+            body = _SCRIPT_RE.sub('', body.decode('utf-8')).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class ReplayServer:
+    """在本机回放快照，路径为 /{kind}/{原 host}{原路径}?{原查询参数}::
+
+        with ReplayServer('snapshots') as server:
+            await page.goto(server.url_for(entry))
+
+    快照是渲染后的 DOM，默认去掉其中的 <script>，避免页面脚本重新渲染或访问外网；
+    strip_scripts=False 时原样返回。port=0 表示使用任意空闲端口。
+    """
+
+    def __init__(self, root: str | Path, host: str = '127.0.0.1', port: int = 0, strip_scripts: bool = True):
+        self.snapshots = load_snapshots(root)
+        self.httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self.httpd.pages = {_request_path(e): e['path'] for e in self.snapshots}
+        self.httpd.strip_scripts = strip_scripts
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, entry: dict) -> str:
+        """load_snapshots 返回的一条快照在回放服务器上的地址"""
+        return self.base_url + _request_path(entry)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- 基准测试 ---
+
+class StepTimer:
+    """按步骤记录耗时（秒）"""
+
+    def __init__(self):
+        self.times = {}
+
+    def add(self, step: str, seconds: float):
+        self.times.setdefault(step, []).append(seconds)
+
+    def summary(self) -> dict:
+        result = {}
+        for step, times in self.times.items():
+            ordered = sorted(times)
+            total = sum(ordered)
+            result[step] = {
+                'count': len(ordered),
+                'pages_per_sec': round(len(ordered) / total, 1) if total else None,
+                'mean_ms': round(total / len(ordered) * 1000, 2),
+                'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+            }
+        return result
+
+
+def _mismatch(entry, field, got):
+    expected = entry['expected'].get(field)
+    if expected is None or expected == got:
+        return None
+    return {'site': entry['site'], 'kind': entry['kind'], 'url': entry['url'], 'field': field,
+            'expected': expected, 'got': got}
+
+
+def bench_static(snapshots, sites, timer: StepTimer, repeat: int = 1) -> list:
+    """不经浏览器：HtmlDocument 解析与 extract_detail_html（直接请求详情页时的提取），返回不一致的结果。
+    没有实现 extract_detail_html 的网站只计时解析。"""
+    mismatches = []
+    for entry in snapshots:
+        if entry['kind'] not in ('detail', 'detail_html'):
+            continue
+        site = sites[entry['site']]
+        static = type(site).extract_detail_html is not SiteAdapter.extract_detail_html
+        html = entry['path'].read_text(encoding='utf-8')
+        for i in range(repeat):
+            start = time.perf_counter()
+            doc = HtmlDocument(html, entry['url'])
+            parsed = time.perf_counter()
+            timer.add(f"{site.SITE}.html_parse", parsed - start)
+            if static:
+                extracted = site.extract_detail_html(doc, {'url': entry['url'], 'title': None})
+                timer.add(f"{site.SITE}.extract_detail_html", time.perf_counter() - parsed)
+        # 只有直接请求时保存的快照与 extract_detail_html 的规则相同
+        if static and entry['kind'] == 'detail_html':
+            mismatch = _mismatch(entry, 'abstract', extracted[1] if extracted else None)
+            if mismatch:
+                mismatches.append(mismatch)
+    return mismatches
+
+
+async def bench_browser(snapshots, sites, timer: StepTimer, root, repeat: int = 1, browser_path=None) -> list:
+    """在浏览器中打开本机回放的快照，计时 goto、list_results 与 extract_detail，返回不一致的结果。
+    只放行回放服务器的请求，其余一律拦截，整个过程不访问外网。"""
+    from playwright.async_api import async_playwright
+    from engine import CrawlEngine
+
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer(root) as server:
+        # 只借用引擎的 wait_for_selector 等辅助方法（不限速），不运行爬取
+        engine = CrawlEngine([], min_interval=0, adaptive_rate=False, block_resources=False, direct_fetch=False,
+                             pdf_store_dir=Path(tmp) / 'pdf_store', cache_path=Path(tmp) / 'crawl_cache.db')
+        engine.default_navigation_timeout = engine.default_action_timeout = 5000
+
+        async def offline(route):
+            if route.request.url.startswith(server.base_url):
+                await route.continue_()
+            else:
+                await route.abort()
+
+        try:
+            async with async_playwright() as p:
+                launch_kwargs = {'headless': True}
+                if browser_path:
+                    launch_kwargs['executable_path'] = browser_path
+                browser = await p.chromium.launch(**launch_kwargs)
+                try:
+                    context = await browser.new_context()
+                    await context.route('**/*', offline)
+                    page = await context.new_page()
+                    for entry in snapshots:
+                        if entry['kind'] not in ('search', 'detail'):
+                            continue
+                        site = sites[entry['site']]
+                        expected_results = entry['expected'].get('results')
+                        for i in range(repeat):
+                            start = time.perf_counter()
+                            await page.goto(server.url_for(entry), wait_until='domcontentloaded')
+                            loaded = time.perf_counter()
+                            timer.add(f"{site.SITE}.goto", loaded - start)
+                            if entry['kind'] == 'search':
+                                results = await site.list_results(engine, page, len(expected_results or ()) or 2)
+                                timer.add(f"{site.SITE}.list_results", time.perf_counter() - loaded)
+                            else:
+                                title, abstract = await site.extract_detail(engine, page, {'url': entry['url'], 'title': None})
+                                timer.add(f"{site.SITE}.extract_detail", time.perf_counter() - loaded)
+                        if entry['kind'] == 'search':
+                            checks = [_mismatch(entry, 'results', [r['title'] for r in results])]
+                        else:
+                            checks = [_mismatch(entry, 'title', title), _mismatch(entry, 'abstract', abstract)]
+                        mismatches.extend(m for m in checks if m)
+                finally:
+                    await browser.close()
+        finally:
+            # 在删除临时目录前关闭引擎打开的 SQLite 连接
+            engine.close()
+    return mismatches
+
+
+def bench(root, browser: bool = False, repeat: int = 3, browser_path=None):
+    """对快照运行基准测试，返回 (各步骤耗时统计, 不一致的结果)"""
+    if repeat < 1:
+        raise ValueError(f"repeat 必须 >= 1: {repeat}")
+    snapshots = load_snapshots(root)
+    timer = StepTimer()
+    with tempfile.TemporaryDirectory() as tmp:
+        sites = {name: cls(Path(tmp) / name) for name, cls in SITES.items()}
+        mismatches = bench_static(snapshots, sites, timer, repeat)
+        if browser:
+            mismatches += asyncio.run(bench_browser(snapshots, sites, timer, root, repeat, browser_path))
+    return timer.summary(), mismatches
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"必须 >= 1: {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回放爬取时保存的页面快照，并测试解析的速度与结果')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_serve = sub.add_parser('serve', help='在本机回放快照')
+    p_serve.add_argument('snapshot_dir', help='快照目录（engine.py --snapshot-dir 保存的目录）')
+    p_serve.add_argument('--port', type=int, default=8765)
+    p_serve.add_argument('--keep-scripts', action='store_true', help='保留页面中的 <script>')
+    p_bench = sub.add_parser('bench', help='基准测试：各步骤每秒页面数与耗时，并与快照时的提取结果比较')
+    p_bench.add_argument('snapshot_dir', help='快照目录')
+    p_bench.add_argument('--browser', action='store_true', help='同时在浏览器中测试 list_results 与 extract_detail（需要 Playwright）')
+    p_bench.add_argument('--browser-path', default=None, help='Chromium 可执行文件路径')
+    p_bench.add_argument('--repeat', type=_positive_int, default=3, help='每个快照重复的次数')
+    p_bench.add_argument('--json', default=None, help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == 'serve':
+        server = ReplayServer(args.snapshot_dir, port=args.port, strip_scripts=not args.keep_scripts)
+        print(f"回放 {len(server.snapshots)} 个快照: {server.base_url}（Ctrl+C 结束）")
+        for entry in server.snapshots:
+            print(f"  [{entry['site']}/{entry['kind']}] {server.url_for(entry)}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+        return
+
+    summary, mismatches = bench(args.snapshot_dir, browser=args.browser, repeat=args.repeat,
+                                browser_path=args.browser_path)
+    print(f"{'步骤':<32}{'次数':>6}{'页/秒':>10}{'平均ms':>10}{'p50ms':>10}{'p95ms':>10}")
+    for step, s in sorted(summary.items()):
+        print(f"{step:<32}{s['count']:>6}{s['pages_per_sec'] or '-':>10}{s['mean_ms']:>10}{s['p50_ms']:>10}{s['p95_ms']:>10}")
+    for m in mismatches:
+        print(f"结果不一致 [{m['site']}/{m['kind']}] {m['url']} {m['field']}: "
+              f"{str(m['expected'])[:60]!r} -> {str(m['got'])[:60]!r}")
+    print(f"{len(mismatches)} 处结果与快照时不一致")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'steps': summary, 'mismatches': mismatches}, f, ensure_ascii=False, indent=2)
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
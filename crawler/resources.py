@@ -0,0 +1,67 @@
+from urllib.parse import urlsplit
+
+# 对提取结果没有影响的资源类型。样式表会影响元素可见性（下载按钮的 is_visible 判断），默认不拦截
+DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font')
+
+# 统计/广告/跟踪脚本的 host（按后缀匹配）
+DEFAULT_BLOCKED_HOSTS = (
+    'hm.baidu.com',
+    'cnzz.com',
+    'umeng.com',
+    '51.la',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'growingio.com',
+    'sensorsdata.cn',
+    'zhugeio.com',
+    'mediav.com',
+)
+
+
+def _matches(host: str, suffixes) -> bool:
+    return any(host == s or host.endswith('.' + s) for s in suffixes)
+
+
+class ResourcePolicy:
+    """页面资源拦截规则。
+
+    Args:
+        blocked_types: 拦截的资源类型（Playwright request.resource_type），如 image/media/font/stylesheet。
+        blocked_hosts: 拦截的第三方 host 后缀（统计、广告等）。
+        allowed_hosts: 不为 None 时只放行这些 host 后缀（如 ('yiigle.com',)），其余第三方请求全部拦截。
+    """
+
+    def __init__(self, blocked_types=DEFAULT_BLOCKED_TYPES, blocked_hosts=DEFAULT_BLOCKED_HOSTS, allowed_hosts=None):
+        self.blocked_types = set(blocked_types or ())
+        self.blocked_hosts = tuple(blocked_hosts or ())
+        self.allowed_hosts = tuple(allowed_hosts) if allowed_hosts else None
+        self.blocked = 0
+        self.allowed = 0
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        # 文档与下载请求始终放行
+        if resource_type == 'document':
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        host = urlsplit(url).hostname or ''
+        if _matches(host, self.blocked_hosts):
+            return True
+        return self.allowed_hosts is not None and not _matches(host, self.allowed_hosts)
+
+    def handle(self, route, request):
+        # 同时用于同步与异步 API：异步 API 会 await 处理函数返回的协程，同步 API 忽略返回值
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            return route.abort()
+        self.allowed += 1
+        return route.continue_()
+
+
+def install_resource_blocking(context, policy: ResourcePolicy = None):
+    """在浏览器上下文上安装拦截规则（context 可为同步或异步 API 的 BrowserContext）；
+    异步 API 下返回的协程需要 await。policy 为 None 时使用默认规则。"""
+    policy = policy or ResourcePolicy()
+    return context.route('**/*', policy.handle)
@@ -0,0 +1,622 @@
+import re
+import logging
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from http_fetch import extract_abstract_from_html
+
+logger = logging.getLogger(__name__)
+
+
+def _sanitize_windows_path_component(name: str) -> str:
+    """Sanitize a string for use as a Windows file/folder name component."""
+    if name is None:
+        return "unknown"
+
+    cleaned = str(name).replace("\ufeff", "").strip()
+    # Remove control chars
+    cleaned = re.sub(r"[\x00-\x1f]", "", cleaned)
+
+    # Replace path separators with underscore to preserve readability
+    cleaned = cleaned.replace("/", "_").replace("\\", "_")
+    # Remove other illegal characters
+    cleaned = cleaned.replace("?", "").replace("*", "")
+    cleaned = cleaned.replace('"', "").replace("<", "").replace(">", "")
+    cleaned = cleaned.replace(":", "_").replace("|", "_")
+
+    # Collapse runs of underscores/spaces
+    cleaned = re.sub(r"[ _]{2,}", "_", cleaned)
+
+    # Windows doesn't like trailing dots/spaces
+    cleaned = cleaned.strip().strip(".").strip()
+    cleaned = cleaned.rstrip(". ")
+
+    return cleaned or "unknown"
+
+
+class SiteAdapter:
+    """网站适配器：CrawlEngine 通过它完成一个网站上的搜索、列出结果、提取详情与定位 PDF。
+
+    并发、限速、断点续爬、缓存与 PDF 存储都由引擎负责，适配器只包含页面相关的逻辑（选择器、点击流程）
+    与输出文件的命名/格式。所有方法都使用 playwright.async_api 的页面；engine 参数提供
+    goto / wait_for_selector / safe_wait_for_load_state 等带限速与超时回退的辅助方法。
+    """
+
+    # frontier 与缓存中的网站标识
+    SITE = None
+    HOME_URL = None
+    # 详情页只能在搜索页点击打开：每次都要重新搜索，结果依次处理
+    OPENS_DETAIL_BY_CLICK = False
+    # 静态 HTML 中出现这些文字时，PDF 可能需要在浏览器中点击下载
+    DOWNLOAD_BUTTON_TEXTS = ()
+    # 本网站错误记录的文件名（位于 save_dir）
+    ERRORS_FILE = 'errors.csv'
+
+    def __init__(self, save_dir: str | Path):
+        self.save_dir = Path(save_dir)
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+
+    # --- 输出文件 ---
+
+    def disease_dir(self, disease) -> Path:
+        """疾病的输出目录：{id}_{疾病名}"""
+        return self.save_dir / f"{disease['id']}_{_sanitize_windows_path_component(disease['name'])}"
+
+    def file_stem(self, disease, title) -> str:
+        """TXT/PDF 的文件名（不含扩展名）"""
+        raise NotImplementedError
+
+    def format_txt(self, disease, title, abstract, url) -> str:
+        raise NotImplementedError
+
+    def on_detail_failed(self, disease, link, error):
+        """详情页处理失败时的附加处理（如保存只有题目的基本信息）"""
+
+    # --- 页面 ---
+
+    async def search(self, engine, page, disease_name) -> bool:
+        """在 page 上搜索疾病，返回是否成功（无结果也算成功）"""
+        raise NotImplementedError
+
+    async def list_results(self, engine, page, max_results) -> list:
+        """当前搜索页的前 max_results 个结果：[{'url', 'title', 'text'}]，url 可能为 None"""
+        raise NotImplementedError
+
+    async def open_detail(self, engine, context, search_page, link):
+        """打开一条结果的详情页，返回新页面"""
+        detail_page = await context.new_page()
+        try:
+            await engine.goto(detail_page, link['url'])
+            await detail_page.wait_for_load_state('domcontentloaded')
+        except BaseException:
+            await detail_page.close()
+            raise
+        return detail_page
+
+    async def extract_detail(self, engine, page, link):
+        """从渲染后的详情页提取 (题目, 摘要)；题目为 None 时使用搜索结果中的题目"""
+        raise NotImplementedError
+
+    def extract_detail_html(self, doc, link):
+        """从静态 HTML（HtmlDocument）提取 (题目, 摘要)；返回 None 表示需要浏览器渲染"""
+        return None
+
+    async def pdf_urls(self, page) -> list:
+        """渲染后页面中直接指向 PDF 的链接与 iframe（绝对地址）"""
+        urls = []
+        for a in await page.locator('a').all():
+            try:
+                href = await a.get_attribute('href')
+            except Exception:
+                continue
+            if href and '.pdf' in href.lower():
+                urls.append(urljoin(page.url, href.strip()))
+        for frame in page.frames:
+            if frame.url and '.pdf' in frame.url.lower():
+                urls.append(urljoin(page.url, frame.url))
+        return list(dict.fromkeys(urls))
+
+    async def click_download(self, engine, page):
+        """点击页面上的下载按钮，返回 playwright Download；没有可用的下载入口时返回 None"""
+        return None
+
+
+class CmcrSite(SiteAdapter):
+    """中华医学期刊全文数据库病例库（cmcr.yiigle.com）。
+
+    搜索结果中带有 cmaid 的全文链接可以直接访问，详情页优先不经浏览器直接请求。
+    """
+
+    SITE = 'cmcr'
+    HOME_URL = 'https://cmcr.yiigle.com/index'
+    # 页面就绪的标志元素，取代固定的 wait_for_timeout
+    SEARCH_BOX_SELECTOR = 'role=textbox[name="输入主题、疾病名称、文献标题、作者"]'
+    RESULT_SELECTOR = '.w_search_item, .no-result, .empty-result, .no-data'
+    ABSTRACT_SELECTOR = '.abstract, .summary, .zhaiyao, .content p, .detail p, .article-content p'
+    NO_RESULT_SELECTORS = (
+        'text=未找到', 'text=无结果', 'text=没有找到', 'text=No results', 'text=暂无数据',
+        '.no-result', '.empty-result', '.no-data',
+    )
+    DOWNLOAD_BUTTON_TEXTS = ('PDF下载', '下载PDF', '下载全文', '查看PDF', '全文下载')
+
+    def file_stem(self, disease, title) -> str:
+        safe_title = _sanitize_windows_path_component(title.replace(' ', '_'))
+        return f"{_sanitize_windows_path_component(disease['name'])}_{safe_title}"
+
+    def format_txt(self, disease, title, abstract, url) -> str:
+        return f"题目: {title}\n\n摘要: {abstract}\n"
+
+    async def search(self, engine, page, disease_name) -> bool:
+        await engine.goto(page, self.HOME_URL)
+        await engine.wait_for_selector(page, self.SEARCH_BOX_SELECTOR)
+
+        search_box = page.get_by_role("textbox", name="输入主题、疾病名称、文献标题、作者")
+        await search_box.clear()
+        await search_box.fill(disease_name)
+        async with engine.limiter.slot(page.url):
+            await search_box.press("Enter")
+            # 出现结果项即可提取；无结果时再等待网络空闲，确认确实没有结果
+            found = await engine.wait_for_selector(page, self.RESULT_SELECTOR)
+            if found and await page.locator('.w_search_item').count() == 0:
+                await engine.safe_wait_for_load_state(page, "networkidle")
+        return True
+
+    async def list_results(self, engine, page, max_results) -> list:
+        for selector in self.NO_RESULT_SELECTORS:
+            if await page.locator(selector).count() > 0:
+                logger.info("无搜索结果")
+                return []
+
+        links = []
+        result_items = await page.locator('.w_search_item').all()
+        logger.info(f"找到 {len(result_items)} 个可能的结果项 (选择器: .w_search_item)")
+        for i, item in enumerate(result_items[:max_results]):
+            try:
+                title_elem = item.locator('h1 a').first
+                if await title_elem.count() > 0:
+                    title = (await title_elem.inner_text())[:150].strip()
+                else:
+                    title_text = item.locator('h1').first
+                    if await title_text.count() > 0:
+                        title = (await title_text.inner_text())[:150].strip()
+                    else:
+                        title = f"结果_{i+1}"
+
+                fulltext_elem = item.locator('a[href*="cmaid"]').first
+                if await fulltext_elem.count() > 0:
+                    href = await fulltext_elem.get_attribute('href')
+                    if href:
+                        if not href.startswith('http'):
+                            if href.startswith('/'):
+                                href = f"https://rs.yiigle.com{href}"
+                            elif 'cmaid' in href:
+                                href = f"https://rs.yiigle.com/{href}"
+                        links.append({'url': href, 'title': title, 'text': title})
+            except Exception:
+                continue
+        return links
+
+    async def extract_abstract(self, page):
+        """从详情页提取摘要"""
+        try:
+            abstract_selectors = [
+                '.abstract',
+                '.summary',
+                '.zhaiyao',
+                '.content p',
+                '.detail p',
+                '.article-content p'
+            ]
+
+            for selector in abstract_selectors:
+                try:
+                    for elem in await page.locator(selector).all():
+                        text = (await elem.inner_text()).strip()
+                        if len(text) > 50:
+                            return text
+                except Exception:
+                    continue
+
+            try:
+                main_content = await page.locator('body').inner_text()
+                for line in main_content.split('\n'):
+                    if '摘要' in line and len(line) > 10:
+                        return line.strip()
+            except Exception:
+                pass
+
+            return "未找到摘要"
+
+        except Exception as e:
+            return f"提取摘要失败: {str(e)}"
+
+    async def extract_detail(self, engine, page, link):
+        await engine.wait_for_selector(page, self.ABSTRACT_SELECTOR)
+        return None, await self.extract_abstract(page)
+
+    def extract_detail_html(self, doc, link):
+        abstract = extract_abstract_from_html(doc)
+        return None if abstract is None else (None, abstract)
+
+    async def click_download(self, engine, page):
+        for text in self.DOWNLOAD_BUTTON_TEXTS:
+            try:
+                elems = page.get_by_text(text)
+                for idx in range(await elems.count()):
+                    try:
+                        async with page.expect_download(timeout=20000) as download_info:
+                            await elems.nth(idx).click()
+                        return await download_info.value
+                    except Exception:
+                        continue
+            except Exception:
+                continue
+        return None
+
+
+# 搜索结果已更新（首条结果与搜索前不同），或页面显示无结果
+_RESULTS_CHANGED_JS = """([selector, previous, noResultTexts]) => {
+    const first = document.querySelector(selector);
+    if (first) return first.innerText !== previous;
+    const text = document.body ? document.body.innerText : '';
+    return noResultTexts.some(t => text.includes(t));
+}"""
+
+
+class YiigleSite(SiteAdapter):
+    """中华医学期刊全文数据库（www.yiigle.com）。
+
+    详情页只能在搜索页点击后以弹出窗口打开，因此每次都重新搜索，结果依次处理。
+    """
+
+    SITE = 'www'
+    HOME_URL = 'https://www.yiigle.com/index'
+    OPENS_DETAIL_BY_CLICK = True
+    ERRORS_FILE = 'errors_crawler2.csv'
+    # 页面就绪的标志元素，取代固定的 wait_for_timeout
+    SEARCH_BOX_SELECTOR = 'role=textbox[name="主题/文题/作者/刊名"]'
+    RESULT_SELECTOR = '.s_searchResult_li'
+    NO_RESULT_TEXTS = ['没有找到', '未找到', '无结果', '0 条结果']
+    DETAIL_SELECTOR = 'h1, .article-title, .abstract, .abstract-content, .article-abstract, [class*="abstract"]'
+    DOWNLOAD_SELECTOR = ':text("PDF下载"), :text("下载PDF"), .iconfont.icon-google-drive-pdf-file'
+
+    def file_stem(self, disease, title) -> str:
+        safe_disease_name = _sanitize_windows_path_component(disease['name'])
+        return f"{disease['id']}_{safe_disease_name}_{_sanitize_windows_path_component(title)}"
+
+    def format_txt(self, disease, title, abstract, url) -> str:
+        return (
+            f"疾病名称: {disease['name']}\n"
+            f"疾病ID: {disease['id']}\n"
+            f"题目: {title}\n"
+            f"摘要: {abstract}\n"
+            f"来源URL: {url}\n"
+            f"提取时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        )
+
+    def on_detail_failed(self, disease, link, error):
+        """无法打开详情页时仍保存题目与错误信息"""
+        try:
+            safe_title_basic = _sanitize_windows_path_component(link.get('title') or 'untitled')
+            safe_disease_name = _sanitize_windows_path_component(disease['name'])
+            txt_path = self.disease_dir(disease) / f"{disease['id']}_{safe_disease_name}_{safe_title_basic}_basic.txt"
+            with open(txt_path, 'w', encoding='utf-8') as f:
+                f.write(f"疾病名称: {disease['name']}\n")
+                f.write(f"疾病ID: {disease['id']}\n")
+                f.write(f"题目: {link.get('title')}\n")
+                f.write(f"状态: 无法访问详情页\n")
+                f.write(f"错误: {str(error)[:200]}\n")
+            logger.info(f"已保存基本信息文件: {txt_path}")
+        except Exception:
+            pass
+
+    async def _first_result_text(self, page):
+        try:
+            first = page.locator(self.RESULT_SELECTOR).first
+            return await first.inner_text(timeout=1000) if await first.count() > 0 else None
+        except Exception:
+            return None
+
+    async def search(self, engine, page, disease_name) -> bool:
+        logger.info(f"正在搜索疾病: {disease_name}")
+        # 搜索页会复用：只有不在本站时才打开首页
+        if urlsplit(page.url).hostname != urlsplit(self.HOME_URL).hostname:
+            await engine.goto(page, self.HOME_URL, wait_until='domcontentloaded')
+
+        await engine.wait_for_selector(page, self.SEARCH_BOX_SELECTOR)
+        # 记录当前首条结果，用于判断新的搜索结果已渲染
+        previous = await self._first_result_text(page)
+
+        # 查找搜索框并输入
+        search_box = page.get_by_role('textbox', name='主题/文题/作者/刊名')
+        if not await search_box.count() > 0:
+            search_box = page.locator('input[type="text"], input[placeholder*="主题"], input[placeholder*="搜索"]').first
+
+        # 清空并输入搜索词
+        await search_box.click()
+        await search_box.press("ControlOrMeta+a")
+        await search_box.fill(disease_name)
+
+        search_button = page.get_by_role('button', name='搜索')
+        if not await search_button.count() > 0:
+            search_button = page.locator('button:has-text("搜索")').first
+
+        async with engine.limiter.slot(page.url):
+            await search_button.click()
+            # 等待搜索结果更新（或出现无结果提示），超时则退回等待网络空闲
+            try:
+                await page.wait_for_function(
+                    _RESULTS_CHANGED_JS, arg=[self.RESULT_SELECTOR, previous, self.NO_RESULT_TEXTS],
+                    timeout=engine.default_action_timeout
+                )
+            except Exception:
+                await engine.safe_wait_for_load_state(page, 'networkidle')
+
+        for text in self.NO_RESULT_TEXTS:
+            try:
+                if await page.get_by_text(text).count() > 0:
+                    logger.warning(f"搜索 '{disease_name}' 没有找到结果")
+                    break
+            except Exception:
+                pass
+        return True
+
+    async def list_results(self, engine, page, max_results) -> list:
+        results = []
+        await engine.wait_for_selector(page, self.RESULT_SELECTOR, timeout=3000, fallback=False)
+
+        result_selectors = [
+            '.s_searchResult_li',
+            '.search-result-item',
+            '.result-item',
+            '.article-item',
+            '.list-item',
+            'div[class*="result"]',
+            'div[class*="item"]:has(a)'
+        ]
+
+        for selector in result_selectors:
+            try:
+                result_items = await page.locator(selector).all()
+                if not result_items:
+                    continue
+                logger.info(f"使用选择器 '{selector}' 找到 {len(result_items)} 个结果")
+
+                for item in result_items[:max_results]:
+                    try:
+                        title_link = item.locator('a').first
+                        if await title_link.count() > 0:
+                            title = (await title_link.inner_text()).strip()
+                            href = await title_link.get_attribute('href')
+
+                            if title and len(title) > 5:
+                                if not href:
+                                    href = await title_link.get_attribute('onclick')
+                                    if href and 'href' in href:
+                                        match = re.search(r"href\s*=\s*['\"]([^'\"]+)['\"]", href)
+                                        href = match.group(1) if match else None
+                                results.append({'url': self._absolute(page, href), 'title': title, 'text': title})
+                                logger.info(f"找到结果: {title}")
+                        else:
+                            title_text = (await item.inner_text()).strip()
+                            if title_text and len(title_text) > 10:
+                                results.append({'url': None, 'title': title_text, 'text': title_text})
+                    except Exception as e:
+                        logger.debug(f"提取单个结果失败: {e}")
+                        continue
+
+                if results:
+                    break
+            except Exception as e:
+                logger.debug(f"选择器 '{selector}' 失败: {e}")
+                continue
+
+        if not results:
+            logger.info("尝试通用方法查找结果...")
+            try:
+                for link in (await page.locator('a').all())[:50]:
+                    try:
+                        text = (await link.inner_text()).strip()
+                        if (text and 10 <= len(text) <= 200 and
+                                '搜索' not in text and '登录' not in text and
+                                '注册' not in text and '首页' not in text):
+                            href = await link.get_attribute('href')
+                            results.append({'url': self._absolute(page, href), 'title': text, 'text': text})
+                            if len(results) >= max_results:
+                                break
+                    except Exception:
+                        continue
+            except Exception as e:
+                logger.debug(f"通用方法失败: {e}")
+
+        logger.info(f"总共找到 {len(results)} 个结果")
+        return results
+
+    @staticmethod
+    def _absolute(page, href):
+        """详情页链接的绝对地址；只有 onclick/javascript 时返回 None"""
+        href = (href or '').strip()
+        if not href or href.startswith(('javascript', '#')):
+            return None
+        return urljoin(page.url, href)
+
+    async def open_detail(self, engine, context, search_page, link):
+        async with engine.limiter.slot(search_page.url):
+            async with search_page.expect_popup(timeout=15000) as popup_info:
+                await search_page.get_by_text(link['text']).first.click()
+            detail_page = await popup_info.value
+        await detail_page.wait_for_load_state('domcontentloaded')
+        return detail_page
+
+    async def extract_title(self, page):
+        """从详情页提取题目；找不到时返回 None"""
+        selectors = [
+            'h1',
+            '.article-title',
+            '.title',
+            '.paper-title',
+            'header h1',
+            '.detail-title',
+            '[class*="title"]'
+        ]
+
+        for selector in selectors:
+            try:
+                title_elem = page.locator(selector).first
+                if await title_elem.count() > 0:
+                    title = (await title_elem.inner_text()).strip()
+                    if title and len(title) > 5:
+                        logger.info(f"使用选择器 '{selector}' 找到题目: {title}")
+                        return title
+            except Exception:
+                continue
+
+        try:
+            meta_title = page.locator('meta[name="citation_title"], meta[property="og:title"]').first
+            if await meta_title.count() > 0:
+                title = await meta_title.get_attribute('content')
+                if title:
+                    logger.info(f"从meta标签找到题目: {title}")
+                    return title.strip()
+        except Exception:
+            pass
+        return None
+
+    async def extract_abstract(self, page):
+        """从详情页提取摘要"""
+        try:
+            for keyword in ['ABSTRACT', '摘要', 'Abstract']:
+                try:
+                    for elem in await page.locator(f':text("{keyword}")').all():
+                        try:
+                            parent_text = await elem.evaluate('(elem) => elem.parentElement ? elem.parentElement.innerText : ""')
+                            pattern = re.compile(f'{keyword}[\\s:：]*([\\s\\S]+?)(?:\\n\\n|$)', re.IGNORECASE)
+                            match = pattern.search(parent_text)
+                            if match:
+                                abstract = match.group(1).strip()
+                                if len(abstract) > 50:
+                                    logger.info(f"从'{keyword}'找到摘要，长度: {len(abstract)}")
+                                    return abstract
+                        except Exception:
+                            continue
+                except Exception:
+                    continue
+
+            abstract_selectors = [
+                '.abstract',
+                '.abstract-content',
+                '.article-abstract',
+                '.zhaiyao',
+                '[class*="abstract"]',
+                '[class*="Abstract"]',
+                '.summary',
+                '.content'
+            ]
+
+            for selector in abstract_selectors:
+                try:
+                    abstract_elem = page.locator(selector).first
+                    if await abstract_elem.count() > 0:
+                        abstract_text = (await abstract_elem.inner_text()).strip()
+                        if abstract_text and len(abstract_text) > 50:
+                            logger.info(f"使用选择器 '{selector}' 找到摘要，长度: {len(abstract_text)}")
+                            return abstract_text
+                except Exception:
+                    continue
+
+            try:
+                for meta in await page.locator('meta[name="citation_abstract"], meta[name="description"], meta[property="og:description"]').all():
+                    content = await meta.get_attribute('content')
+                    if content and len(content) > 50:
+                        logger.info(f"从meta标签找到摘要，长度: {len(content)}")
+                        return content.strip()
+            except Exception:
+                pass
+
+            try:
+                main_content = page.locator('article, .article-content, .main-content, .content').first
+                if await main_content.count() > 0:
+                    content_text = (await main_content.inner_text()).strip()
+                    if content_text and len(content_text) > 100:
+                        abstract = content_text[:500] + ('...' if len(content_text) > 500 else '')
+                        logger.info(f"从主要内容提取摘要，长度: {len(abstract)}")
+                        return abstract
+            except Exception:
+                pass
+
+            logger.warning("未找到摘要")
+            return "未找到摘要"
+
+        except Exception as e:
+            logger.error(f"提取摘要失败: {e}")
+            return f"提取摘要失败: {e}"
+
+    async def extract_detail(self, engine, page, link):
+        await engine.wait_for_selector(page, self.DETAIL_SELECTOR)
+        return await self.extract_title(page), await self.extract_abstract(page)
+
+    async def _click_for_download(self, page, target):
+        async with page.expect_download(timeout=30000) as download_info:
+            await target.click()
+        return await download_info.value
+
+    async def click_download(self, engine, page):
+        logger.info("尝试下载PDF...")
+        # 等待下载入口渲染；没有下载入口的页面不做额外等待
+        await engine.wait_for_selector(page, self.DOWNLOAD_SELECTOR, timeout=5000, fallback=False)
+
+        # 先点击PDF下载（如果有的话），展开“下载PDF”按钮
+        try:
+            pdf_download_link = page.locator('[id="__layout"]').get_by_text('PDF下载')
+            if await pdf_download_link.count() > 0 and await pdf_download_link.is_visible():
+                logger.info("点击 'PDF下载' 链接")
+                await pdf_download_link.click()
+                await engine.wait_for_selector(page, 'role=button[name="下载PDF"]', timeout=3000, fallback=False)
+        except Exception:
+            pass
+
+        download_strategies = [
+            {'role': 'button', 'name': '下载PDF', 'exact': True},
+            {'role': 'button', 'name': '下载PDF', 'exact': False},
+            {'selector': '.iconfont.icon-google-drive-pdf-file'},
+            {'text': 'PDF下载'},
+            {'text': '下载'},
+            {'text': 'Download PDF'},
+            {'text': 'Download'}
+        ]
+
+        for strategy in download_strategies:
+            try:
+                if 'selector' in strategy:
+                    icon = page.locator(strategy['selector'])
+                    if await icon.count() > 0 and await icon.is_visible():
+                        logger.info(f"找到并点击 {strategy['selector']} 图标")
+                        await icon.click()
+                        await engine.wait_for_selector(page, 'role=button[name="下载PDF"]', timeout=3000, fallback=False)
+                        download_btn = page.get_by_role('button', name='下载PDF')
+                        if await download_btn.count() > 0 and await download_btn.is_visible():
+                            return await self._click_for_download(page, download_btn)
+                    continue
+
+                if 'role' in strategy:
+                    candidates = page.get_by_role(strategy['role'], name=strategy['name'], exact=strategy['exact'])
+                else:
+                    candidates = page.get_by_text(strategy['text'])
+                for i in range(await candidates.count()):
+                    try:
+                        elem = candidates.nth(i)
+                        if await elem.is_visible():
+                            logger.info(f"找到并点击 {strategy}")
+                            return await self._click_for_download(page, elem)
+                    except Exception:
+                        continue
+            except Exception as e:
+                logger.debug(f"下载策略 {strategy} 失败: {e}")
+                continue
+
+        logger.warning("未找到可用的PDF下载方式")
+        return None
+
+
+SITES = {site.SITE: site for site in (CmcrSite, YiigleSite)}
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crawl_cache import CrawlCache, article_key, normalize_url, title_key
+
+
+def test_article_key():
+    assert article_key('https://cmcr.yiigle.com/detail?cmaid=12345&utm_source=x') == 'cmaid:12345'
+    assert article_key('https://doi.org/10.3760/CMA.J.ISSN.1001-9391') == 'doi:10.3760/cma.j.issn.1001-9391'
+    assert article_key('https://rs.yiigle.com/cmaid/98765') == 'cmaid:98765'
+    assert article_key('https://www.yiigle.com/Journal/Detail?id=123456') == 'yiigle:123456'
+    assert article_key('http://www.example.com/a/?b=2&a=1&utm_x=3#top') == 'url:https://example.com/a?a=1&b=2'
+    assert article_key('') is None and article_key(None) is None
+
+
+def test_normalize_url_and_title_key():
+    assert normalize_url('//Example.com/x/') == 'https://example.com/x'
+    assert title_key('病例报告') is None
+    assert title_key('A Case of Dravet Syndrome：病例报告') == 'acaseofdravetsyndrome病例报告'
+
+
+def test_get_and_put(tmp_path):
+    cache = CrawlCache(tmp_path / 'cache.db')
+    cache.put('https://cmcr.yiigle.com/detail?cmaid=1', '题目', '摘要', 'a.pdf', 'cmcr')
+    # 同一文章的另一种链接形式也能命中
+    hit = cache.get('https://www.cmcr.yiigle.com/other?cmaid=1')
+    assert hit['abstract'] == '摘要' and hit['pdf_file'] == 'a.pdf'
+    # 更新摘要；PDF 只在新值非空时覆盖
+    cache.put('https://cmcr.yiigle.com/detail?cmaid=1', '题目', '新摘要', None)
+    assert cache.get('https://cmcr.yiigle.com/detail?cmaid=1')['pdf_file'] == 'a.pdf'
+    assert cache.get('https://cmcr.yiigle.com/detail?cmaid=2') is None
+    assert cache.stats() == {'articles': 1, 'hits': 2, 'misses': 1}
+    cache.close()
+
+
+def test_title_fallback_only_without_url(tmp_path):
+    cache = CrawlCache(tmp_path / 'cache.db')
+    title = 'Dravet 综合征一例并文献复习'
+    cache.put(None, title, '摘要', None, 'www')
+    assert cache.get(None, title)['abstract'] == '摘要'
+    # 有可用链接时只按链接查找
+    assert cache.get('https://example.com/x', title) is None
+    # 题目太短时不缓存
+    cache.put(None, '病例报告', '摘要')
+    assert cache.stats()['articles'] == 1
+    cache.close()
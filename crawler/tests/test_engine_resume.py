@@ -0,0 +1,126 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip('playwright.async_api')
+
+from engine import CrawlEngine
+from sites import SiteAdapter
+
+DISEASE = {'id': 1, 'name': '测试病'}
+PDF_BYTES = b'%PDF-1.4\n1 0 obj <<>> endobj\ntrailer <<>>\n%%EOF\n'
+
+
+class FakePage:
+    def __init__(self, url):
+        self.url = url
+
+    async def wait_for_load_state(self, state, timeout=None):
+        return None
+
+    async def close(self):
+        return None
+
+
+class FakeDownload:
+    url = 'https://example.com/file.pdf'
+
+    async def save_as(self, path):
+        Path(path).write_bytes(PDF_BYTES)
+
+
+class FakeSite(SiteAdapter):
+    SITE = 'fake'
+
+    def __init__(self, save_dir):
+        super().__init__(save_dir)
+        self.extracted = []     # extract_detail 调用过的结果 rank
+        self.fail_open = False
+
+    def file_stem(self, disease, title):
+        return title
+
+    def format_txt(self, disease, title, abstract, url):
+        return f"{title}\n{abstract}\n{url}\n"
+
+    async def open_detail(self, engine, context, search_page, link):
+        if self.fail_open:
+            raise RuntimeError('详情页打不开')
+        return FakePage(link['url'])
+
+    async def extract_detail(self, engine, page, link):
+        self.extracted.append(link['rank'])
+        return f"题目{link['rank']}", f"摘要{link['rank']}"
+
+    async def pdf_urls(self, page):
+        return []
+
+    async def click_download(self, engine, page):
+        return FakeDownload()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    site = FakeSite(tmp_path / 'fake')
+    engine = CrawlEngine([site], write_txt=True)
+    site.disease_dir(DISEASE).mkdir(parents=True)
+    frontier = engine.frontiers[site.SITE]
+    frontier.add_diseases(site.SITE, [DISEASE])
+    frontier.record_search(site.SITE, DISEASE['id'],
+                           [{'url': f'https://example.com/{i}', 'title': f'结果{i}'} for i in range(4)])
+    yield engine
+    engine.close()
+
+
+def visit_todo(engine):
+    site = engine.sites[0]
+    records = {}
+    for link in engine.frontiers[site.SITE].results_todo(site.SITE, DISEASE['id']):
+        link['disease_id'] = DISEASE['id']
+        records[link['rank']] = asyncio.run(engine.visit_result(site, None, None, DISEASE, link))
+    return records
+
+
+def test_resume_from_each_state(engine):
+    site = engine.sites[0]
+    frontier = engine.frontiers[site.SITE]
+    # 1: 详情已保存、PDF 之前中断；2: 详情已保存后打开详情页失败；3: 详情之前失败
+    engine._save_detail(site, DISEASE, {'rank': 1}, '已保存1', '旧摘要1', 'https://example.com/d/1')
+    engine._save_detail(site, DISEASE, {'rank': 2}, '已保存2', '', 'https://example.com/d/2')
+    frontier.result_failed(site.SITE, DISEASE['id'], 2, 'timeout')
+    frontier.result_failed(site.SITE, DISEASE['id'], 3, 'timeout')
+
+    records = visit_todo(engine)
+
+    # 只有没有保存详情的结果重新提取详情，其余只补下载 PDF
+    assert sorted(site.extracted) == [0, 3]
+    assert (records[1]['title'], records[1]['abstract'], records[1]['url']) == \
+        ('已保存1', '旧摘要1', 'https://example.com/d/1')
+    assert records[1]['txt_file'] == str(site.disease_dir(DISEASE) / '已保存1.txt')
+    assert (records[2]['title'], records[2]['abstract']) == ('已保存2', '')
+    assert records[3]['title'] == '题目3'
+    assert all(record['pdf_file'] for record in records.values())
+    assert frontier.results_todo(site.SITE, DISEASE['id']) == []
+    assert frontier.finish_disease(site.SITE, DISEASE['id']) == 'done'
+
+
+def test_pdf_failure_keeps_saved_detail(engine):
+    site = engine.sites[0]
+    frontier = engine.frontiers[site.SITE]
+    engine._save_detail(site, DISEASE, {'rank': 0}, '已保存0', '摘要0', 'https://example.com/d/0')
+    for rank in (1, 2, 3):
+        frontier.result_done(site.SITE, DISEASE['id'], rank, 'done')
+
+    site.fail_open = True
+    assert visit_todo(engine) == {0: None}
+    (row,) = frontier.results_todo(site.SITE, DISEASE['id'])
+    assert row['state'] == 'failed' and row['abstract'] == '摘要0'
+
+    site.fail_open = False
+    records = visit_todo(engine)
+    assert site.extracted == []
+    assert records[0]['title'] == '已保存0' and records[0]['pdf_file']
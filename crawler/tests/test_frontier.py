@@ -0,0 +1,88 @@
+import sys
+import sqlite3
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from frontier import CrawlFrontier
+
+LINKS = [{'url': f'https://example.com/{i}', 'title': f'结果{i}'} for i in range(5)]
+
+
+def make_frontier(tmp_path, **kwargs):
+    frontier = CrawlFrontier(tmp_path / 'frontier.db', **kwargs)
+    frontier.add_diseases('site', [{'id': 1, 'name': '疾病'}])
+    frontier.record_search('site', 1, LINKS)
+    return frontier
+
+
+def test_results_todo_from_each_state(tmp_path):
+    frontier = make_frontier(tmp_path)
+    # 0: pending；1: detail_fetched；2: 详情已保存后失败；3: 详情之前失败；4: 已完成
+    frontier.result_done('site', 1, 1, 'detail_fetched', txt_file='a.txt', title='详情题目', abstract='摘要',
+                         url='https://example.com/detail/1')
+    frontier.result_done('site', 1, 2, 'detail_fetched', title='题目2', abstract='', url='https://example.com/d/2')
+    frontier.result_failed('site', 1, 2, 'timeout')
+    frontier.result_failed('site', 1, 3, 'timeout')
+    frontier.result_done('site', 1, 4, 'pdf_downloaded', pdf_file='4.pdf')
+
+    todo = {row['rank']: row for row in frontier.results_todo('site', 1)}
+    assert sorted(todo) == [0, 1, 2, 3]
+    assert todo[0]['state'] == 'pending' and todo[0]['abstract'] is None
+    assert todo[1]['state'] == 'detail_fetched'
+    assert (todo[1]['detail_title'], todo[1]['abstract'], todo[1]['detail_url'], todo[1]['txt_file']) == \
+        ('详情题目', '摘要', 'https://example.com/detail/1', 'a.txt')
+    # 失败后仍保留已保存的详情（空摘要也算已保存），重试时只需下载 PDF
+    assert todo[2]['state'] == 'failed' and todo[2]['attempts'] == 1
+    assert todo[2]['abstract'] == '' and todo[2]['detail_title'] == '题目2'
+    assert todo[3]['state'] == 'failed' and todo[3]['abstract'] is None
+    frontier.close()
+
+
+def test_failed_results_stop_after_max_attempts(tmp_path):
+    frontier = make_frontier(tmp_path, max_attempts=2)
+    for rank in range(5):
+        frontier.result_done('site', 1, rank, 'done')
+    frontier.result_failed('site', 1, 0, 'e1')
+    assert [row['rank'] for row in frontier.results_todo('site', 1)] == [0]
+    assert frontier.finish_disease('site', 1) == 'failed'
+    frontier.result_failed('site', 1, 0, 'e2')
+    assert frontier.results_todo('site', 1) == []
+    assert frontier.finish_disease('site', 1) == 'done'
+    assert frontier.pending_diseases('site', [{'id': 1, 'name': '疾病'}, {'id': 2, 'name': '其他'}]) == \
+        [{'id': 2, 'name': '其他'}]
+    frontier.close()
+
+
+def test_search_is_kept_across_reopen(tmp_path):
+    frontier = make_frontier(tmp_path)
+    frontier.result_done('site', 1, 0, 'detail_fetched', title='题目', abstract='摘要', url='u')
+    frontier.close()
+
+    frontier = CrawlFrontier(tmp_path / 'frontier.db')
+    assert frontier.searched('site', 1)
+    # 重复登记搜索结果不会覆盖已有进度
+    frontier.record_search('site', 1, LINKS)
+    todo = frontier.results_todo('site', 1)
+    assert len(todo) == 5 and todo[0]['abstract'] == '摘要'
+    frontier.close()
+
+
+def test_old_database_gains_detail_columns(tmp_path):
+    path = tmp_path / 'frontier.db'
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE results (site TEXT NOT NULL, disease_id INTEGER NOT NULL, rank INTEGER NOT NULL, url TEXT, "
+        "title TEXT, state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, txt_file TEXT, "
+        "pdf_file TEXT, error TEXT, updated_at REAL, PRIMARY KEY (site, disease_id, rank))"
+    )
+    conn.execute("INSERT INTO results (site, disease_id, rank, url, title, state) VALUES "
+                 "('site', 1, 0, 'u', 't', 'detail_fetched')")
+    conn.commit()
+    conn.close()
+
+    frontier = CrawlFrontier(path)
+    (row,) = frontier.results_todo('site', 1)
+    # 旧数据库中的 detail_fetched 没有保存详情，只能重新抓取
+    assert row['state'] == 'detail_fetched' and row['abstract'] is None
+    frontier.close()
@@ -0,0 +1,114 @@
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from politeness import HostLimiter, AdaptiveHostLimiter, looks_blocked, looks_blocked_html
+
+URL = 'https://example.com/page'
+
+
+def make(tmp_path, **kwargs):
+    options = dict(min_interval=0.01, max_concurrency=2, floor_interval=0.005, max_interval=1.0, max_limit=4,
+                   increase_after=2, rate_step=50.0, backoff=0.5, log_path=tmp_path / 'rate.jsonl')
+    options.update(kwargs)
+    return AdaptiveHostLimiter(**options)
+
+
+async def request(limiter, status=None, blocked=False, retry_after=None, error=None):
+    async with limiter.slot(URL) as slot:
+        slot.report(status, blocked=blocked, retry_after=retry_after)
+        if error is not None:
+            raise error
+
+
+def run(*coros):
+    async def main():
+        for coro in coros:
+            try:
+                await coro
+            except Exception:
+                pass
+    asyncio.run(main())
+
+
+def state(limiter):
+    return limiter._hosts['example.com']
+
+
+def test_increase_after_consecutive_successes(tmp_path):
+    limiter = make(tmp_path)
+    run(request(limiter, 200))
+    assert (state(limiter).interval, state(limiter).limit) == (0.01, 2)
+    run(request(limiter, 200))
+    assert state(limiter).limit == 3
+    assert 0.005 <= state(limiter).interval < 0.01
+
+
+@pytest.mark.parametrize('status', [403, 429, 500, 503])
+def test_decrease_on_overload_and_forbidden(tmp_path, status):
+    limiter = make(tmp_path)
+    run(request(limiter, status))
+    assert (state(limiter).interval, state(limiter).limit) == (0.02, 1)
+    assert state(limiter).counts == {f'http_{status}': 1}
+    decision = json.loads((tmp_path / 'rate.jsonl').read_text(encoding='utf-8'))
+    assert decision['action'] == 'decrease' and decision['status'] == status
+
+
+@pytest.mark.parametrize('status', [404, 410])
+def test_hold_on_other_client_errors(tmp_path, status):
+    limiter = make(tmp_path)
+    run(request(limiter, 200), request(limiter, status), request(limiter, 200))
+    # 4xx 打断了连续成功，不增加也不减少
+    assert (state(limiter).interval, state(limiter).limit) == (0.01, 2)
+    assert not (tmp_path / 'rate.jsonl').exists()
+
+
+def test_timeout_decreases_and_other_errors_are_ignored(tmp_path):
+    limiter = make(tmp_path)
+    run(request(limiter, error=ValueError('parse')))
+    assert state(limiter).limit == 2
+    run(request(limiter, error=asyncio.TimeoutError()))
+    assert state(limiter).limit == 1 and state(limiter).counts['timeout'] == 1
+
+
+def test_retry_after_pauses_host(tmp_path):
+    limiter = make(tmp_path)
+    run(request(limiter, 429, retry_after='30'))
+    loop_time = asyncio.run(_monotonic())
+    assert state(limiter).next_start >= loop_time + 29
+
+
+async def _monotonic():
+    import time
+    return time.monotonic()
+
+
+def test_concurrency_limit(tmp_path):
+    limiter = HostLimiter(min_interval=0, max_concurrency=2)
+    active, peak = 0, 0
+
+    async def worker():
+        nonlocal active, peak
+        async with limiter.slot(URL):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(6)))
+    asyncio.run(main())
+    assert peak == 2
+
+
+def test_looks_blocked():
+    assert looks_blocked('安全验证')
+    assert looks_blocked('', '请输入验证码')
+    assert not looks_blocked('文章标题', '验证码' + '正文' * 2000)
+    assert looks_blocked_html('<html><title>Captcha</title></html>')
+    assert not looks_blocked_html('<html><title>病例</title><body>内容</body></html>')
@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import argparse
+import numpy as np
+from typing import List, Tuple, Optional
+
+CHPO_FILE = './annotation/app/static/docs/CHPO第七次更新词表-2025-4.xlsx'
+INDEX_DIR = './data/hpo_index'
+
+_NON_WORD_RE = re.compile(r'[\s\W_]+')
+
+
+def _missing(value) -> bool:
+    return value is None or value != value  # None / NaN
+
+
+def chpo_terms_from_dataframe(df) -> List[Tuple[str, str, str]]:
+    """
+    Description:
+        (HPO_ID, english name, chinese name) triples from a CHPO table with the columns
+        HPO编号 / 英 文 / 中文翻译. Rows without an ID or a chinese name are skipped.
+    """
+    terms = []
+    for hpo_id, en, zh in zip(df['HPO编号'], df['英 文'], df['中文翻译']):
+        if _missing(hpo_id) or _missing(zh):
+            continue
+        hpo_id = str(hpo_id).strip()
+        if not hpo_id.startswith('HP:'):
+            hpo_id = f'HP:{hpo_id}'
+        en = '' if _missing(en) else str(en).strip()
+        terms.append((hpo_id, en, str(zh).strip()))
+    return terms
+
+
+def load_chpo_terms(chpo_file: str = CHPO_FILE) -> List[Tuple[str, str, str]]:
+    """
+    Description:
+        Load (HPO_ID, english name, chinese name) triples from the CHPO excel file.
+    """
+    import pandas as pd  # only needed to read the excel file; keeps `import hpo_index` light
+    return chpo_terms_from_dataframe(pd.read_excel(chpo_file))
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and drop whitespace/punctuation so n-grams do not cross separators."""
+    return _NON_WORD_RE.sub('', str(text).lower())
+
+
+def char_ngrams(text: str, n_range: Tuple[int, int] = (2, 3)) -> set:
+    """
+    Description:
+        Character n-grams of a normalized string. Strings shorter than the smallest n
+        are kept as a single gram so that one-character terms remain searchable.
+    """
+    text = normalize_text(text)
+    if not text:
+        return set()
+    low, high = n_range
+    if len(text) < low:
+        return {text}
+    grams = set()
+    for n in range(low, high + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+class HPOIndex:
+    """
+    Inverted character n-gram index over CHPO term names.
+
+    A term is scored by the idf-weighted fraction of its n-grams that occur in the
+    query text, so a term fully spelled out in a description scores 1.0 regardless of
+    how long the description is. The postings are stored as CSR arrays, which lets a
+    saved index be opened with ``np.load(mmap_mode='r')`` instead of being rebuilt.
+    """
+
+    def __init__(self, terms, vocab, gram_indptr, gram_terms, gram_weights, term_norms, n_range=(2, 3)):
+        self.terms: List[Tuple[str, str, str]] = terms
+        self.vocab: dict = vocab
+        self.gram_indptr: np.ndarray = gram_indptr
+        self.gram_terms: np.ndarray = gram_terms
+        self.gram_weights: np.ndarray = gram_weights
+        self.term_norms: np.ndarray = term_norms
+        self.n_range: Tuple[int, int] = tuple(n_range)
+        self._by_id: Optional[dict] = None
+        self._by_name: Optional[dict] = None
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _build_lookups(self):
+        self._by_id, self._by_name = {}, {}
+        for term in self.terms:
+            hpo_id, en, zh = term
+            self._by_id[hpo_id] = term
+            for name in (zh, en):
+                if name:
+                    self._by_name.setdefault(normalize_text(name), term)
+
+    def get(self, hpo_id: str) -> Optional[Tuple[str, str, str]]:
+        """Exact lookup of (HPO_ID, english name, chinese name) by ID."""
+        if self._by_id is None:
+            self._build_lookups()
+        return self._by_id.get(hpo_id)
+
+    def get_by_name(self, name: str) -> Optional[Tuple[str, str, str]]:
+        """Exact lookup by chinese or english name, ignoring case and punctuation."""
+        if self._by_name is None:
+            self._build_lookups()
+        return self._by_name.get(normalize_text(name))
+
+    @classmethod
+    def build(cls, terms: List[Tuple[str, str, str]], n_range: Tuple[int, int] = (2, 3)) -> 'HPOIndex':
+        postings = {}
+        for term_id, (_, _, zh) in enumerate(terms):
+            for gram in char_ngrams(zh, n_range):
+                postings.setdefault(gram, []).append(term_id)
+
+        vocab = {}
+        gram_indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        gram_terms, gram_weights = [], []
+        num_terms = len(terms)
+        for row, gram in enumerate(sorted(postings)):
+            term_ids = postings[gram]
+            vocab[gram] = row
+            idf = np.log((num_terms + 1) / (len(term_ids) + 1)) + 1.0
+            gram_terms.extend(term_ids)
+            gram_weights.extend([idf] * len(term_ids))
+            gram_indptr[row + 1] = len(gram_terms)
+
+        gram_terms = np.asarray(gram_terms, dtype=np.int32)
+        gram_weights = np.asarray(gram_weights, dtype=np.float32)
+        term_norms = np.bincount(gram_terms, weights=gram_weights, minlength=num_terms).astype(np.float32)
+        return cls(terms, vocab, gram_indptr, gram_terms, gram_weights, term_norms, n_range)
+
+    @classmethod
+    def from_excel(cls, chpo_file: str = CHPO_FILE, n_range: Tuple[int, int] = (2, 3)) -> 'HPOIndex':
+        return cls.build(load_chpo_terms(chpo_file), n_range)
+
+    def save(self, index_dir: str = INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, 'gram_indptr.npy'), self.gram_indptr)
+        np.save(os.path.join(index_dir, 'gram_terms.npy'), self.gram_terms)
+        np.save(os.path.join(index_dir, 'gram_weights.npy'), self.gram_weights)
+        np.save(os.path.join(index_dir, 'term_norms.npy'), self.term_norms)
+        with open(os.path.join(index_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_range': list(self.n_range), 'terms': self.terms, 'vocab': self.vocab}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir: str = INDEX_DIR, mmap: bool = True) -> 'HPOIndex':
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(
+            terms=[tuple(t) for t in meta['terms']],
+            vocab=meta['vocab'],
+            gram_indptr=np.load(os.path.join(index_dir, 'gram_indptr.npy'), mmap_mode=mmap_mode),
+            gram_terms=np.load(os.path.join(index_dir, 'gram_terms.npy'), mmap_mode=mmap_mode),
+            gram_weights=np.load(os.path.join(index_dir, 'gram_weights.npy'), mmap_mode=mmap_mode),
+            term_norms=np.load(os.path.join(index_dir, 'term_norms.npy'), mmap_mode=mmap_mode),
+            n_range=meta['n_range'],
+        )
+
+    @classmethod
+    def load_or_build(cls, index_dir: str = INDEX_DIR, chpo_file: str = CHPO_FILE) -> 'HPOIndex':
+        if os.path.exists(os.path.join(index_dir, 'meta.json')):
+            return cls.load(index_dir)
+        index = cls.from_excel(chpo_file)
+        index.save(index_dir)
+        return index
+
+    def score(self, text: str) -> np.ndarray:
+        """Coverage score in [0, 1] of every term against ``text``."""
+        rows = [self.vocab[g] for g in char_ngrams(text, self.n_range) if g in self.vocab]
+        if not rows:
+            return np.zeros(len(self.terms), dtype=np.float32)
+        starts = np.asarray([self.gram_indptr[r] for r in rows])
+        ends = np.asarray([self.gram_indptr[r + 1] for r in rows])
+        hit = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        covered = np.bincount(self.gram_terms[hit], weights=self.gram_weights[hit], minlength=len(self.terms))
+        return covered / np.maximum(self.term_norms, 1e-6)
+
+    def search(self, text: str, top_k: int = 30, min_score: float = 0.5) -> List[Tuple[str, str, str, float]]:
+        """
+        Description:
+            Retrieve the top-k candidate terms for a description.
+
+        Returns:
+            list: (HPO_ID, english name, chinese name, score), best first.
+        """
+        scores = self.score(text)
+        candidates = np.flatnonzero(scores >= min_score)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        # 同分时优先较长的术语（更具体）
+        order = sorted(candidates, key=lambda i: (-scores[i], -len(self.terms[i][2])))
+        return [(*self.terms[i], float(scores[i])) for i in order]
+
+
+def format_candidates(candidates: List[Tuple]) -> str:
+    """Render retrieved candidates as the choice list injected into the prompt."""
+    return '\n'.join(f'{hpo_id} | {en} | {zh}' for hpo_id, en, zh, *_ in candidates)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the CHPO candidate retrieval index.')
+    parser.add_argument('--chpo-file', type=str, default=CHPO_FILE)
+    parser.add_argument('--index-dir', type=str, default=INDEX_DIR)
+    parser.add_argument('--query', type=str, default=None, help='Optional description to test retrieval')
+    parser.add_argument('--top-k', type=int, default=30)
+    args = parser.parse_args()
+
+    index = HPOIndex.from_excel(args.chpo_file)
+    index.save(args.index_dir)
+    print(f'Built index with {len(index)} terms and {len(index.vocab)} n-grams at {args.index_dir}')
+    if args.query:
+        print(format_candidates(HPOIndex.load(args.index_dir).search(args.query, top_k=args.top_k)))
@@ -0,0 +1,150 @@
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+os.environ.setdefault('TQDM_DISABLE', '1')   # progress bars would drown the report
+
+from llm_call import LLM_Call
+from mock_llm_server import serve_in_background, add_mock_arguments, config_from_args
+
+MODES = ['single', 'batch', 'threaded', 'async']
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    k = (len(values) - 1) * q / 100
+    low, high = int(k), min(int(k) + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def _instrument_sync(llm: LLM_Call, latencies: list, failures: list):
+    """Time every single_chat call; failed calls are counted and return None instead of raising."""
+    single_chat = llm.single_chat
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return single_chat(*args, **kwargs)
+        except Exception as e:
+            failures.append(repr(e))
+            return None
+        finally:
+            latencies.append(time.perf_counter() - start)
+    llm.single_chat = timed
+
+
+def _instrument_async(llm: LLM_Call, latencies: list):
+    """Time every AsyncLLM._async_invoke call (including its retries, excluding limiter waits)."""
+    for client in llm.clients:
+        invoke = client._async_invoke
+
+        async def timed(content, _invoke=invoke, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await _invoke(content, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+        client._async_invoke = timed
+
+
+async def _run_async(llm: LLM_Call, prompts: list) -> list:
+    try:
+        return await llm._batch_generate_async(prompts)
+    finally:
+        # 在同一事件循环内关闭连接，避免循环关闭后 httpx 再清理连接
+        for client in llm.clients:
+            await client.llm.close()
+
+
+def run_mode(mode: str, url: str, num_requests: int, num_per_second: int, pool_size: int,
+             workers: int, max_retries: int) -> dict:
+    api_pool = [('mock-key', url, 'mock-model')] * pool_size
+    llm = LLM_Call(
+        api_pool=api_pool,
+        api_model='mock-model',
+        use_async_api=(mode == 'async'),
+        num_per_second=num_per_second,
+        max_retries=max_retries,
+    )
+    prompts = [f'Benchmark prompt {i}' for i in range(num_requests)]
+    latencies, failures = [], []
+
+    start = time.perf_counter()
+    if mode == 'async':
+        _instrument_async(llm, latencies)
+        results = asyncio.run(_run_async(llm, prompts))
+        failures = [r for r in results if r is None]
+    else:
+        _instrument_sync(llm, latencies, failures)
+        if mode == 'single':
+            for i, prompt in enumerate(prompts):
+                llm.single_chat(i % len(llm.clients), prompt)
+        elif mode == 'batch':
+            llm._batch_generate(prompts)
+        else:
+            llm.batch_chat(prompts, max_workers=workers)
+    elapsed = time.perf_counter() - start
+
+    ok = num_requests - len(failures)
+    return {
+        'mode': mode,
+        'rate': num_per_second,
+        'pool': pool_size,
+        'workers': workers if mode == 'threaded' else 1,
+        'ok': ok,
+        'failed': len(failures),
+        'elapsed': elapsed,
+        'throughput': ok / elapsed if elapsed > 0 else 0.0,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'mean': statistics.fmean(latencies) if latencies else float('nan'),
+    }
+
+
+def print_report(rows: list):
+    header = f"  {'Mode':<9} {'Rate':>5} {'Pool':>4} {'Work':>4} {'OK':>5} {'Fail':>5} {'Time(s)':>8} {'Req/s':>7} {'p50':>6} {'p90':>6} {'p99':>6}"
+    print(header)
+    print('  ' + '-' * (len(header) - 2))
+    for r in rows:
+        print(f"  {r['mode']:<9} {r['rate']:>5} {r['pool']:>4} {r['workers']:>4} {r['ok']:>5} {r['failed']:>5} "
+              f"{r['elapsed']:>8.2f} {r['throughput']:>7.2f} {r['p50']:>6.3f} {r['p90']:>6.3f} {r['p99']:>6.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test LLM_Call against a local mock endpoint.')
+    parser.add_argument('--url', type=str, default=None, help='Existing OpenAI-compatible endpoint; a mock server is started if omitted')
+    parser.add_argument('--modes', nargs='*', default=MODES, choices=MODES)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per configuration')
+    parser.add_argument('--rates', nargs='*', type=int, default=[10, 50], help='num_per_second values (async limiter)')
+    parser.add_argument('--pools', nargs='*', type=int, default=[1, 4], help='api_pool sizes')
+    parser.add_argument('--workers', nargs='*', type=int, default=[8], help='Thread counts for the threaded mode')
+    parser.add_argument('--max-retries', type=int, default=0, help='openai client retries (LLM_Call retries are separate)')
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        server = serve_in_background(config=config_from_args(args))
+        url = server.url
+        print(f'Started mock server at {url} ({args.latency_dist}, mean {args.latency_mean}s, '
+              f'500 rate {args.error_rate}, 429 rate {args.rate_limit_rate})\n')
+
+    rows = []
+    for mode in args.modes:
+        # 同步模式不受 num_per_second 影响，只跑一次
+        rates = args.rates if mode == 'async' else args.rates[:1]
+        workers = args.workers if mode == 'threaded' else [1]
+        for rate in rates:
+            for pool in args.pools:
+                for w in workers:
+                    rows.append(run_mode(mode, url, args.requests, rate, pool, w, args.max_retries))
+    print_report(rows)
+
+
+if __name__ == '__main__':
+    main()
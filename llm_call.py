@@ -4,6 +4,7 @@ from openai import OpenAI
 from tqdm import tqdm, trange
 from openai import AsyncOpenAI
 from aiolimiter import AsyncLimiter
+from concurrent.futures import ThreadPoolExecutor
 # from tqdm.asyncio import tqdm_asyncio
 # from langchain_openai import ChatOpenAI
 from typing import List, Tuple, TypedDict, Union, Optional
@@ -159,8 +160,16 @@ class LLM_Call:
         return result
 
     # async batch inference
-    async def _batch_generate_async(self, prompts: List[str]):
-        results = [self.clients[index % len(self.clients)](prompt) for index, prompt in enumerate(prompts)]
+    async def _batch_generate_async(self, prompts: List[str], max_workers: Optional[int] = None):
+        semaphore = asyncio.Semaphore(max_workers) if max_workers else None
+
+        async def bounded(index, prompt):
+            if semaphore is None:
+                return await self.clients[index % len(self.clients)](prompt)
+            async with semaphore:
+                return await self.clients[index % len(self.clients)](prompt)
+
+        results = [bounded(index, prompt) for index, prompt in enumerate(prompts)]
         with tqdm(total=len(results)) as pbar:
             results = await asyncio.gather(
                 *[run_task_with_progress(task, pbar) for task in results]
@@ -177,6 +186,41 @@ class LLM_Call:
         print(time.time() - s)
         return results
 
+    def _safe_single_chat(self, index_prompt: Tuple[int, str]) -> Optional[str]:
+        index, prompt = index_prompt
+        try:
+            return self.single_chat(index % len(self.clients), prompt)
+        except Exception as e:
+            print(e)
+            return None
+
+    # awaitable batch inference for callers already inside an event loop (async mode only)
+    async def abatch_chat(self, prompts: List[str], max_workers: Optional[int] = None) -> List[Optional[str]]:
+        '''
+        max_workers: maximum number of requests in flight (None: bounded only by num_per_second)
+        '''
+        if not self.use_async_api:
+            raise RuntimeError("abatch_chat requires use_async_api=True; use batch_chat for sync clients")
+        responses = await self._batch_generate_async(prompts, max_workers)
+        return [r.choices[0].message.content if r is not None else None for r in responses]
+
+    # batch inference returning message contents (None for failed calls) for both modes
+    def batch_chat(self, prompts: List[str], max_workers: Optional[int] = None) -> List[Optional[str]]:
+        '''
+        max_workers: maximum number of requests in flight, threads for sync clients
+            and a semaphore for async clients (None: sequential for sync clients,
+            bounded only by num_per_second for async clients)
+        '''
+        if self.use_async_api:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self.abatch_chat(prompts, max_workers))
+            raise RuntimeError("batch_chat cannot be called from a running event loop; use `await abatch_chat(...)` instead")
+        if max_workers is not None and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                return list(tqdm(pool.map(self._safe_single_chat, enumerate(prompts)), total=len(prompts)))
+        return [self._safe_single_chat(index_prompt) for index_prompt in enumerate(tqdm(prompts))]
 
 if __name__ == "__main__":
     # api_pool = [(k, API_URL, API_MODEL) for k in API_KEYS]
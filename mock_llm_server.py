@@ -0,0 +1,186 @@
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chunking import estimate_tokens
+
+DEFAULT_CONTENT = '[["HP:0001250", "Seizure", "癫痫发作", "抽搐"]]'
+
+
+class MockConfig:
+    """
+    Behaviour of the mock endpoint.
+
+    Latency is drawn per request from ``latency_dist``: 'fixed' (always ``latency_mean``),
+    'uniform' (0 .. 2 * mean) or 'lognormal' (given mean, log-space std ``latency_sigma``).
+    ``rate_limit_rate`` of the requests are answered immediately with HTTP 429 and
+    ``error_rate`` of them with HTTP 500 after the sampled latency.
+    """
+
+    def __init__(
+        self,
+        latency_dist: str = 'lognormal',
+        latency_mean: float = 0.5,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        completion_tokens: int = 64,
+        content: str = DEFAULT_CONTENT,
+        seed: int = None,
+    ):
+        self.latency_dist = latency_dist
+        self.latency_mean = latency_mean
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.completion_tokens = completion_tokens
+        self.content = content
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    def sample_latency(self) -> float:
+        with self.lock:
+            if self.latency_dist == 'fixed':
+                return self.latency_mean
+            if self.latency_dist == 'uniform':
+                return self.random.uniform(0, 2 * self.latency_mean)
+            mu = math.log(max(self.latency_mean, 1e-6)) - self.latency_sigma ** 2 / 2
+            return self.random.lognormvariate(mu, self.latency_sigma)
+
+    def sample_outcome(self) -> int:
+        with self.lock:
+            r = self.random.random()
+        if r < self.rate_limit_rate:
+            return 429
+        if r < self.rate_limit_rate + self.error_rate:
+            return 500
+        return 200
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like a real API endpoint
+
+    @property
+    def config(self) -> MockConfig:
+        return self.server.config
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.config.lock:
+            self.config.stats[status] += 1
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/stats'):
+            with self.config.lock:
+                stats = {str(k): v for k, v in self.config.stats.items()}
+            return self._send_json(200, stats)
+        self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self._send_json(404, {'error': {'message': 'not found'}})
+
+        outcome = self.config.sample_outcome()
+        if outcome == 429:
+            return self._send_json(
+                429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                headers={'Retry-After': '1'},
+            )
+        time.sleep(self.config.sample_latency())
+        if outcome == 500:
+            return self._send_json(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+
+        prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in request.get('messages', []))
+        completion_tokens = self.config.completion_tokens
+        self._send_json(200, {
+            'id': f'chatcmpl-mock-{time.time_ns()}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.config.content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024   # the default backlog of 5 drops connections under concurrent load
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, config: MockConfig = None):
+        super().__init__((host, port), MockLLMHandler)
+        self.config = config or MockConfig()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+
+def serve_in_background(host: str = '127.0.0.1', port: int = 0, config: MockConfig = None) -> MockLLMServer:
+    """Start a mock server on a daemon thread; use ``server.url`` as the LLM_Call api_url."""
+    server = MockLLMServer(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-mean', type=float, default=0.5, help='Mean latency in seconds')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Log-space std for lognormal latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of HTTP 500 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of HTTP 429 responses')
+    parser.add_argument('--completion-tokens', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        latency_dist=args.latency_dist,
+        latency_mean=args.latency_mean,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        completion_tokens=args.completion_tokens,
+        seed=args.seed,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline OpenAI-compatible chat completion server.')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, config_from_args(args))
+    print(f'Mock LLM server listening on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
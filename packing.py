@@ -0,0 +1,62 @@
+import re
+from typing import List, Optional
+
+from prompts import PROMPT_ANNOTATION_PACKED
+from chunking import estimate_tokens
+from hpo_index import HPOIndex
+from response_parser import extract_json_list, validate_terms
+
+_SAMPLE_NO_RE = re.compile(r'\d+')
+
+
+def pack_records(texts: List[str], max_records: int = 8, max_tokens: int = 1500) -> List[List[int]]:
+    """
+    Description:
+        Greedily group consecutive texts into packs of at most ``max_records`` texts and
+        ``max_tokens`` estimated tokens. A text longer than ``max_tokens`` gets its own pack.
+
+    Returns:
+        list: Packs as lists of positions into ``texts``.
+    """
+    packs, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_records or current_tokens + tokens > max_tokens):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_prompt(texts: List[str]) -> str:
+    """The fixed instruction block followed by the numbered texts (numbered from 1)."""
+    samples = '\n\n'.join(f'### 文本{i}\n{text.strip()}' for i, text in enumerate(texts, start=1))
+    return PROMPT_ANNOTATION_PACKED + samples
+
+
+def split_packed_response(response: str, num_texts: int, hpo_index: Optional[HPOIndex] = None) -> List[Optional[List[list]]]:
+    """
+    Description:
+        Split a packed response back into per-text [HPO_ID, 英文, 中文, 原文] rows using the
+        leading text number of every row. Rows with a missing or out-of-range number are dropped.
+
+    Returns:
+        list: One entry per text; every entry is None if the response could not be decoded.
+    """
+    rows = extract_json_list(response)
+    if rows is None:
+        return [None] * num_texts
+    per_text = [[] for _ in range(num_texts)]
+    for row in rows:
+        if not isinstance(row, (list, tuple)) or len(row) < 2:
+            continue
+        match = _SAMPLE_NO_RE.search(str(row[0]))
+        if not match:
+            continue
+        number = int(match.group())
+        if 1 <= number <= num_texts:
+            per_text[number - 1].append(list(row[1:]))
+    return [validate_terms(text_rows, hpo_index)[0] for text_rows in per_text]
@@ -2,10 +2,17 @@ import json
 from prompts import *
 from tqdm import tqdm
 from llm_call import LLM_Call
+from hpo_index import HPOIndex, format_candidates
+from response_parser import parse_response, needs_repair
+from chunking import chunk_text, merge_predictions
 
 DATA_NO_DUP = '../data/bio_reports/processed_data_no_info_processed.json'
 DATA_PATIENT_SPECIFIC = '../data/bio_reports/processed/patient_specific.json'
 DATA_PATIENT_SPECIFIC_LLM_ANNOTATION = '../data/bio_reports/processed/patient_specific_gemini.json'
+HPO_INDEX_DIR = '../data/hpo_index'
+CHPO_FILE = '../annotation/app/static/docs/CHPO第七次更新词表-2025-4.xlsx'
+CHUNK_TOKENS = 512      # 单次标注的最大估算 token 数，超过则按句切分
+CHUNK_WORKERS = 8       # 同一条长文本各分块的并发请求数
 processed_data = []
 
 LLM = LLM_Call(
@@ -78,23 +85,125 @@ def get_phenotype_from_reports(annotation: list):
             phenotypes.append(phenotype)
     return phenotypes
 
-def llm_annotation(description: str) -> str:
-    prompt = PROMPT_ANNOTATION.format(description=description)
+def build_annotation_prompt(description: str, hpo_index: HPOIndex = None, top_k: int = 30) -> str:
+    """
+    Description:
+        Build the annotation prompt. When an HPO index is given, the top-k retrieved CHPO
+        terms are injected into the prompt and the model chooses among them.
+    """
+    if hpo_index is not None:
+        candidates = hpo_index.search(description, top_k=top_k)
+        return PROMPT_ANNOTATION_CANDIDATES.format(
+            description=description, candidates=format_candidates(candidates)
+        )
+    return PROMPT_ANNOTATION.format(description=description)
+
+def llm_annotation(description: str, hpo_index: HPOIndex = None, top_k: int = 30) -> str:
+    prompt = build_annotation_prompt(description, hpo_index, top_k)
     response = LLM.single_chat(0, prompt)
     return response
 
-def sparse_response(response: str) -> str:
-    pass
+def llm_annotation_chunked(chunks: list, hpo_index: HPOIndex = None, top_k: int = 30) -> list:
+    """
+    Description:
+        Annotate the chunks of one long description concurrently.
+
+    Returns:
+        list: Raw responses, one per chunk (None for failed calls).
+    """
+    prompts = [build_annotation_prompt(chunk, hpo_index, top_k) for chunk in chunks]
+    return LLM.batch_chat(prompts, max_workers=CHUNK_WORKERS)
+
+def sparse_response(response: str, hpo_index: HPOIndex = None) -> list:
+    """
+    Description:
+        Parse an LLM response into validated [HPO_ID, 英文, 中文, 原文] rows.
+        Malformed responses and invalid rows are dropped.
+    """
+    parsed, _ = parse_response(response, hpo_index)
+    return parsed or []
+
+def _annotation_units(item: dict) -> list:
+    """(text, response) pairs of a sample: one per chunk for chunked samples, else one."""
+    if isinstance(item['llm_annotation'], list):
+        return list(zip(item['llm_chunks'], item['llm_annotation']))
+    return [(item['description'], item['llm_annotation'])]
 
-def annotation():
+def _set_units(item: dict, responses: list, hpo_index: HPOIndex = None):
+    if isinstance(item['llm_annotation'], list):
+        item['llm_annotation'] = responses
+        item['llm_predict'] = merge_predictions([sparse_response(r, hpo_index) for r in responses])
+    else:
+        item['llm_annotation'] = responses[0]
+        item['llm_predict'] = sparse_response(responses[0], hpo_index)
+
+def _repair_error(parsed, rejected) -> str:
+    if parsed is None:
+        return '输出无法解析为json列表。'
+    return '以下条目的HPO_ID或术语名称无效：' + json.dumps(rejected, ensure_ascii=False)
+
+def repair_annotation(data: list, hpo_index: HPOIndex = None) -> int:
+    """
+    Description:
+        Re-ask, in one batched pass, only the responses (whole samples or single chunks)
+        that could not be parsed or contained invalid terms. A response whose repair also
+        fails is kept as is, so its valid rows are preserved.
+
+    Returns:
+        int: Number of responses whose repair parsed cleanly.
+    """
+    failing = []
+    for item in data:
+        if item.get('llm_annotation') is None:
+            continue
+        for unit, (text, response) in enumerate(_annotation_units(item)):
+            parsed, rejected = parse_response(response, hpo_index)
+            if needs_repair(parsed, rejected):
+                failing.append((item, unit, text, response, _repair_error(parsed, rejected)))
+    if not failing:
+        return 0
+
+    prompts = [
+        PROMPT_REPAIR.format(description=text, response=response, error=error)
+        for _, _, text, response, error in failing
+    ]
+    repaired_responses = LLM.batch_chat(prompts, max_workers=CHUNK_WORKERS)
+
+    repaired = 0
+    for (item, unit, _, _, _), response in zip(failing, repaired_responses):
+        new_parsed, new_rejected = parse_response(response, hpo_index)
+        if new_parsed is None:
+            continue
+        responses = [r for _, r in _annotation_units(item)]
+        responses[unit] = response
+        _set_units(item, responses, hpo_index)
+        item['llm_repaired'] = True
+        if not new_rejected:
+            repaired += 1
+    print(f'Repaired {repaired}/{len(failing)} responses.')
+    return repaired
+
+def annotation(use_candidates: bool = False, repair: bool = True, chunk_tokens: int = CHUNK_TOKENS):
     with open(DATA_PATIENT_SPECIFIC_LLM_ANNOTATION, 'r', encoding='utf-8') as f:
         data = json.load(f)
+    hpo_index = HPOIndex.load_or_build(HPO_INDEX_DIR, CHPO_FILE)
+    candidate_index = hpo_index if use_candidates else None
     for item in tqdm(data):
         description = item['description']
         if 'llm_annotation' in item:
             continue
-        llm_response = llm_annotation(description)
-        item['llm_annotation'] = llm_response
+        chunks = chunk_text(description, max_tokens=chunk_tokens, overlap_sentences=1)
+        if len(chunks) > 1:
+            # 长文本按句切分后并发标注，再按 HPO_ID 合并
+            item['llm_chunks'] = chunks
+            item['llm_annotation'] = llm_annotation_chunked(chunks, hpo_index=candidate_index)
+        else:
+            item['llm_annotation'] = llm_annotation(description, hpo_index=candidate_index)
+        _set_units(item, [r for _, r in _annotation_units(item)], hpo_index)
+        with open(DATA_PATIENT_SPECIFIC_LLM_ANNOTATION, 'w', encoding='utf-8') as fw:
+            json.dump(data, fw, ensure_ascii=False, indent=4)
+    if repair:
+        repair_annotation(data, hpo_index)
         with open(DATA_PATIENT_SPECIFIC_LLM_ANNOTATION, 'w', encoding='utf-8') as fw:
             json.dump(data, fw, ensure_ascii=False, indent=4)
 
@@ -1,9 +1,22 @@
+import os
 import re
+import sys
 import json
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 直接运行 python preprocess/emr.py 时也能导入仓库根目录的模块
+from prompts import PROMPT_ANNOTATION
+from llm_call import LLM_Call
+from hpo_index import HPOIndex
+from chunking import estimate_tokens
+from response_parser import parse_response
+from packing import pack_records, build_packed_prompt, split_packed_response
+
 emr_data = './data/emr/raw/emr_data.json'
 disease_list = './data/emr/raw/disease_list.txt'
+emr_llm_annotation = './data/emr/processed/emr_llm_annotation.json'
+hpo_index_dir = './data/hpo_index'
+chpo_file = './annotation/app/static/docs/CHPO第七次更新词表-2025-4.xlsx'
 pattern = r'\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])\s(?:[01]\d|2[0-3]):[0-5]\d'
 
 def generate_disease_list(emr_data_path=emr_data, disease_list_path=disease_list):
@@ -60,6 +73,63 @@ def get_sub_k_statistics(k=200, emr_data_path=emr_data):
     print("Scenario counts:", dict(scenario_counts))
     return filtered_records
 
+def llm_annotation_packed(records, llm, hpo_index=None, max_records=8, max_tokens=1500, max_workers=8):
+    """
+    Description:
+        Annotate short records by packing several of them into one request. The packed prompt
+        starts with the fixed instruction block so that all requests share one cacheable prefix.
+        Records of a pack whose response cannot be decoded are re-sent one by one.
+
+    Args:
+        records (list): Records with a 'description' field, annotated in place with 'llm_predict'.
+        llm (LLM_Call): Client used for the requests.
+        hpo_index (HPOIndex): Optional index used to validate and normalise the predicted terms.
+    """
+    packs = pack_records([r['description'] for r in records], max_records=max_records, max_tokens=max_tokens)
+    prompts = [build_packed_prompt([records[i]['description'] for i in pack]) for pack in packs]
+    responses = llm.batch_chat(prompts, max_workers=max_workers)
+
+    failed = []
+    for pack, response in zip(packs, responses):
+        for i, parsed in zip(pack, split_packed_response(response, len(pack), hpo_index)):
+            if parsed is None:
+                failed.append(i)
+                continue
+            records[i]['llm_predict'] = parsed
+            records[i]['llm_packed'] = True
+
+    # 无法解析的打包请求退回逐条标注
+    if failed:
+        single_prompts = [PROMPT_ANNOTATION.format(description=records[i]['description']) for i in failed]
+        for i, response in zip(failed, llm.batch_chat(single_prompts, max_workers=max_workers)):
+            parsed, _ = parse_response(response, hpo_index)
+            records[i]['llm_annotation'] = response
+            records[i]['llm_predict'] = parsed or []
+
+    single_tokens = sum(estimate_tokens(PROMPT_ANNOTATION.format(description=r['description'])) for r in records)
+    packed_tokens = sum(estimate_tokens(p) for p in prompts)
+    print(f"{len(records)} 条记录共 {len(packs)} 次打包请求（逐条重试 {len(failed)} 条），"
+          f"估算输入 token {packed_tokens}，逐条标注约 {single_tokens}。")
+    return records
+
+
+def annotation(k=200, output_path=emr_llm_annotation, max_records=8):
+    """对不超过 k 字的病历记录进行打包 LLM 标注，已标注的记录（按 index）跳过。"""
+    llm = LLM_Call(api_pool=False, use_async_api=False, api_model='gemini-3-flash-preview')
+    hpo_index = HPOIndex.load_or_build(hpo_index_dir, chpo_file)
+
+    done = {}
+    if os.path.exists(output_path):
+        with open(output_path, 'r', encoding='utf-8') as f:
+            done = {item['index']: item for item in json.load(f)}
+    records = [r for r in get_sub_k_statistics(k=k) if r['index'] not in done]
+    llm_annotation_packed(records, llm, hpo_index, max_records=max_records)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(list(done.values()) + records, f, ensure_ascii=False, indent=4)
+
+
 if __name__ == "__main__":
     # generate_disease_list()
     filtered_records = get_sub_k_statistics(k=200)
@@ -14,3 +14,67 @@ PROMPT_ANNOTATION = """# 你是一个医学领域的专业助手，擅长从文
 ## 输出格式
 按照json格式返回，格式如下：
 [[HPO_ID, 标准英文HPO术语名称, 标准CHPO术语名称, 术语在原文中的描述]]"""
+
+
+PROMPT_ANNOTATION_CANDIDATES = """# 你是一个医学领域的专业助手，擅长从文本中提取HPO表型信息。
+
+## 给定文本
+{description}
+
+## 候选HPO术语
+以下是根据给定文本检索得到的候选术语，格式为 HPO_ID | 标准英文HPO术语名称 | 标准CHPO术语名称：
+{candidates}
+
+## 任务描述
+请标注出这段文字中包含的HPO表型，遵循以下原则：
+1. 排除所有阴性的表型，如“无XXX”、“未见XXX”等。
+2. 保留所有待定的表型，如“可能存在XXX”、“疑似XXX”、“未排除XXX”、“XXX不除外”等。
+3. 只能从候选HPO术语中选择，HPO_ID与术语名称必须与候选列表完全一致。
+4. 如果文本中没有提及任何患者相关的表型，或候选术语均不匹配，请返回空结果。
+5. 对于重复的表型不要列出多次。
+
+## 输出格式
+按照json格式返回，格式如下：
+[[HPO_ID, 标准英文HPO术语名称, 标准CHPO术语名称, 术语在原文中的描述]]"""
+
+
+PROMPT_REPAIR = """# 你是一个医学领域的专业助手，擅长从文本中提取HPO表型信息。
+
+## 给定文本
+{description}
+
+## 上一次的输出
+{response}
+
+## 存在的问题
+{error}
+
+## 任务描述
+请修正上一次的输出，重新标注给定文本中的HPO表型，遵循以下原则：
+1. 排除所有阴性的表型，保留所有待定的表型。
+2. 使用标准的HPO、CHPO名称和对应的HPO_ID进行标注。
+3. 对于重复的表型不要列出多次。
+4. 只输出json结果，不要输出任何解释。
+
+## 输出格式
+[[HPO_ID, 标准英文HPO术语名称, 标准CHPO术语名称, 术语在原文中的描述]]"""
+
+
+# 固定指令在前、待标注文本在后，使多次请求共享相同前缀以便命中服务端前缀缓存
+PROMPT_ANNOTATION_PACKED = """# 你是一个医学领域的专业助手，擅长从文本中提取HPO表型信息。
+
+## 任务描述
+下面给出多段相互独立的文本，每段以“### 文本编号”开头。请分别标注出每段文字中包含的HPO表型，遵循以下原则：
+1. 排除所有阴性的表型，如“无XXX”、“未见XXX”等。
+2. 保留所有待定的表型，如“可能存在XXX”、“疑似XXX”、“未排除XXX”、“XXX不除外”等。
+3. 使用标准的HPO、CHPO名称和对应的HPO_ID进行标注。
+4. 如果某段文本中没有提及任何患者相关的表型，则该文本不输出任何条目。
+5. 同一段文本中重复的表型不要列出多次。
+6. 每段文本独立标注，不要把一段文本中的表型标注到其他文本上。
+
+## 输出格式
+按照json格式返回，每个表型一行，第一列为该表型所在的文本编号，格式如下：
+[[文本编号, HPO_ID, 标准英文HPO术语名称, 标准CHPO术语名称, 术语在原文中的描述]]
+
+## 给定文本
+"""
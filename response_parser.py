@@ -0,0 +1,142 @@
+import re
+import json
+import ast
+from typing import List, Optional, Tuple
+
+from hpo_index import HPOIndex
+
+_FENCE_RE = re.compile(r'```(?:json|JSON)?\s*(.*?)```', re.DOTALL)
+_HPO_ID_RE = re.compile(r'^(?:HP)?[\s:_\-]*(\d{1,7})$', re.IGNORECASE)
+_DECODER = json.JSONDecoder()
+
+
+def normalize_hpo_id(raw) -> Optional[str]:
+    """Map 'HP:0001250', 'hp_0001250', 'HP0001250' or '1250' to 'HP:0001250'."""
+    match = _HPO_ID_RE.match(str(raw).strip())
+    if not match:
+        return None
+    return f'HP:{int(match.group(1)):07d}'
+
+
+def _matching_bracket(text: str, start: int) -> int:
+    """Index of the ``]`` closing the ``[`` at ``start``, skipping brackets inside quoted strings; -1 if unbalanced."""
+    depth, quote, i = 0, None, start
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return -1
+
+
+def _decode_list(text: str):
+    """
+    Decode the first JSON (or python-literal) list of rows found in ``text``, ignoring
+    surrounding text. A flat list (e.g. a single row) is only returned if no nested one exists.
+    """
+    flat = None
+    for start in (m.start() for m in re.finditer(r'\[', text)):
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+        except (json.JSONDecodeError, RecursionError):
+            end = _matching_bracket(text, start)
+            if end < 0:
+                continue
+            try:
+                value = ast.literal_eval(text[start:end + 1])
+            except (ValueError, SyntaxError, RecursionError, MemoryError):
+                continue
+        if isinstance(value, list):
+            if not value or isinstance(value[0], (list, tuple)):
+                return value
+            if flat is None:
+                flat = value
+    return flat
+
+
+def extract_json_list(response: str) -> Optional[list]:
+    """
+    Description:
+        Extract the ``[[HPO_ID, 英文, 中文, 原文]]`` list from a model response. Code fences
+        are preferred when present, leading/trailing prose is ignored.
+
+    Returns:
+        list | None: The decoded list, or None if no list could be decoded.
+    """
+    if not response:
+        return None
+    blocks = _FENCE_RE.findall(response) + [response]
+    for block in blocks:
+        value = _decode_list(block.strip())
+        if value is not None:
+            # 单个表型可能被直接输出为一维列表
+            if value and not isinstance(value[0], (list, tuple)):
+                value = [value]
+            return value
+    return None
+
+
+def validate_terms(rows: list, hpo_index: Optional[HPOIndex] = None) -> Tuple[List[list], List[list]]:
+    """
+    Description:
+        Validate parsed rows and normalise their names. Without an index only the shape and
+        ID format are checked. With an index, unknown IDs are resolved through the chinese or
+        english name when possible and names are replaced by the canonical CHPO names.
+
+    Returns:
+        tuple: (valid rows, rejected rows). Valid rows are ``[HPO_ID, 英文, 中文, 原文]``
+        and deduplicated by HPO_ID.
+    """
+    valid, rejected, seen = [], [], set()
+    for row in rows:
+        if not isinstance(row, (list, tuple)) or not row:
+            rejected.append(row)
+            continue
+        row = [str(x).strip() if x is not None else '' for x in row] + [''] * (4 - len(row))
+        hpo_id, en, zh, span = normalize_hpo_id(row[0]), row[1], row[2], row[3]
+
+        if hpo_index is not None:
+            term = hpo_index.get(hpo_id) if hpo_id else None
+            if term is None:
+                term = hpo_index.get_by_name(zh) or hpo_index.get_by_name(en)
+            if term is None:
+                rejected.append(row)
+                continue
+            hpo_id, en, zh = term
+        elif hpo_id is None:
+            rejected.append(row)
+            continue
+
+        if hpo_id in seen:
+            continue
+        seen.add(hpo_id)
+        valid.append([hpo_id, en, zh, span])
+    return valid, rejected
+
+
+def parse_response(response: str, hpo_index: Optional[HPOIndex] = None) -> Tuple[Optional[List[list]], List[list]]:
+    """
+    Returns:
+        tuple: (valid rows, rejected rows). Valid rows are None when no list could be
+        extracted, which marks the response for the repair pass.
+    """
+    rows = extract_json_list(response)
+    if rows is None:
+        return None, []
+    return validate_terms(rows, hpo_index)
+
+
+def needs_repair(parsed: Optional[List[list]], rejected: List[list]) -> bool:
+    """A response is re-asked if it could not be decoded or any of its rows was rejected."""
+    return parsed is None or len(rejected) > 0
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from chunking import estimate_tokens, split_sentences, chunk_text, merge_predictions
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('癫痫发作') == 4
+    assert estimate_tokens('abcdefgh') == 2
+    assert estimate_tokens('发热 fever') == 2 + 2
+
+
+def test_split_sentences_keeps_delimiters():
+    assert split_sentences('发热\n头痛') == ['发热\n', '头痛']
+    # 只有空白的片段被丢弃
+    assert split_sentences('患者发热。伴头痛！\n\n无呕吐') == ['患者发热。', '伴头痛！', '无呕吐']
+    assert ''.join(split_sentences('一。二；三?four!')) == '一。二；三?four!'
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text('患者发热。', max_tokens=10) == ['患者发热。']
+
+
+def test_chunks_respect_limit_and_order():
+    text = ''.join(f'第{i}句话内容。' for i in range(20))
+    chunks = chunk_text(text, max_tokens=20)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 20 for c in chunks)
+    assert ''.join(chunks) == text
+
+
+def test_overlap_repeats_trailing_sentences():
+    text = ''.join(f'句子{i}。' for i in range(10))
+    chunks = chunk_text(text, max_tokens=12, overlap_sentences=1)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.startswith(split_sentences(previous)[-1])
+
+
+def test_long_sentence_is_hard_split():
+    text = '发' * 50
+    chunks = chunk_text(text, max_tokens=16)
+    assert all(estimate_tokens(c) <= 16 for c in chunks)
+    assert ''.join(chunks) == text
+
+
+def test_merge_predictions_dedupes_and_joins_spans():
+    merged = merge_predictions([
+        [['HP:0001945', 'Fever', '发热', '发烧']],
+        None,
+        [['HP:0001945', 'Fever', '发热', '高热'], ['HP:0002315', 'Headache', '头痛', '头痛']],
+        [['HP:0001945', 'Fever', '发热', '发烧']],
+    ])
+    assert merged == [['HP:0001945', 'Fever', '发热', '发烧；高热'], ['HP:0002315', 'Headache', '头痛', '头痛']]
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from hpo_index import HPOIndex, chpo_terms_from_dataframe, char_ngrams, normalize_text
+
+TERMS = [('HP:0001250', 'Seizure', '癫痫发作'), ('HP:0001945', 'Fever', '发热'), ('HP:0002315', 'Headache', '头痛'),
+         ('HP:0012378', 'Fatigue', '乏力')]
+
+
+def test_chpo_terms_from_dataframe():
+    df = pd.DataFrame({'HPO编号': ['HP:0001250', '0001945', None, 'HP:0000001'],
+                       '英 文': ['Seizure', None, 'x', 'All'],
+                       '中文翻译': [' 癫痫发作 ', '发热', '无编号', None]})
+    assert chpo_terms_from_dataframe(df) == [('HP:0001250', 'Seizure', '癫痫发作'), ('HP:0001945', '', '发热')]
+
+
+def test_normalize_and_ngrams():
+    assert normalize_text(' Head-ache, 头痛！') == 'headache头痛'
+    assert char_ngrams('头痛') == {'头痛'}
+    assert char_ngrams('发') == {'发'}
+    assert char_ngrams('癫痫发作') == {'癫痫', '痫发', '发作', '癫痫发', '痫发作'}
+
+
+def test_search_and_lookup():
+    index = HPOIndex.build(TERMS)
+    results = index.search('患者反复癫痫发作，伴发热', top_k=3)
+    # 完整出现的术语得分为 1，同分时较长（更具体）的术语在前
+    assert [r[0] for r in results] == ['HP:0001250', 'HP:0001945']
+    assert all(abs(r[3] - 1.0) < 1e-6 for r in results)
+    assert index.search('头部') == []
+    assert index.get('HP:0002315') == TERMS[2]
+    assert index.get_by_name('fatigue') == TERMS[3]
+
+
+def test_save_and_load(tmp_path):
+    index = HPOIndex.build(TERMS)
+    index.save(str(tmp_path))
+    loaded = HPOIndex.load(str(tmp_path))
+    assert loaded.terms == TERMS
+    assert (loaded.score('头痛乏力') == index.score('头痛乏力')).all()
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from prompts import PROMPT_ANNOTATION_PACKED
+from packing import pack_records, build_packed_prompt, split_packed_response
+
+
+def test_pack_records_limits():
+    texts = ['发热' * 5] * 7
+    assert pack_records(texts, max_records=3, max_tokens=100) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert pack_records(texts, max_records=10, max_tokens=25) == [[0, 1], [2, 3], [4, 5], [6]]
+    # 超长文本单独成一组
+    assert pack_records(['短', '长' * 50, '短'], max_records=8, max_tokens=10) == [[0], [1], [2]]
+    assert pack_records([]) == []
+
+
+def test_build_packed_prompt_shares_prefix():
+    prompt = build_packed_prompt([' 患者发热 ', '头痛'])
+    assert prompt.startswith(PROMPT_ANNOTATION_PACKED)
+    assert prompt.endswith('### 文本1\n患者发热\n\n### 文本2\n头痛')
+
+
+def test_split_packed_response():
+    response = '''```json
+[["1", "HP:0001945", "Fever", "发热", "发烧"],
+ ["文本3", "HP:0002315", "Headache", "头痛", "头痛"],
+ ["5", "HP:0001250", "Seizure", "癫痫发作", "抽搐"],
+ ["无编号", "HP:0001250", "Seizure", "癫痫发作", "抽搐"]]
+```'''
+    assert split_packed_response(response, 3) == [
+        [['HP:0001945', 'Fever', '发热', '发烧']], [], [['HP:0002315', 'Headache', '头痛', '头痛']]
+    ]
+    assert split_packed_response('无法解析', 2) == [None, None]
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from hpo_index import HPOIndex
+from response_parser import normalize_hpo_id, extract_json_list, validate_terms, parse_response, needs_repair
+
+TERMS = [('HP:0001250', 'Seizure', '癫痫发作'), ('HP:0001945', 'Fever', '发热'), ('HP:0002315', 'Headache', '头痛')]
+
+
+def test_normalize_hpo_id():
+    assert normalize_hpo_id('HP:0001250') == 'HP:0001250'
+    assert normalize_hpo_id('hp_0001250') == 'HP:0001250'
+    assert normalize_hpo_id('HP0001250') == 'HP:0001250'
+    assert normalize_hpo_id(' 1250 ') == 'HP:0001250'
+    assert normalize_hpo_id('癫痫') is None
+    assert normalize_hpo_id('HP:12345678') is None
+
+
+def test_extract_prefers_code_fence_and_ignores_prose():
+    response = '分析如下：[注意] 见下表\n```json\n[["HP:0001250", "Seizure", "癫痫发作", "抽搐"]]\n```\n以上。'
+    assert extract_json_list(response) == [['HP:0001250', 'Seizure', '癫痫发作', '抽搐']]
+
+
+def test_extract_python_literal_and_single_row():
+    assert extract_json_list("结果：[['HP:0001945', 'Fever', '发热', '发烧']]") == [['HP:0001945', 'Fever', '发热', '发烧']]
+    # 单个表型直接输出为一维列表
+    assert extract_json_list('["HP:0001945", "Fever", "发热", "发烧"]') == [['HP:0001945', 'Fever', '发热', '发烧']]
+    # 引号内的方括号不影响配对
+    assert extract_json_list("[['HP:0001945', 'Fever', '发热', '体温[39度]']]")[0][3] == '体温[39度]'
+
+
+def test_extract_failures_return_none():
+    assert extract_json_list('') is None
+    assert extract_json_list(None) is None
+    assert extract_json_list('没有发现表型。') is None
+    assert extract_json_list('[["HP:0001250", "Seizure"') is None
+    assert extract_json_list('[' * 3000) is None
+
+
+def test_extract_empty_list():
+    assert extract_json_list('```json\n[]\n```') == []
+
+
+def test_validate_without_index_checks_ids():
+    valid, rejected = validate_terms([
+        ['HP:0001250', 'Seizure', '癫痫发作', '抽搐'],
+        ['0001250', 'Seizure', '癫痫发作', '再次抽搐'],    # 同一 ID 去重
+        ['癫痫', 'Seizure', '癫痫发作', ''],               # ID 不合法
+        'HP:0001945',                                      # 不是行
+        ['HP:1945', 'Fever'],                              # 缺少的列补空
+    ])
+    assert valid == [['HP:0001250', 'Seizure', '癫痫发作', '抽搐'], ['HP:0001945', 'Fever', '', '']]
+    assert len(rejected) == 2
+
+
+def test_validate_with_index_resolves_names():
+    index = HPOIndex.build(TERMS)
+    valid, rejected = validate_terms([
+        ['HP:0001250', 'seizure', '癫痫', '抽搐'],      # ID 已知：名称换成标准名称
+        ['HP:9999999', 'Fever', '发热', '发烧'],        # ID 未知：按中文名找回
+        ['', 'HEADACHE', '', '头疼'],                   # 按英文名找回
+        ['HP:9999998', '', '不存在的表型', ''],
+    ], index)
+    assert valid == [['HP:0001250', 'Seizure', '癫痫发作', '抽搐'], ['HP:0001945', 'Fever', '发热', '发烧'],
+                     ['HP:0002315', 'Headache', '头痛', '头疼']]
+    assert rejected == [['HP:9999998', '', '不存在的表型', '']]
+
+
+def test_parse_response_and_needs_repair():
+    parsed, rejected = parse_response('[["HP:0001250", "Seizure", "癫痫发作", "抽搐"]]')
+    assert parsed == [['HP:0001250', 'Seizure', '癫痫发作', '抽搐']] and rejected == []
+    assert not needs_repair(parsed, rejected)
+    assert parse_response('无法解析') == (None, [])
+    assert needs_repair(None, [])
+    assert needs_repair([], [['bad']])